@@ -0,0 +1,108 @@
+"""Benchmarks the in-process audio-score alignment
+
+Synthesizes a performance of the sample SymbTr score, i.e. a pitch track
+following the notes of all sections in the score order, and reports the
+alignment time and the errors of the aligned note boundaries. The
+performance is repeated to simulate longer recordings. Run from the
+repository root, e.g.:
+
+    python benchmarks/bench_audio_score_alignment.py --repeats 1 4
+"""
+import argparse
+import os
+import timeit
+
+import numpy as np
+
+from tomato.joint.audioscorealigner import AudioScoreAligner
+from tomato.musicdata import MusicData
+from tomato.symbolic.symbtr.reader.txt import TxtReader
+from tomato.symbolic.symbtr.section import SectionExtractor
+
+SYMBTR_NAME = 'ussak--sazsemaisi--aksaksemai----neyzen_aziz_dede'
+
+
+def read_score():
+    txt_filepath = os.path.join('sample-data', SYMBTR_NAME,
+                                SYMBTR_NAME + '.txt')
+    score, _ = TxtReader.read(txt_filepath, symbtr_name=SYMBTR_NAME)
+    sections, _ = SectionExtractor().from_txt_score(score, SYMBTR_NAME)
+
+    return score, sections
+
+
+def synth_performance(score, sections, repeat, rel_tempo=0.9, seed=0,
+                      hop_size=128 / 44100.0, tonic_freq=220.0):
+    """Synthesizes a pitch track, where each note is played with a random
+    tempo deviation and a random pitch deviation
+
+    Returns:
+        (numpy.array): the pitch track
+        (list): the (index in score, start, end) of the performed notes
+    """
+    rand = np.random.RandomState(seed)
+    note_cents = MusicData.get_note_cents()
+
+    segments = [np.zeros(300)]
+    performed_notes = []
+    time_stamp = 300 * hop_size
+    for section in sections * repeat:
+        start = score['index'].index(section['start_note'])
+        end = score['index'].index(section['end_note'])
+        for row in range(start, end + 1):
+            if score['code'][row] in range(50, 57):
+                continue
+            num_samples = int(round(
+                score['duration'][row] * 0.001 / rel_tempo *
+                (1 + 0.1 * rand.randn()) / hop_size))
+            symbol = score['noteAE'][row]
+            if symbol in note_cents:
+                segments.append(tonic_freq * 2 ** (
+                    (note_cents[symbol] - note_cents['A4'] +
+                     10 * rand.randn(num_samples)) / 1200.0))
+            else:  # rest
+                segments.append(np.zeros(num_samples))
+            performed_notes.append((score['index'][row], time_stamp,
+                                    time_stamp + num_samples * hop_size))
+            time_stamp += num_samples * hop_size
+    segments.append(np.zeros(300))
+
+    hz = np.concatenate(segments)
+    return np.column_stack((np.arange(len(hz)) * hop_size, hz)), \
+        performed_notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', nargs='+', type=int, default=[1, 4],
+                        help='number of times the score is performed')
+    args = parser.parse_args()
+
+    score, sections = read_score()
+    rel_tempo = 0.9
+
+    print('{0:>9s} {1:>9s} {2:>9s} {3:>9s} {4:>12s}'.format(
+        'dur(s)', 'notes', 'time(s)', 'sections', 'mean err(s)'))
+    for repeat in args.repeats:
+        pitch, performed_notes = synth_performance(
+            score, sections, repeat, rel_tempo=rel_tempo)
+
+        tic = timeit.default_timer()
+        aligned_sections, aligned_notes, _, _ = AudioScoreAligner().align(
+            score, sections, pitch, {'value': 220.0, 'symbol': 'A4'},
+            {'relative': {'value': rel_tempo}})
+        align_dur = timeit.default_timer() - tic
+
+        # the repeated sections may be assigned to another repetition with
+        # the same melody, compare only the times in the performance order
+        num_notes = min(len(aligned_notes), len(performed_notes))
+        errors = [abs(an['interval'][0] - pn[1]) for an, pn in zip(
+            aligned_notes[:num_notes], performed_notes[:num_notes])]
+
+        print('{0:>9.0f} {1:>9d} {2:>9.3f} {3:>9d} {4:>12.3f}'.format(
+            pitch[-1, 0], len(aligned_notes), align_dur,
+            len(aligned_sections), np.mean(errors)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Benchmarks the JSON and the binary (NPZ) feature formats
+
+Writes synthetic audio features, i.e. a pitch track, pitch distributions and
+the melodic progression, with IO.to_json and IO.to_npz, and reports the file
+sizes, the write and read times and the time to read only the pitch track.
+Run from the repository root, e.g.:
+
+    python benchmarks/bench_feature_io.py --durations 600 3600
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+
+from tomato.audio.pitchdistribution import PitchDistribution
+from tomato.audio.pitchtrack import PitchTrack
+from tomato.io import IO
+
+
+def synth_features(duration, seed=0, hop_size=128, sample_rate=44100,
+                   frame_dur=20.0):
+    """Generates the features of an analysis of a recording of duration
+    seconds
+
+    Returns:
+        (dict): the features
+    """
+    rand = np.random.RandomState(seed)
+    num_samples = int(duration * sample_rate / hop_size)
+
+    hz = 220.0 * 2 ** (np.cumsum(rand.randn(num_samples)) / 1200.0)
+    hz[rand.rand(num_samples) < 0.2] = 0
+    pitch = PitchTrack.from_arrays(hz, salience=rand.rand(num_samples),
+                                   hop_size=hop_size, sample_rate=sample_rate)
+
+    bins = np.arange(-2400.0, 3600.0, 7.5)
+    melodic_progression = [
+        {'time_interval': [ii * frame_dur, (ii + 1) * frame_dur],
+         'average_pitch': 220.0,
+         'pitch_distribution': PitchDistribution(bins, rand.rand(len(bins)))}
+        for ii in range(int(duration / frame_dur))]
+
+    return {'pitch_filtered': {'pitch': pitch, 'source': 'synth.mp3'},
+            'pitch_distribution': PitchDistribution(bins,
+                                                    rand.rand(len(bins))),
+            'melodic_progression': melodic_progression,
+            'tonic': {'value': 220.0, 'unit': 'Hz'}}
+
+
+def time_best(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--durations', nargs='+', type=float,
+                        default=[600.0, 3600.0],
+                        help='durations of the synthetic recordings (sec)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp()
+    formats = [
+        ('json', lambda f, p: IO.to_json(f, p),
+         lambda p: dict(IO.from_json(p)), lambda p: IO.from_json(p)),
+        ('npz', lambda f, p: IO.to_npz(f, p),
+         lambda p: dict(IO.from_npz(p)), lambda p: IO.from_npz(p)),
+        ('npz-mmap', lambda f, p: IO.to_npz(f, p, compress=False),
+         lambda p: dict(IO.from_npz(p, mmap=True)),
+         lambda p: IO.from_npz(p, mmap=True))]
+
+    print('{0:>9s} {1:>9s} {2:>9s} {3:>9s} {4:>9s} {5:>9s}'.format(
+        'dur(s)', 'format', 'size(MB)', 'write(s)', 'read(s)', 'pitch(s)'))
+    try:
+        for duration in args.durations:
+            features = synth_features(duration)
+            for name, write, read, open_file in formats:
+                filepath = os.path.join(out_dir, 'features.' + name)
+                write_dur = time_best(lambda: write(features, filepath),
+                                      args.repeat)
+                read_dur = time_best(lambda: read(filepath), args.repeat)
+                pitch_dur = time_best(
+                    lambda: open_file(filepath)['pitch_filtered'],
+                    args.repeat)
+
+                print('{0:>9.0f} {1:>9s} {2:>9.2f} {3:>9.3f} {4:>9.3f} '
+                      '{5:>9.3f}'.format(
+                          duration, name, os.path.getsize(filepath) / 1e6,
+                          write_dur, read_dur, pitch_dur))
+    finally:
+        shutil.rmtree(out_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmarks the import time of tomato
+
+Imports each module in a fresh interpreter and reports the best wall time of
+the repeats, together with the heavy dependencies, which the import pulls
+in. Run from the repository root, e.g.:
+
+    python benchmarks/bench_import_time.py --repeat 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+DEFAULT_MODULES = ['tomato',
+                   'tomato.audio.audioanalyzer',
+                   'tomato.symbolic.symbtranalyzer',
+                   'tomato.symbolic.symbtrconverter',
+                   'tomato.joint.jointanalyzer',
+                   'tomato.joint.completeanalyzer']
+
+HEAVY_DEPENDENCIES = ['essentia', 'matplotlib', 'scipy', 'pandas',
+                      'networkx', 'musicbrainzngs', 'json_tricks', 'eyed3',
+                      'Levenshtein']
+
+TIMER_CODE = '''
+import importlib, json, sys, timeit
+tic = timeit.default_timer()
+importlib.import_module(sys.argv[1])
+duration = timeit.default_timer() - tic
+print(json.dumps({'duration': duration,
+                  'loaded': [dep for dep in sys.argv[2:]
+                             if dep in sys.modules]}))
+'''
+
+
+def time_import(module, repeat):
+    """Imports the module in repeat fresh interpreters
+
+    Returns:
+        (tuple): the best import time (in seconds) and the heavy
+            dependencies imported by the module, (None, None) if the import
+            fails
+    """
+    durations = []
+    loaded = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-c', TIMER_CODE, module] + HEAVY_DEPENDENCIES,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        if proc.returncode != 0:
+            return None, None
+        result = json.loads(
+            proc.stdout.decode('utf-8').strip().splitlines()[-1])
+        durations.append(result['duration'])
+        loaded = result['loaded']
+
+    return min(durations), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES,
+                        help='the modules to import')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print('{0:<36s} {1:>10s}  {2:s}'.format(
+        'module', 'import(s)', 'heavy dependencies'))
+    for module in args.modules:
+        duration, loaded = time_import(module, args.repeat)
+        if duration is None:
+            print('{0:<36s} {1:>10s}'.format(module, 'failed'))
+            continue
+        print('{0:<36s} {1:>10.3f}  {2:s}'.format(
+            module, duration, ', '.join(loaded) or '-'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Benchmarks the contour selection in PredominantMelody
+
+Compares PredominantMelody.select_contours with the original implementation
+(PredominantMelody._select_contours_by_overlap_sets) on synthetic contour
+sets. Run from the repository root, e.g.:
+
+    python benchmarks/bench_select_contours.py --sizes 1000 10000 50000
+"""
+import argparse
+import copy
+import timeit
+
+import numpy as np
+
+from tomato.audio.predominantmelody import PredominantMelody
+
+
+def synth_contours(num_contours, seed=0, samples_per_contour=8,
+                   min_len=5, max_len=200):
+    """Generates random contours scattered over an audio of
+    num_contours * samples_per_contour samples
+
+    Returns:
+        (tuple): pitch contours (in bins), contour saliences, start times of
+            the contours (in seconds) and the duration of the audio (seconds)
+    """
+    rand = np.random.RandomState(seed)
+    extractor = PredominantMelody()
+    sample_dur = extractor.hop_size / float(extractor.sample_rate)
+    num_samples = num_contours * samples_per_contour
+
+    # the contours end within the audio
+    lens = rand.randint(min_len, max_len, num_contours)
+    start_samples = (rand.rand(num_contours) *
+                     (num_samples - lens)).astype(int)
+
+    pitch_contours = [3000 + np.cumsum(rand.randn(ll)) for ll in lens]
+    contour_saliences = [rand.rand(ll) for ll in lens]
+    start_times = (start_samples * sample_dur).tolist()
+
+    return (pitch_contours, contour_saliences, start_times,
+            num_samples * sample_dur)
+
+
+def time_call(func, contour_set, repeat):
+    # the original implementation consumes its inputs; pass copies
+    times = []
+    for _ in range(repeat):
+        inputs = copy.deepcopy(contour_set)
+        tic = timeit.default_timer()
+        result = func(*inputs)
+        times.append(timeit.default_timer() - tic)
+
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 10000, 50000],
+                        help='number of contours in the synthetic sets')
+    parser.add_argument('--max-original-size', type=int, default=10000,
+                        help='the largest set the original implementation is '
+                             'run on; it scales quadratically')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    extractor = PredominantMelody()
+    print('{0:>10s} {1:>12s} {2:>12s} {3:>10s}'.format(
+        'contours', 'interval(s)', 'original(s)', 'same'))
+    for size in args.sizes:
+        contour_set = synth_contours(size)
+        new_time, new_result = time_call(
+            extractor.select_contours, contour_set, args.repeat)
+
+        if size <= args.max_original_size:
+            orig_time, orig_result = time_call(
+                extractor._select_contours_by_overlap_sets, contour_set,
+                args.repeat)
+            same = all(np.array_equal(n, o)
+                       for n, o in zip(new_result, orig_result))
+            orig_str = '{0:.3f}'.format(orig_time)
+        else:
+            orig_str = same = '-'
+
+        print('{0:>10d} {1:>12.3f} {2:>12s} {3:>10s}'.format(
+            size, new_time, orig_str, str(same)))
+
+
+if __name__ == '__main__':
+    main()
@@ -164,6 +164,11 @@ setup(
     packages=find_packages(TOMATO_DIR),
     package_dir={"": TOMATO_DIR},
     include_package_data=True,
+    entry_points={
+        "console_scripts": [
+            "tomato-audio-batch=tomato.audio.audiobatchanalyzer:main",
+        ],
+    },
     python_requires=">=3.5,<3.8",
     install_requires=[
         "numpy>=1.9.0",  # numerical operations
@@ -34,8 +34,9 @@ logger = logging.Logger(  # pylint: disable-msg=C0103
 class Analyzer:
     __metaclass__ = ABCMeta
 
-    def __init__(self, verbose):
+    def __init__(self, verbose, cache=None):
         self.verbose = verbose
+        self.cache = cache  # FeatureCache object or None
 
     @abstractproperty
     def _inputs(self):
@@ -97,6 +98,52 @@ class Analyzer:
         else:  # flag is the precomputed feature itself
             return flag
 
+    def _cached_caller(self, keys, name, flag, func, *input_args,
+                       params=None, upstream=()):
+        """
+        Calls _partial_caller, reusing the feature stored in the cache if
+        the feature has already been computed with the same parameters and
+        the same upstream features. The key of the feature is stored in the
+        "keys" dictionary so the downstream steps can refer to it.
+        :param keys: dictionary of the feature keys computed so far
+        :param name: name of the feature
+        :param flag: None (compute), False (skip) or the precomputed feature
+        :param func: the method computing the feature
+        :param input_args: inputs of the method
+        :param params: parameters of the method, affecting the output
+        :param upstream: names of the features (or inputs) in "keys" the
+                         method depends on
+        :return: the feature
+        """
+        if self.cache is None or flag is False:
+            return self._partial_caller(flag, func, *input_args)
+
+        if flag is not None:  # precomputed feature, address by its content
+            keys[name] = self.cache.hash_object(flag)
+            return flag
+
+        keys[name] = self.cache.make_key(
+            name, params=params, upstream_keys=[keys.get(u) for u in upstream])
+        try:
+            feature = self.cache.get(keys[name])
+            self.vprint("- Loaded {0:s} from the cache".format(name))
+        except KeyError:
+            feature = self._partial_caller(flag, func, *input_args)
+            if feature is not None:  # do not cache the failures
+                self.cache.set(keys[name], feature)
+
+        return feature
+
+    @staticmethod
+    def _get_params(analyzer):
+        # the public attributes of an extractor object, or a copy of a
+        # parameter dictionary
+        try:  # dictionary
+            return dict(analyzer)
+        except TypeError:  # object
+            return dict((attr, getattr(analyzer, attr))
+                        for attr in IO.public_noncallables(analyzer))
+
     @staticmethod
     def _get_first(feature):
         if isinstance(feature, list):  # list of features given
@@ -24,7 +24,7 @@
 import numpy as np
 
 from ..converter import Converter
-from ..io import IO
+from ..musicdata import MusicData
 
 
 class Ahenk:
@@ -36,8 +36,8 @@ class Ahenk:
             raise ValueError("The input tonic frequency must be between "
                              "and 20000 Hz.")
 
-        tonic_dict = IO.load_music_data('tonic')
-        ahenks = IO.load_music_data('ahenk')
+        tonic_dict = MusicData.get('tonic')
+        ahenks = MusicData.get('ahenk')
 
         # get the tonic symbol and frequency
         tonic_symbol, tonic_bolahenk_freq, makam = cls._get_tonic_symbol(
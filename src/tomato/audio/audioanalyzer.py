@@ -23,25 +23,27 @@
 
 import copy
 import logging
-import pickle
 import timeit
 import warnings
 
-import numpy as np
-from musicbrainzngs import NetworkError, ResponseError
-
 from ..analyzer import Analyzer
 from ..io import IO
+from ..lazyfeatures import LazyFeatures
+from ..lazyimport import lazy_import
 from ..metadata.recording import Recording as RecordingMetadata
 from ..plotter import Plotter
+from ..stagegraph import StageGraph
 from .ahenk import Ahenk
 from .makamtonic.knnclassifier import KNNClassifier as MakamClassifier
 from .makamtonic.toniclastnote import TonicLastNote
 from .notemodel import NoteModel
 from .pitchdistribution import PitchDistribution
-from .pitchfilter import PitchFilter
+from .pitchtrack import PitchTrack
 from .predominantmelody import PredominantMelody
 from .seyir import Seyir
+from .vectorizedpitchfilter import VectorizedPitchFilter
+
+musicbrainzngs = lazy_import('musicbrainzngs')  # pylint: disable-msg=C0103
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.INFO)
@@ -52,8 +54,28 @@ class AudioAnalyzer(Analyzer):
                'pitch', 'pitch_class_distribution', 'pitch_distribution',
                'pitch_filtered', 'tempo', 'tonic', 'transposition']
 
-    def __init__(self, verbose=False):
-        super(AudioAnalyzer, self).__init__(verbose=verbose)
+    # the features computed by the analyzer in the order of computation and
+    # the features (or "audio", the audio file) each is computed from. The
+    # upstream features are the inputs of the method computing the feature.
+    # TODO: tempo extraction
+    _stage_graph = StageGraph([
+        ('metadata', []),  # from the audio file tags or the MBID
+        ('pitch', ['audio']),
+        ('pitch_filtered', ['pitch']),
+        ('pitch_distribution', ['pitch_filtered']),
+        ('pitch_class_distribution', ['pitch_filtered']),
+        ('tonic', ['pitch_filtered']),
+        ('makam', ['metadata', 'pitch_filtered', 'tonic']),
+        ('transposition', ['tonic', 'makam']),
+        ('note_models', ['pitch_distribution', 'tonic', 'makam']),
+        ('melodic_progression', ['pitch_filtered'])])
+
+    def __init__(self, verbose=False, cache=None, num_workers=1):
+        super(AudioAnalyzer, self).__init__(verbose=verbose, cache=cache)
+
+        # number of the features computed at the same time, e.g. the pitch
+        # distributions, tonic and melodic progression after pitch filtering
+        self.num_workers = num_workers
 
         # settings that are not defined in the respective classes
         self._pd_params = {'kernel_width': 7.5, 'step_size': 7.5}
@@ -72,73 +94,160 @@ class AudioAnalyzer(Analyzer):
         # extractors
         self._pitch_extractor = PredominantMelody(filter_pitch=False)  #
         # filter_pitch uses Essentia PitchFilter, which is not as good as our
-        # Python implementation
-        self._pitch_filter = PitchFilter()
+        # Python implementation. VectorizedPitchFilter gives the same output
+        # as PitchFilter in a fraction of the time
+        self._pitch_filter = VectorizedPitchFilter()
         self._melodic_progression_analyzer = Seyir()
         self._tonic_identifier = TonicLastNote()  # We prefer last note
         # detection over distribution matching as it's more generalizable.
 
-        self._makam_recognizer = MakamClassifier(
-            model=self._get_makam_tonic_training())
+        self._makam_recognizer = MakamClassifier()
+        self._makam_recognizer.model_from_compiled(
+            self._get_makam_tonic_training())
         self._note_modeler = NoteModel()
 
-    def analyze(self, filepath='', **kwargs):
+        # the last pitch and its PitchTrack, see _get_pitch_track
+        self._pitch_track = None
+
+    def analyze(self, filepath='', outputs=None, lazy=False, **kwargs):
+        """
+        Analyzes the audio recording
+        :param filepath: path of the audio file
+        :param outputs: names of the features to compute, e.g. ['tonic'].
+                        Only these features and the features they depend on
+                        are computed. None computes all the features
+        :param lazy: if True, returns a LazyFeatures mapping, which computes
+                     each feature on its first access. The outputs are
+                     computed right away
+        :param kwargs: the flags of the features: None (compute), False
+                       (skip) or the precomputed feature
+        :return: dictionary (or LazyFeatures) of the features
+        """
         audio_f = self._parse_inputs(**kwargs)
+        keys = self._get_input_keys(filepath)  # cache keys of the features
+
+        def compute(name, flag, features):
+            return self._compute_feature(name, flag, features, keys, filepath)
 
-        # metadata
-        audio_f['metadata'] = self._call_audio_metadata(
-            audio_f['metadata'], filepath)
-
-        # predominant melody extraction
-        audio_f['pitch'] = self._partial_caller(
-            audio_f['pitch'], self.extract_pitch, filepath)
-
-        # pitch filtering
-        audio_f['pitch_filtered'] = self._partial_caller(
-            audio_f['pitch_filtered'], self.filter_pitch, audio_f['pitch'])
-
-        # histogram computation
-        audio_f['pitch_distribution'] = self._partial_caller(
-            audio_f['pitch_distribution'], self.compute_pitch_distribution,
-            audio_f['pitch_filtered'])
-        audio_f['pitch_class_distribution'] = self._partial_caller(
-            audio_f['pitch_class_distribution'],
-            self.compute_pitch_class_distribution, audio_f['pitch_filtered'])
-
-        # tonic identification
-        audio_f['tonic'] = self._partial_caller(
-            audio_f['tonic'], self.identify_tonic, audio_f['pitch_filtered'])
-
-        # makam recognition
-        audio_f['makam'] = self._partial_caller(
-            audio_f['makam'], self.get_makams, audio_f['metadata'],
-            audio_f['pitch_filtered'], audio_f['tonic'])
-        audio_f['makam'] = self._partial_caller(
-            None, self._get_first, audio_f['makam'])
-
-        # transposition (ahenk) identification
-        # TODO: allow transpositions for multiple makams
-        audio_f['transposition'] = self._partial_caller(
-            audio_f['transposition'], self.identify_transposition,
-            audio_f['tonic'], audio_f['makam'])
-
-        # note models
-        # TODO: check if there is more than one transposition name, if yes warn
-        audio_f['note_models'] = self._partial_caller(
-            audio_f['note_models'], self.compute_note_models,
-            audio_f['pitch_distribution'], audio_f['tonic'], audio_f['makam'])
-
-        # get the melodic progression
-        audio_f['melodic_progression'] = self._partial_caller(
-            audio_f['melodic_progression'], self.compute_melodic_progression,
-            audio_f['pitch_filtered'])
-
-        # tempo extraction
-        # TODO
+        if lazy:
+            audio_f = LazyFeatures(compute, audio_f)
+            for name in outputs or []:
+                audio_f[name]  # pylint: disable-msg=W0104
+            return audio_f
+
+        names = None if outputs is None \
+            else self.get_upstream_features(outputs)
+        flags = dict(audio_f)
+        try:
+            self._stage_graph.run(
+                lambda name: compute(name, flags[name], audio_f), audio_f,
+                names=names, num_workers=self.num_workers)
+        finally:
+            self._pitch_track = None  # release the recording
 
         # return as a dictionary
         return audio_f
 
+    @classmethod
+    def get_upstream_features(cls, outputs):
+        """
+        Returns the features needed to compute the outputs, i.e. the outputs
+        and their upstream features, in the order of computation
+        :param outputs: list of the feature names
+        :return: list of the feature names
+        """
+        if any(name not in cls._inputs for name in outputs):
+            raise KeyError("Possible outputs are: " + ', '.join(cls._inputs))
+
+        # the features without a method, e.g. tempo, are only passed through
+        return cls._stage_graph.get_upstream(outputs)
+
+    @classmethod
+    def get_downstream_features(cls, names):
+        """
+        Returns the features computed from the given features, including
+        themselves, in the order of computation
+        :param names: list of the feature names
+        :return: list of the feature names
+        """
+        return cls._stage_graph.get_downstream(names)
+
+    def _compute_feature(self, name, flag, features, keys, filepath):
+        if name not in self._stage_graph:  # no method, e.g. tempo
+            return flag
+
+        if name == 'metadata':
+            metadata = self._call_audio_metadata(flag, filepath)
+            if self.cache is not None:
+                keys['metadata'] = self.cache.hash_object(metadata)
+            return metadata
+
+        upstream = self._stage_graph[name]
+        func, params = self._get_method(name)
+        feature = self._cached_caller(
+            keys, name, flag, func,
+            *[filepath if u == 'audio' else features[u] for u in upstream],
+            params=params, upstream=upstream)
+
+        if name == 'makam':  # TODO: use all makams
+            feature = self._partial_caller(None, self._get_first, feature)
+
+        return feature
+
+    def _get_pitch_track(self, pitch):
+        # the pitch is cleaned and converted to cents once and shared by
+        # the distributions, tonic identification, makam recognition and
+        # melodic progression of the recording
+        if isinstance(pitch['pitch'], PitchTrack):
+            return pitch['pitch']
+
+        pitch_track = self._pitch_track
+        if pitch_track is None or pitch_track[0] is not pitch['pitch']:
+            pitch_track = (pitch['pitch'], PitchTrack(pitch['pitch']))
+            self._pitch_track = pitch_track
+
+        return pitch_track[1]
+
+    def _get_method(self, name):
+        # the method computing the feature and its parameters, which affect
+        # the output
+        if name == 'pitch':
+            return self.extract_pitch, self._pitch_extractor.get_settings()
+        if name == 'pitch_filtered':
+            return self.filter_pitch, self._get_params(self._pitch_filter)
+        if name == 'pitch_distribution':
+            return self.compute_pitch_distribution, self._pd_params
+        if name == 'pitch_class_distribution':
+            return self.compute_pitch_class_distribution, self._pd_params
+        if name == 'tonic':
+            return self.identify_tonic, self._get_params(
+                self._tonic_identifier)
+        if name == 'makam':
+            return self.get_makams, self._makam_recog_params
+        if name == 'transposition':
+            # TODO: allow transpositions for multiple makams
+            return self.identify_transposition, None
+        if name == 'note_models':
+            # TODO: check if there is more than one transposition name, if
+            # yes warn
+            return self.compute_note_models, self._get_params(
+                self._note_modeler)
+        if name == 'melodic_progression':
+            return self.compute_melodic_progression, [
+                self._mel_prog_params,
+                self._get_params(self._melodic_progression_analyzer)]
+
+        raise KeyError('No method computes {0:s}.'.format(name))
+
+    def _get_input_keys(self, filepath):
+        if self.cache is None:
+            return {}
+
+        try:
+            return {'audio': self.cache.hash_file(filepath)}
+        except (IOError, OSError):  # the file is not available
+            return {'audio': None}
+
     def _call_audio_metadata(self, audio_meta, filepath):
         if audio_meta is False:  # metadata crawling is disabled
             audio_meta = None
@@ -173,11 +282,12 @@ class AudioAnalyzer(Analyzer):
 
     @staticmethod
     def _get_makam_tonic_training():
-        makam_tonic_training_file = IO.get_abspath_from_relpath_in_tomato(
+        # compiled from "training_model--pcd--7_5--15_0--dlfm2016.pkl" using
+        # KNNClassifier.model_file_to_compiled. The training distributions
+        # are memory-mapped, so the analyzers share the same pages
+        return IO.get_abspath_from_relpath_in_tomato(
             'models', 'makam_tonic_estimation',
-            'training_model--pcd--7_5--15_0--dlfm2016.pkl')
-
-        return pickle.load(open(makam_tonic_training_file, 'rb'))
+            'training_model--pcd--7_5--15_0--dlfm2016')
 
     def crawl_musicbrainz_metadata(self, rec_in):
         try:
@@ -187,7 +297,7 @@ class AudioAnalyzer(Analyzer):
 
             self.vprint_time(tic, timeit.default_timer())
             return audio_meta
-        except (NetworkError, ResponseError):
+        except (musicbrainzngs.NetworkError, musicbrainzngs.ResponseError):
             warnings.warn('Unable to reach http://musicbrainz.org/. '
                           'The metadata stored there is not crawled.',
                           RuntimeWarning, stacklevel=2)
@@ -210,8 +320,10 @@ class AudioAnalyzer(Analyzer):
         self.vprint("- Filtering predominant melody of {0:s}".
                     format(pitch['source']))
 
-        pitch_filt = copy.deepcopy(pitch)
-        pitch_filt['pitch'] = self._pitch_filter.run(pitch_filt['pitch'])
+        # the filter returns a new track; the other values are not modified
+        pitch_filt = copy.copy(pitch)
+        pitch_filt['pitch'] = self._pitch_filter.run(
+            PitchTrack.from_pitch(pitch['pitch']))
         pitch_filt['citation'] = 'Bozkurt, B. (2008). An automatic pitch ' \
                                  'analysis method for Turkish maqam music. ' \
                                  'Journal of New Music Research, 37(1), 1-13.'
@@ -239,7 +351,7 @@ class AudioAnalyzer(Analyzer):
             frame_dur = self._mel_prog_params['frame_dur']
 
         melodic_progression = self._melodic_progression_analyzer.analyze(
-            pitch['pitch'], frame_dur=frame_dur,
+            self._get_pitch_track(pitch), frame_dur=frame_dur,
             hop_ratio=self._mel_prog_params['hop_ratio'])
         self.vprint_time(tic, timeit.default_timer())
 
@@ -250,7 +362,8 @@ class AudioAnalyzer(Analyzer):
         self.vprint("- Identifying tonic from the predominant melody of {0:s}"
                     .format(pitch['source']))
 
-        tonic = self._tonic_identifier.identify(pitch['pitch'])[0]
+        tonic = self._tonic_identifier.identify(
+            self._get_pitch_track(pitch))[0]
 
         # add the source audio file
         tonic['source'] = pitch['source']
@@ -264,7 +377,7 @@ class AudioAnalyzer(Analyzer):
                     format(pitch['source']))
 
         pitch_distribution = PitchDistribution.from_hz_pitch(
-            np.array(pitch['pitch'])[:, 1], **self._pd_params)
+            self._get_pitch_track(pitch), **self._pd_params)
         pitch_distribution.cent_to_hz()
 
         self.vprint_time(tic, timeit.default_timer())
@@ -291,7 +404,8 @@ class AudioAnalyzer(Analyzer):
             tonic['source']))
 
         makam = self._makam_recognizer.estimate_mode(
-            pitch['pitch'], tonic['value'], **self._makam_recog_params)
+            self._get_pitch_track(pitch), tonic['value'],
+            **self._makam_recog_params)
 
         self.vprint_time(tic, timeit.default_timer())
         return makam
@@ -0,0 +1,273 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import timeit
+import traceback
+
+from ..featurecache import FeatureCache
+from ..io import IO
+from .audioanalyzer import AudioAnalyzer
+
+# the analyzer of each worker process, see _init_worker
+_worker_analyzer = None  # pylint: disable-msg=C0103
+
+
+def _init_worker(verbose, analyzer_params, cache_dir, cache_max_size):
+    # the analyzer (and hence the makam model) is loaded once per worker
+    # and reused for all the files the worker is given
+    global _worker_analyzer  # pylint: disable-msg=C0103,W0603
+    cache = (None if cache_dir is None
+             else FeatureCache(cache_dir, max_size=cache_max_size))
+    _worker_analyzer = AudioAnalyzer(verbose=verbose, cache=cache)
+    AudioBatchAnalyzer.set_analyzer_params(_worker_analyzer, analyzer_params)
+
+
+def _analyze_file(args):
+    filepath, analyze_kwargs = args
+
+    tic = timeit.default_timer()
+    try:
+        features = _worker_analyzer.analyze(filepath, **analyze_kwargs)
+        error = None
+    except Exception:  # pylint: disable-msg=W0703
+        # a failing file should not stop the analysis of the corpus
+        features = None
+        error = traceback.format_exc()
+
+    return {'filepath': filepath, 'features': features, 'error': error,
+            'duration': timeit.default_timer() - tic}
+
+
+class AudioBatchAnalyzer:
+    def __init__(self, num_workers=None, chunksize=1, verbose=False,
+                 analyzer_params=None, cache_dir=None, cache_max_size=None):
+        """--------------------------------------------------------------------
+        Runs AudioAnalyzer.analyze over a corpus of audio recordings in a
+        process pool
+        -----------------------------------------------------------------------
+        num_workers      : Number of worker processes. None uses the number
+                           of CPUs
+        chunksize        : Number of files sent to a worker at a time
+        verbose          : Verbosity flag of the analyzers in the workers
+        analyzer_params  : Dictionary of the analyzer parameters in the form
+                           {"pitch_filter": {"max_boundary": 15}, ...}. The
+                           keys are the names of the "set_<key>_params"
+                           setters of AudioAnalyzer.
+        cache_dir        : The folder of the FeatureCache shared by the
+                           workers. None to disable caching
+        cache_max_size   : The maximum size of the cache in bytes
+        --------------------------------------------------------------------"""
+        self.num_workers = num_workers
+        self.chunksize = chunksize
+        self.verbose = verbose
+        self.analyzer_params = analyzer_params or {}
+        self.cache_dir = cache_dir
+        self.cache_max_size = cache_max_size
+
+    @staticmethod
+    def set_analyzer_params(analyzer, analyzer_params):
+        for key, params in analyzer_params.items():
+            setter = getattr(analyzer, 'set_{0:s}_params'.format(key), None)
+            if setter is None:
+                raise KeyError('AudioAnalyzer has no setter for "{0:s}" '
+                               'parameters'.format(key))
+            setter(**params)
+
+    @staticmethod
+    def get_audio_files(audio_in, keyword='*.mp3', match_case=False):
+        """--------------------------------------------------------------------
+        Returns the list of audio files from the input
+        -----------------------------------------------------------------------
+        audio_in     : A directory, an audio file, or a list of them
+        keyword      : The filename pattern of the audio files searched in
+                       the directories
+        match_case   : Flag for case matching of the keyword
+        --------------------------------------------------------------------"""
+        if isinstance(audio_in, (str, bytes)):
+            audio_in = [audio_in]
+
+        audio_files = []
+        for path in audio_in:
+            if os.path.isdir(path):
+                audio_files += sorted(IO.get_filenames_in_dir(
+                    path, keyword=keyword, match_case=match_case)[0])
+            else:
+                audio_files.append(path)
+
+        return audio_files
+
+    def analyze(self, audio_in, keyword='*.mp3', **kwargs):
+        """--------------------------------------------------------------------
+        Analyzes the audio files and yields the result of each file as soon
+        as its analysis finishes. The results are not in the order of the
+        input files.
+        -----------------------------------------------------------------------
+        audio_in     : A directory, an audio file, or a list of them
+        keyword      : The filename pattern of the audio files searched in
+                       the directories
+        kwargs       : The precomputed features (or False to skip the
+                       computation) passed to AudioAnalyzer.analyze for all
+                       files, e.g. metadata=False
+        -----------------------------------------------------------------------
+        Yields dictionaries with the keys:
+        filepath     : The audio file
+        features     : The output of AudioAnalyzer.analyze, None if the
+                       analysis failed
+        error        : The traceback of the failure, None if the analysis
+                       succeeded
+        duration     : The time spent on the file in seconds
+        --------------------------------------------------------------------"""
+        audio_files = self.get_audio_files(audio_in, keyword=keyword)
+        if not audio_files:
+            return
+
+        # check the parameters before starting the pool; multiprocessing.Pool
+        # keeps respawning the workers, if the initializer fails
+        self.set_analyzer_params(AudioAnalyzer(), self.analyzer_params)
+
+        num_workers = min(self.num_workers or os.cpu_count() or 1,
+                          len(audio_files))
+        pool = multiprocessing.Pool(
+            num_workers, initializer=_init_worker,
+            initargs=(self.verbose, self.analyzer_params, self.cache_dir,
+                      self.cache_max_size))
+        try:
+            tasks = ((f, kwargs) for f in audio_files)
+            for result in pool.imap_unordered(_analyze_file, tasks,
+                                              chunksize=self.chunksize):
+                yield result
+        except BaseException:  # including the generator closed early
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    @staticmethod
+    def get_output_path(filepath, out_dir, audio_root=None,
+                        out_format='pickle'):
+        # mirror the folder structure of the audio files under out_dir
+        if audio_root is not None and os.path.isdir(audio_root):
+            relpath = os.path.relpath(filepath, audio_root)
+        else:
+            relpath = os.path.basename(filepath)
+        extension = {'json': '.json', 'npz': '.npz'}.get(out_format, '.pkl')
+
+        return os.path.join(out_dir, os.path.splitext(relpath)[0] + extension)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Analyzes a corpus of audio recordings using '
+                    'AudioAnalyzer in parallel processes.')
+    parser.add_argument('audio_in', nargs='+',
+                        help='Audio files and/or directories to analyze')
+    parser.add_argument('-o', '--out-dir', required=True,
+                        help='Directory to save the features of each file')
+    parser.add_argument('-k', '--keyword', default='*.mp3',
+                        help='Filename pattern of the audio files searched '
+                             'in the directories (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: number '
+                             'of CPUs)')
+    parser.add_argument('-c', '--chunksize', type=int, default=1,
+                        help='Number of files sent to a worker at a time '
+                             '(default: %(default)s)')
+    parser.add_argument('-f', '--format', choices=['pickle', 'json', 'npz'],
+                        default='pickle', dest='out_format',
+                        help='Output format (default: %(default)s)')
+    parser.add_argument('--params', default=None,
+                        help='JSON string or file of the analyzer parameters '
+                             'e.g. \'{"pitch_filter": {"max_boundary": 15}}\'')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Directory to cache the intermediate features, '
+                             'e.g. to avoid extracting the predominant '
+                             'melody again when only the pitch filter '
+                             'parameters change')
+    parser.add_argument('--cache-max-size', type=float, default=None,
+                        help='Maximum size of the cache in megabytes. The '
+                             'least recently used features are removed '
+                             'beyond this size (default: no limit)')
+    parser.add_argument('--no-metadata', action='store_true',
+                        help='Skip crawling the metadata from MusicBrainz')
+    parser.add_argument('--skip-existing', action='store_true',
+                        help='Skip the files, which already have an output')
+    parser.add_argument('-v', '--verbose', action='store_true')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    analyzer_params = IO.from_json(args.params) if args.params else None
+    batch_analyzer = AudioBatchAnalyzer(
+        num_workers=args.workers, chunksize=args.chunksize,
+        verbose=args.verbose, analyzer_params=analyzer_params,
+        cache_dir=args.cache_dir,
+        cache_max_size=(None if args.cache_max_size is None
+                        else int(args.cache_max_size * 1e6)))
+
+    # the output paths mirror the folder structure of the directory input
+    audio_root = args.audio_in[0] if len(args.audio_in) == 1 else None
+    audio_files = batch_analyzer.get_audio_files(args.audio_in,
+                                                 keyword=args.keyword)
+    if args.skip_existing:
+        audio_files = [f for f in audio_files if not os.path.exists(
+            batch_analyzer.get_output_path(f, args.out_dir, audio_root,
+                                           args.out_format))]
+
+    analyze_kwargs = {'metadata': False} if args.no_metadata else {}
+
+    num_failed = 0
+    for i, result in enumerate(batch_analyzer.analyze(
+            audio_files, **analyze_kwargs)):
+        if result['error'] is not None:
+            num_failed += 1
+            sys.stderr.write('{0:d}/{1:d} FAILED {2:s}\n{3:s}'.format(
+                i + 1, len(audio_files), result['filepath'], result['error']))
+            continue
+
+        out_path = batch_analyzer.get_output_path(
+            result['filepath'], args.out_dir, audio_root, args.out_format)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if args.out_format == 'json':
+            IO.to_json(result['features'], out_path)
+        elif args.out_format == 'npz':
+            IO.to_npz(result['features'], out_path)
+        else:
+            IO.to_pickle(result['features'], out_path)
+
+        print('{0:d}/{1:d} {2:s} ({3:.2f} sec)'.format(
+            i + 1, len(audio_files), result['filepath'], result['duration']))
+
+    return 1 if num_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
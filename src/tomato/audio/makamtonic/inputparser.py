@@ -29,6 +29,7 @@ import numpy as np
 
 from ...converter import Converter
 from ..pitchdistribution import PitchDistribution
+from ..pitchtrack import PitchTrack
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.INFO)
@@ -102,10 +103,15 @@ class InputParser:
         columns represent timestamps, pitch and "other columns".
         respectively. It only returns the second column in this case.
 
-        :param pitch_in: pitch input, which is a list, numpy array or filename
+        :param pitch_in: pitch input, which is a PitchTrack, list, numpy array
+                         or filename
         :param tonic_freq: the tonic frequency in Hz
         :return: parsed pitch track (numpy array)
         """
+        # the cent values of a PitchTrack are computed once and shared
+        if isinstance(pitch_in, PitchTrack):
+            return pitch_in.get_cents(tonic_freq)
+
         # parse the pitch track from txt file, list or numpy array
         try:
             p = np.loadtxt(pitch_in)
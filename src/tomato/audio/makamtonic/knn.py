@@ -26,7 +26,10 @@ import collections
 import copy
 
 import numpy as np
-from scipy.spatial import distance as spdistance
+
+from ...lazyimport import lazy_import
+
+spdistance = lazy_import('scipy.spatial.distance')  # pylint: disable-msg=C0103
 
 
 class KNN:
@@ -34,9 +37,12 @@ class KNN:
     def generate_distance_matrix(cls, distrib, peak_idx, training_distribs,
                                  distance_method='bhat'):
         """--------------------------------------------------------------------
-        Iteratively calculates the distance of the input distribution from each
+        Calculates the distance of the input distribution from each
         (mode candidate, tonic candidate) pair. This is a generic function,
         that is independent of distribution type or any other parameter value.
+        Pitch class distributions are compared in a single matrix operation
+        (see generate_pcd_distance_matrix() method). Pitch distributions are
+        compared pair by pair in their overlapping region.
         -----------------------------------------------------------------------
         distribs            : Input distribution that is to be estimated
         peak_idx            : List of indices of distribution peaks
@@ -44,6 +50,70 @@ class KNN:
         method              : The distance method to be used. The available
                               distances are listed in _distance() method.
         --------------------------------------------------------------------"""
+        if distrib.is_pcd():
+            return cls.generate_pcd_distance_matrix(
+                distrib, peak_idx, cls.stack_pcd_vals(distrib,
+                                                      training_distribs),
+                distance_method=distance_method)
+
+        return cls._generate_distance_matrix_pairwise(
+            distrib, peak_idx, training_distribs,
+            distance_method=distance_method)
+
+    @staticmethod
+    def stack_pcd_vals(distrib, training_distribs):
+        """--------------------------------------------------------------------
+        Stacks the values of the training pitch class distributions into a
+        2-D array, where each row is a training distribution.
+        -----------------------------------------------------------------------
+        distrib             : Input distribution to compare the training
+                              distributions with
+        training_distribs   : List of training distributions
+        --------------------------------------------------------------------"""
+        for td in training_distribs:
+            assert distrib.bin_unit == td.bin_unit, \
+                'The bin units of the compared distributions should match.'
+            assert td.is_pcd(), 'The features should be of the same type'
+            assert distrib.step_size == td.step_size, \
+                'The step_sizes should be the same'
+
+        return np.array([td.vals for td in training_distribs], dtype=float)
+
+    @classmethod
+    def generate_pcd_distance_matrix(cls, distrib, peak_idx, training_vals,
+                                     distance_method='bhat'):
+        """--------------------------------------------------------------------
+        Calculates the distance of the input pitch class distribution from
+        each (mode candidate, tonic candidate) pair in a single matrix
+        operation. All the circular shifts of the input distribution to the
+        tonic candidates are built at once and compared with the stacked
+        training distributions.
+        -----------------------------------------------------------------------
+        distrib             : Input pitch class distribution that is to be
+                              estimated
+        peak_idx            : List of indices of distribution peaks
+        training_vals       : 2-D array of the training distribution values,
+                              where each row is a training distribution (see
+                              stack_pcd_vals() method)
+        method              : The distance method to be used. The available
+                              distances are listed in _distance() method.
+        --------------------------------------------------------------------"""
+        num_bins = len(distrib.vals)
+        assert np.shape(training_vals)[1] == num_bins, \
+            'The number of bins of the distributions should match.'
+
+        # each row is the input distribution circularly shifted to a peak
+        shift_idx = np.reshape(peak_idx, (-1, 1)) + np.arange(num_bins)
+        trial_vals = np.asarray(distrib.vals)[shift_idx % num_bins]
+
+        return cls._compute_measures(trial_vals, training_vals,
+                                     method=distance_method)
+
+    @classmethod
+    def _generate_distance_matrix_pairwise(cls, distrib, peak_idx,
+                                           training_distribs,
+                                           distance_method='bhat'):
+        # iterates over the (tonic candidate, mode candidate) pairs
         result = np.zeros((len(peak_idx), len(training_distribs)))
         trial = copy.deepcopy(distrib)
 
@@ -141,6 +211,50 @@ class KNN:
 
         return dist
 
+    @staticmethod
+    def _compute_measures(vals_1, vals_2, method='bhat'):
+        """--------------------------------------------------------------------
+         Computes the distance or dissimilarity between each row of vals_1
+         and each row of vals_2, i.e. the matrix counterpart of
+         _compute_measure().
+         ----------------------------------------------------------------------
+         vals_1   : 2-D array of values with the shape (N, num_bins)
+         vals_2   : 2-D array of values with the shape (M, num_bins)
+         method   : The choice of distance method. See _compute_measure()
+         ----------------------------------------------------------------------
+         Returns the (N, M) distance matrix
+         -------------------------------------------------------------------"""
+        vals_1 = np.asarray(vals_1, dtype=float)
+        vals_2 = np.asarray(vals_2, dtype=float)
+
+        # the measures with a dot product do not need the pairwise arrays
+        if method == 'bhat':  # bhattacharrya distance
+            return -np.log(np.dot(np.sqrt(vals_1), np.sqrt(vals_2).T))
+        if method == 'dis_corr':
+            return 1.0 - np.dot(vals_1, vals_2.T)
+
+        v1 = vals_1[:, np.newaxis, :]
+        v2 = vals_2[np.newaxis, :, :]
+        if method in ['manhattan', 'l1']:
+            dist = np.sum(np.abs(v1 - v2), axis=2)
+        elif method in ['euclidean', 'l2']:
+            dist = np.sqrt(np.sum((v1 - v2) ** 2, axis=2))
+        elif method == 'l3':
+            dist = np.sum(np.abs(v1 - v2) ** 3, axis=2) ** (1.0 / 3)
+        elif method == 'jeffrey':  # Jeffrey's divergence
+            dist = (np.sum(v1 * np.log(v1 / v2), axis=2) +
+                    np.sum(v2 * np.log(v2 / v1), axis=2))
+        elif method == 'js':  # Jensen–Shannon distance
+            dist = np.sqrt(
+                np.sum(v1 * np.log(2 * v1 / (v1 + v2)), axis=2) * 0.5 +
+                np.sum(v2 * np.log(2 * v2 / (v1 + v2)), axis=2) * 0.5)
+        elif method == 'dis_intersect':
+            dist = 1.0 - np.sum(np.minimum(v1, v2), axis=2) / v1.shape[2]
+        else:
+            raise ValueError("Unknown method")
+
+        return dist
+
     @staticmethod
     def get_nearest_neighbors(sorted_pair, k_neighbor):
         # parse mode/tonic pairs
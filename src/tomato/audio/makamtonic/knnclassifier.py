@@ -24,6 +24,7 @@
 
 import copy
 import json
+import os
 import pickle
 
 import numpy as np
@@ -54,6 +55,19 @@ class KNNClassifier(InputParser):
             step_size=step_size, kernel_width=kernel_width,
             feature_type=feature_type, model=model)
 
+    @property
+    def model(self):
+        # a model loaded by model_from_compiled is converted to the list of
+        # dictionaries only if it is requested
+        if self._model is None and self._compiled_model is not None:
+            self._model = self.decompile_model(self._compiled_model)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._compiled_model = None  # compiled on the first estimation
+
     def train(self, pitches, tonics, modes, sources=None, model_type='multi'):
         if model_type == 'single':
             return self._train_single_distrib_per_mode(
@@ -276,9 +290,15 @@ class KNNClassifier(InputParser):
             peak_idx = np.array([0])
 
         training_features, training_modes = self._get_training_model(mode)
-        dist_mat = KNN.generate_distance_matrix(
-            test_feature, peak_idx, training_features,
-            distance_method=distance_method)
+        if isinstance(training_features, np.ndarray):  # compiled pcd model
+            self._check_compiled_model_compatibility(test_feature)
+            dist_mat = KNN.generate_pcd_distance_matrix(
+                test_feature, peak_idx, training_features,
+                distance_method=distance_method)
+        else:
+            dist_mat = KNN.generate_distance_matrix(
+                test_feature, peak_idx, training_features,
+                distance_method=distance_method)
 
         # sort results
         sorted_idx = np.argsort(dist_mat, axis=None)
@@ -326,6 +346,17 @@ class KNNClassifier(InputParser):
         return shift_feature, freqs, peak_idx
 
     def _get_training_model(self, mode):
+        if self.feature_type == 'pcd':  # stacked values of the training pcds
+            compiled_model = self._get_compiled_model()
+            training_vals = compiled_model['vals']
+            feature_modes = compiled_model['modes']
+            if mode is not None:
+                mode_bool = feature_modes == mode
+                training_vals = training_vals[mode_bool]
+                feature_modes = feature_modes[mode_bool]
+
+            return training_vals, feature_modes
+
         if mode is None:
             training_features = [m['feature'] for m in self.model]
             feature_modes = np.array([m['mode'] for m in self.model])
@@ -337,6 +368,160 @@ class KNNClassifier(InputParser):
                 [mode for _ in range(len(training_features))])
         return training_features, feature_modes
 
+    def _get_compiled_model(self):
+        if self._compiled_model is None:
+            self._compiled_model = self.compile_model(self._model)
+        return self._compiled_model
+
+    def _check_compiled_model_compatibility(self, test_feature):
+        metadata = self._compiled_model['metadata']
+        assert test_feature.bin_unit == metadata['bin_unit'], \
+            'The bin units of the compared distributions should match.'
+        assert test_feature.is_pcd(), 'The features should be of the same type'
+        assert test_feature.step_size == metadata['step_size'], \
+            'The step_sizes should be the same'
+
+    @staticmethod
+    def compile_model(model):
+        """--------------------------------------------------------------------
+        Converts a pitch class distribution model to the compiled model, i.e.
+        a dictionary with the keys:
+        vals         : 2-D array, where each row is a training distribution
+        modes        : 1-D array of the mode labels of the rows in vals
+        metadata     : The common bins, the bin unit and the step size of the
+                       distributions, and the rest of the information of
+                       each data point (tonic, source etc.)
+        -----------------------------------------------------------------------
+        model        : Training model
+        --------------------------------------------------------------------"""
+        features = [m['feature'] for m in model]
+        if not all(f.is_pcd() for f in features):
+            raise ValueError('Only the models with pitch class distributions '
+                             'can be compiled.')
+
+        bins = features[0].bins if features else np.array([])
+        if not all(np.array_equal(f.bins, bins) for f in features):
+            raise ValueError('The bins of the distributions should be the '
+                             'same.')
+
+        data_points = []
+        for m in model:
+            data_point = {key: val for key, val in m.items()
+                          if key not in ['feature', 'mode']}
+            data_point['feature'] = {'ref_freq': m['feature'].ref_freq,
+                                     'kernel_width': m['feature'].kernel_width}
+            data_points.append(data_point)
+
+        metadata = {
+            'feature_type': 'pcd',
+            'bins': bins.tolist(),
+            'bin_unit': features[0].bin_unit if features else None,
+            'step_size': features[0].step_size if features else None,
+            'data_points': data_points}
+
+        return {'vals': np.array([f.vals for f in features], dtype=float),
+                'modes': np.array([m['mode'] for m in model], dtype=str),
+                'metadata': metadata}
+
+    @staticmethod
+    def decompile_model(compiled_model):
+        """--------------------------------------------------------------------
+        Converts a compiled model back to the list of dictionaries with
+        PitchDistribution features
+        -----------------------------------------------------------------------
+        compiled_model : Compiled model (see compile_model() method)
+        --------------------------------------------------------------------"""
+        metadata = compiled_model['metadata']
+
+        model = []
+        for vals, mode, data_point in zip(compiled_model['vals'],
+                                          compiled_model['modes'],
+                                          metadata['data_points']):
+            data_point = copy.deepcopy(data_point)
+            feature_attrs = data_point.pop('feature')
+            data_point['feature'] = PitchDistribution(
+                metadata['bins'], vals,
+                kernel_width=feature_attrs['kernel_width'],
+                ref_freq=feature_attrs['ref_freq'])
+            data_point['mode'] = str(mode)
+            model.append(data_point)
+
+        return model
+
+    def model_from_compiled(self, folder, mmap_mode='r'):
+        """--------------------------------------------------------------------
+        Loads a compiled training model from the folder. The training
+        distributions are memory-mapped by default so that the processes
+        loading the same model share the same pages.
+        -----------------------------------------------------------------------
+        folder       : The folder of the compiled model
+        mmap_mode    : The memory-map mode for numpy.load. None to read the
+                       values into the memory
+        --------------------------------------------------------------------"""
+        with open(os.path.join(folder, 'metadata.json')) as f:
+            metadata = json.load(f)
+        assert metadata['feature_type'] == self.feature_type, \
+            'The feature_type input and type of the distributions in the ' \
+            'model input does not match'
+
+        compiled_model = {
+            'vals': np.load(os.path.join(folder, 'vals.npy'),
+                            mmap_mode=mmap_mode),
+            'modes': np.load(os.path.join(folder, 'modes.npy'),
+                             mmap_mode=mmap_mode),
+            'metadata': metadata}
+
+        self._model = None  # decompiled if requested
+        self._compiled_model = compiled_model
+
+    @classmethod
+    def model_to_compiled(cls, model, folder):
+        """--------------------------------------------------------------------
+        Saves the training model as a compiled model, i.e. "vals.npy",
+        "modes.npy" and "metadata.json" files in the folder.
+        -----------------------------------------------------------------------
+        model        : Training model or the compiled model
+        folder       : The folder to save the compiled model into
+        --------------------------------------------------------------------"""
+        compiled_model = model if isinstance(model, dict) \
+            else cls.compile_model(model)
+
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        np.save(os.path.join(folder, 'vals.npy'), compiled_model['vals'])
+        np.save(os.path.join(folder, 'modes.npy'), compiled_model['modes'])
+        with open(os.path.join(folder, 'metadata.json'), 'w') as f:
+            json.dump(compiled_model['metadata'], f, indent=4,
+                      default=cls._to_builtin)
+
+    @staticmethod
+    def _to_builtin(obj):
+        # numpy arrays and scalars in the metadata, e.g. ref_freq
+        try:
+            return obj.tolist()
+        except AttributeError as err:
+            raise TypeError('{0} is not JSON serializable'.format(
+                type(obj))) from err
+
+    @classmethod
+    def model_file_to_compiled(cls, model_file, folder, feature_type='pcd'):
+        """--------------------------------------------------------------------
+        Converts a training model saved by model_to_pickle() or
+        model_to_json() to a compiled model.
+        -----------------------------------------------------------------------
+        model_file   : The pickle or JSON file of the training model
+        folder       : The folder to save the compiled model into
+        feature_type : The feature type of the training model
+        --------------------------------------------------------------------"""
+        classifier = cls(feature_type=feature_type)
+        if os.path.splitext(model_file)[1] == '.json':
+            classifier.model_from_json(model_file)
+        else:
+            classifier.model_from_pickle(model_file)
+
+        cls.model_to_compiled(classifier.model, folder)
+
     def model_from_pickle(self, input_str):
         try:  # file given
             self.model = pickle.load(open(input_str, 'rb'))
@@ -24,13 +24,16 @@
 
 from copy import deepcopy
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker
 import numpy as np
 
 from ...converter import Converter
+from ...lazyimport import lazy_import
 from ..pitchdistribution import PitchDistribution
 from ..pitchfilter import PitchFilter
+from ..pitchtrack import PitchTrack
+
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+ticker = lazy_import('matplotlib.ticker')  # pylint: disable-msg=C0103
 
 
 class TonicLastNote:
@@ -65,7 +68,8 @@ class TonicLastNote:
         Identify the tonic by detecting the last note and extracting the
         frequency
         """
-        pitch_sliced = np.array(deepcopy(pitch))
+        pitch_track = PitchTrack.from_pitch(pitch)
+        pitch_sliced = pitch_track.to_array()
 
         # trim silence in the end
         sil_trim_len = len(np.trim_zeros(pitch_sliced[:, 1], 'b'))  # remove
@@ -79,7 +83,7 @@ class TonicLastNote:
         # compute the pitch distribution and distribution peaks
         dummy_freq = 440.0
         distribution = PitchDistribution.from_hz_pitch(
-            np.array(pitch)[:, 1], ref_freq=dummy_freq,
+            pitch_track, ref_freq=dummy_freq,
             kernel_width=self.kernel_width, step_size=self.step_size)
 
         # get pitch chunks
@@ -170,7 +174,7 @@ class TonicLastNote:
         # log scaling the x axis
         ax1.set_xscale('log', basex=2, nonposx='clip')
         ax1.xaxis.set_major_formatter(
-            matplotlib.ticker.FormatStrFormatter('%d'))
+            ticker.FormatStrFormatter('%d'))
 
         # recording distribution
         ax1.plot(distribution.bins, distribution.vals, label='SongHist',
@@ -23,17 +23,19 @@
 
 from copy import deepcopy
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker
 import numpy as np
 
 from ..converter import Converter
-from ..io import IO
-from .makamtonic.toniclastnote import TonicLastNote
+from ..lazyimport import lazy_import
+from ..musicdata import MusicData
+
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+ticker = lazy_import('matplotlib.ticker')  # pylint: disable-msg=C0103
 
 
 class NoteModel:
     note_letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+    _interval_tables = {}  # theoretical intervals per makam
 
     def __init__(self, pitch_threshold=50):
         self.pitch_threshold = pitch_threshold
@@ -46,8 +48,7 @@ class NoteModel:
         """
         pd_copy = deepcopy(pitch_distribution)
 
-        theoretical_intervals = self._get_theoretical_intervals_to_search(
-            makam)
+        interval_table = self.get_interval_table(makam)
 
         try:  # convert the bins to hz, if they are given in cents
             pd_copy.cent_to_hz()
@@ -60,41 +61,91 @@ class NoteModel:
 
         stable_pitches_hz = pd_copy.bins[peak_idx]
         stable_notes = self._stable_pitches_to_notes(
-            stable_pitches_hz, theoretical_intervals, tonic_hz)
+            stable_pitches_hz, interval_table, tonic_hz)
 
         return stable_notes
 
-    def _stable_pitches_to_notes(self, stable_pitches_hz,
-                                 theoretical_intervals, tonic_hz):
+    @classmethod
+    def get_interval_table(cls, makam):
+        """
+        Returns the theoretical intervals of the notes in the makam with
+        respect to the tonic (karar) as a dictionary with the keys:
+        notes    : Note symbols sorted by their interval
+        intervals: The intervals of the notes in cents
+        cents    : Sorted 1-D array of the intervals
+        order    : The index of each note in the note table, used to
+                   resolve the ties in the same way as a linear search
+        first    : The index of the first note with the same interval
+        The table is computed once per makam and shared by all instances.
+        """
+        try:
+            return cls._interval_tables[makam]
+        except KeyError:
+            pass
+
+        theoretical_intervals = cls._get_theoretical_intervals_to_search(
+            makam)
+        notes = list(theoretical_intervals.keys())
+        intervals = list(theoretical_intervals.values())
+
+        # stable sort keeps the notes with the same interval in table order
+        order = np.argsort(intervals, kind='mergesort')
+        cents = np.array(intervals, dtype=float)[order]
+        interval_table = {
+            'notes': tuple(notes[i] for i in order),
+            'intervals': tuple(intervals[i] for i in order),
+            'cents': cents, 'order': order,
+            'first': np.searchsorted(cents, cents, side='left')}
+        for arr in ['cents', 'order', 'first']:  # shared by all instances
+            interval_table[arr].setflags(write=False)
+
+        cls._interval_tables[makam] = interval_table
+        return interval_table
+
+    def _stable_pitches_to_notes(self, stable_pitches_hz, interval_table,
+                                 tonic_hz):
         stable_pitches_cent = Converter.hz_to_cent(stable_pitches_hz, tonic_hz)
-        # Finding nearest theoretical values of each stable pitch, identify the
-        # name of this value and write to output
-        stable_notes = {}  # Defining output (return) object
-        for stable_pitch_cent, stable_pitch_hz in zip(stable_pitches_cent,
-                                                      stable_pitches_hz):
-            note_cent = TonicLastNote.find_nearest(
-                list(theoretical_intervals.values()), stable_pitch_cent)
+        note_idx = self._find_nearest_notes(np.atleast_1d(stable_pitches_cent),
+                                            interval_table)
 
+        # Identify the name of the nearest theoretical note of each stable
+        # pitch and write to output
+        stable_notes = {}  # Defining output (return) object
+        for stable_pitch_cent, stable_pitch_hz, idx in zip(
+                stable_pitches_cent, stable_pitches_hz, note_idx):
+            note_cent = interval_table['intervals'][idx]
             if abs(stable_pitch_cent - note_cent) < self.pitch_threshold:
-                for key, val in theoretical_intervals.items():
-                    if val == note_cent:
-                        theoretical_pitch = Converter.cent_to_hz(
-                            note_cent, tonic_hz)
-                        stable_notes[key] = {
-                            "performed_interval": {"value": stable_pitch_cent,
-                                                   "unit": "cent"},
-                            "theoretical_interval": {"value": note_cent,
-                                                     "unit": "cent"},
-                            "theoretical_pitch": {"value": theoretical_pitch,
-                                                  "unit": "Hz"},
-                            "stable_pitch": {"value": stable_pitch_hz,
-                                             "unit": "Hz"}}
-                        break
+                theoretical_pitch = Converter.cent_to_hz(note_cent, tonic_hz)
+                stable_notes[interval_table['notes'][idx]] = {
+                    "performed_interval": {"value": stable_pitch_cent,
+                                           "unit": "cent"},
+                    "theoretical_interval": {"value": note_cent,
+                                             "unit": "cent"},
+                    "theoretical_pitch": {"value": theoretical_pitch,
+                                          "unit": "Hz"},
+                    "stable_pitch": {"value": stable_pitch_hz,
+                                     "unit": "Hz"}}
         return stable_notes
 
     @staticmethod
-    def _is_same_pitch_class(n1, n2):
-        return (n1[0] + n1[2:]) == (n2[0] + n2[2:])
+    def _find_nearest_notes(pitches_cent, interval_table):
+        cents = interval_table['cents']
+        first = interval_table['first']
+        order = interval_table['order']
+
+        # the neighboring intervals of each pitch
+        right_idx = np.searchsorted(cents, pitches_cent)
+        left_idx = first[np.clip(right_idx - 1, 0, len(cents) - 1)]
+        right_idx = first[np.clip(right_idx, 0, len(cents) - 1)]
+
+        left_dist = np.abs(pitches_cent - cents[left_idx])
+        right_dist = np.abs(pitches_cent - cents[right_idx])
+
+        # in an equal distance, pick the note coming first in the note table
+        pick_right = (right_dist < left_dist) | (
+            (right_dist == left_dist) & (order[right_idx] < order[left_idx]))
+
+        return np.where(pick_right, right_idx, left_idx)
 
     @staticmethod
     def _get_close_natural_notes(key_signature):
@@ -102,22 +153,21 @@ class NoteModel:
 
         return close_near_flat
 
-    def _get_theoretical_intervals_to_search(self, makam):
-        # Reading dictionary which contains note symbol, theoretical names and
-        # their cent values
-        note_dict = IO.load_music_data('note')
+    @classmethod
+    def _get_theoretical_intervals_to_search(cls, makam):
+        # Dictionary which contains note symbol, theoretical names and
+        # their cent values. The notes are removed from the copy below
+        note_dict = dict(MusicData.get('note'))
 
-        # Reading dictionary which contains theoretical information about each
-        # makam
-        makam_dict = IO.load_music_data('makam')
+        # Dictionary which contains theoretical information about each makam
+        makam_dict = MusicData.get('makam')
 
-        # get the key signature
+        # get the key signature extended to all octaves
         try:
-            key_signature = self._get_extended_key_signature(
-                makam_dict[makam]["key_signature"], note_dict)
+            key_signature = list(MusicData.get_extended_key_signature(makam))
         except KeyError as err:
             raise KeyError('Unknown makam') from err
-        natural_notes = self._get_natural_notes(key_signature, note_dict)
+        natural_notes = cls._get_natural_notes(key_signature, note_dict)
 
         # Remove the notes neighboring the scale notes
         keep_notes = natural_notes + key_signature
@@ -125,14 +175,14 @@ class NoteModel:
             # mutating note_dict during iteration
             if note_name in keep_notes:
                 if note_name[2:4] in ['b5', 'b4']:
-                    rm_note_symbol = self.note_letters[
-                        (self.note_letters.index(note_name[0]) - 1) % 7]
+                    rm_note_symbol = cls.note_letters[
+                        (cls.note_letters.index(note_name[0]) - 1) % 7]
                     rm_octave = note_name[1]
                     rm_notes = [rm_note_symbol + rm_octave + '#' + c
                                 for c in ['4', '5']]
                 elif note_name[2:4] in ['#5', '#4']:
-                    rm_note_symbol = self.note_letters[
-                        (self.note_letters.index(note_name[0]) + 1) % 7]
+                    rm_note_symbol = cls.note_letters[
+                        (cls.note_letters.index(note_name[0]) + 1) % 7]
                     rm_octave = note_name[1]
                     rm_notes = [rm_note_symbol + rm_octave + 'b' + c
                                 for c in ['4', '5']]
@@ -170,23 +220,14 @@ class NoteModel:
 
         return theoretical_intervals
 
-    def _get_natural_notes(self, key_signature, note_dict):
-        close_natural_notes = self._get_close_natural_notes(key_signature)
+    @classmethod
+    def _get_natural_notes(cls, key_signature, note_dict):
+        close_natural_notes = cls._get_close_natural_notes(key_signature)
         # get the natural notes that are not close to the key signature
         natural_notes = [n for n in list(note_dict.keys()) if len(n) == 2 and n
                          not in close_natural_notes]
         return natural_notes
 
-    def _get_extended_key_signature(self, key_sig_in, note_dict):
-        key_signature = deepcopy(key_sig_in)
-        for note in list(note_dict.keys()):  # extend the key signature to
-            # octaves
-            if any(self._is_same_pitch_class(note, ks)
-                   for ks in key_signature):
-                key_signature.append(note)
-
-        return list(set(key_signature))
-
     @staticmethod
     def plot(pitch_distribution, stable_notes):
         _, ax = plt.subplots()
@@ -208,7 +249,7 @@ class NoteModel:
         # log scaling the x axis
         ax.set_xscale('log', basex=2, nonposx='clip')
         ax.xaxis.set_major_formatter(
-            matplotlib.ticker.FormatStrFormatter('%d'))
+            ticker.FormatStrFormatter('%d'))
         ax.set_xlim([min(pd_copy.bins), max(pd_copy.bins)])
         ax.set_xticks([note['stable_pitch']['value']
                        for note in list(stable_notes.values())])
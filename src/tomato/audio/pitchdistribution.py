@@ -23,19 +23,23 @@
 # New York, NY, USA
 
 import copy
+import functools
 import json
 import logging
 import numbers
 
-import essentia
-import essentia.standard as std
-import matplotlib.pyplot as plt
 import numpy as np
-import scipy.integrate
-import scipy.stats
 
 from ..converter import Converter
 from ..io import IO
+from ..lazyimport import lazy_import
+from .pitchtrack import PitchTrack
+
+essentia = lazy_import('essentia')  # pylint: disable-msg=C0103
+std = lazy_import('essentia.standard')  # pylint: disable-msg=C0103
+integrate = lazy_import('scipy.integrate')  # pylint: disable-msg=C0103
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+stats = lazy_import('scipy.stats')  # pylint: disable-msg=C0103
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.INFO)
@@ -129,10 +133,30 @@ class PitchDistribution:
         cent_track = cent_track[~np.isnan(cent_track)]
         cent_track = cent_track[~np.isinf(cent_track)]
 
+        pd_edges = PitchDistribution._get_edges(
+            min(cent_track), max(cent_track), step_size)
+
+        # Generates the histogram and bins (i.e. the midpoints of edges)
+        pd_vals, pd_edges = np.histogram(cent_track, bins=pd_edges,
+                                         density=False)
+        pd_bins = np.convolve(pd_edges, [0.5, 0.5])[1:-1]  # the bin centers
+
+        # initialize the distribution
+        pd = PitchDistribution(pd_bins, pd_vals, kernel_width=0,
+                               ref_freq=ref_freq)
+        pd.smoothen(kernel_width=kernel_width)
+
+        # normalize
+        pd.normalize(norm_type=norm_type)
+
+        return pd
+
+    @staticmethod
+    def _get_edges(min_cent, max_cent, step_size):
         # Finds the endpoints of the histogram edges. Histogram bins will be
         # generated as the midpoints of these edges.
-        min_edge = min(cent_track) - (step_size / 2.0)
-        max_edge = max(cent_track) + (step_size / 2.0)
+        min_edge = min_cent - (step_size / 2.0)
+        max_edge = max_cent + (step_size / 2.0)
         pd_edges = np.concatenate(
             [np.arange(-step_size / 2.0, min_edge, -step_size)[::-1],
              np.arange(step_size / 2.0, max_edge, step_size)])
@@ -147,45 +171,16 @@ class PitchDistribution:
         pd_edges = pd_edges if step_size / 2.0 in pd_edges else np.append(
             pd_edges, step_size / 2.0)
 
-        # Generates the histogram and bins (i.e. the midpoints of edges)
-        pd_vals, pd_edges = np.histogram(cent_track, bins=pd_edges,
-                                         density=False)
-        pd_bins = np.convolve(pd_edges, [0.5, 0.5])[1:-1]  # the bin centers
-
-        # initialize the distribution
-        pd = PitchDistribution(pd_bins, pd_vals, kernel_width=0,
-                               ref_freq=ref_freq)
-        pd.smoothen(kernel_width=kernel_width)
-
-        # normalize
-        pd.normalize(norm_type=norm_type)
-
-        return pd
+        return pd_edges
 
     def smoothen(self, kernel_width=7.5):
         if kernel_width > 0:
             # smooth the histogram
-            normal_dist = scipy.stats.norm(loc=0, scale=kernel_width)
-            xn = np.concatenate(
-                [np.arange(0, - 5 * kernel_width, -self.step_size)[::-1],
-                 np.arange(self.step_size, 5 * kernel_width, self.step_size)])
-            sampled_norm = normal_dist.pdf(xn)
-            if len(sampled_norm) <= 1:
-                raise ValueError(
-                    "the smoothing factor is too small compared to the step "
-                    "size, such that the convolution kernel returns a single "
-                    "point Gaussian. Either increase the value to at least "
-                    "(step size/3) or assign kernel width to 0, for no "
-                    "smoothing.")
+            sampled_norm = self._get_kernel(kernel_width, self.step_size)
+
             # convolution generates tails
-            extra_num_bins = np.floor(len(sampled_norm) / 2)
-
-            self.bins = np.concatenate(
-                (np.arange(self.bins[0] - extra_num_bins * self.step_size,
-                           self.bins[0], self.step_size), self.bins,
-                 np.arange(self.bins[-1] + self.step_size, self.bins[-1] +
-                           extra_num_bins * self.step_size + self.step_size,
-                           self.step_size)))
+            self.bins = self._pad_bins(self.bins, len(sampled_norm) // 2,
+                                       self.step_size)
             self.vals = np.convolve(self.vals, sampled_norm)
             assert len(self.bins) == len(self.vals), 'Lengths of bins and ' \
                                                      'vals are different.'
@@ -193,23 +188,106 @@ class PitchDistribution:
                                  self.kernel_width * kernel_width)
 
     @staticmethod
-    def from_hz_pitch(hz_track, ref_freq=440.0, kernel_width=7.5,
-                      step_size=7.5, norm_type='sum'):
-        hz_track = np.array(hz_track)  # force to numpy array
+    @functools.lru_cache(maxsize=None)
+    def _get_kernel(kernel_width, step_size):
+        # the kernel is shared by the distributions; it is read-only
+        normal_dist = stats.norm(loc=0, scale=kernel_width)
+        xn = np.concatenate(
+            [np.arange(0, - 5 * kernel_width, -step_size)[::-1],
+             np.arange(step_size, 5 * kernel_width, step_size)])
+        sampled_norm = normal_dist.pdf(xn)
+        if len(sampled_norm) <= 1:
+            raise ValueError(
+                "the smoothing factor is too small compared to the step "
+                "size, such that the convolution kernel returns a single "
+                "point Gaussian. Either increase the value to at least "
+                "(step size/3) or assign kernel width to 0, for no "
+                "smoothing.")
+        sampled_norm.setflags(write=False)
+
+        return sampled_norm
 
-        if hz_track.ndim > 1:  # pitch is given as [time, pitch, (conf)] array
-            hz_track = hz_track[:, 1]
+    @staticmethod
+    def _pad_bins(bins, num_bins, step_size):
+        return np.concatenate(
+            (np.arange(bins[0] - num_bins * step_size, bins[0], step_size),
+             bins, np.arange(bins[-1] + step_size,
+                             bins[-1] + num_bins * step_size + step_size,
+                             step_size)))
 
-        # filter out the NaN, -infinity and +infinity and values < 20
-        hz_track = hz_track[~np.isnan(hz_track)]
-        hz_track = hz_track[~np.isinf(hz_track)]
-        hz_track = hz_track[hz_track >= 20.0]
-        cent_track = Converter.hz_to_cent(hz_track, ref_freq)
+    @staticmethod
+    def from_hz_pitch(hz_track, ref_freq=440.0, kernel_width=7.5,
+                      step_size=7.5, norm_type='sum'):
+        # the pitch is given as a PitchTrack, [time, pitch, (conf)] matrix or
+        # 1-D array. The NaN, infinite and values <= 20 Hz are filtered out.
+        # A PitchTrack caches the cent values for the next calls
+        cent_track = PitchTrack.from_pitch(hz_track).get_valid_cents(
+            ref_freq)
 
         return PitchDistribution.from_cent_pitch(
             cent_track, ref_freq=ref_freq, kernel_width=kernel_width,
             step_size=step_size, norm_type=norm_type)
 
+    @staticmethod
+    def from_hz_pitches(hz_tracks, ref_freq=440.0, kernel_width=7.5,
+                        step_size=7.5, norm_type='sum'):
+        """
+        Generates the distributions of many pitch tracks at once, e.g. the
+        note models of a recording. The output is the same as calling
+        from_hz_pitch for each track. The pitch values are converted to
+        cents together and the histograms are computed on a shared cent grid
+        anchored at ref_freq by a single bincount
+        :param hz_tracks: list of pitch tracks, see from_hz_pitch
+        :return: list of PitchDistribution objects in the order of the tracks
+        """
+        assert step_size > 0, 'The step size should have a positive value'
+
+        hz_tracks = [PitchTrack.from_pitch(track).hz for track in hz_tracks]
+        pitch_track = PitchTrack(np.concatenate(hz_tracks))
+        track_idx = np.repeat(np.arange(len(hz_tracks)),
+                              [len(track) for track in hz_tracks])
+        track_idx = track_idx[pitch_track.valid]
+        cents = pitch_track.get_valid_cents(ref_freq)
+
+        # the edges of each histogram are a slice of the shared edges
+        bounds = np.cumsum([0] + np.bincount(
+            track_idx, minlength=len(hz_tracks)).tolist())
+        track_edges = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                raise ValueError('A pitch track does not have any valid '
+                                 'pitch value.')
+            track_edges.append(PitchDistribution._get_edges(
+                cents[start:end].min(), cents[start:end].max(), step_size))
+        edges = PitchDistribution._get_edges(
+            cents.min(), cents.max(), step_size)
+        bins = np.convolve(edges, [0.5, 0.5])[1:-1]  # the bin centers
+        first_bins = np.searchsorted(edges, [e[0] for e in track_edges])
+        end_bins = first_bins + [len(e) - 1 for e in track_edges]
+
+        # np.histogram: the bins are half-open except the last one and the
+        # values outside the edges are dropped
+        bin_idx = np.searchsorted(edges, cents, side='right') - 1
+        is_last_edge = (bin_idx == end_bins[track_idx]) & (
+            cents == edges[np.minimum(bin_idx, len(edges) - 1)])
+        bin_idx[is_last_edge] -= 1
+        in_range = (bin_idx >= first_bins[track_idx]) & (
+            bin_idx < end_bins[track_idx])
+        counts = np.bincount(
+            track_idx[in_range] * len(bins) + bin_idx[in_range],
+            minlength=len(hz_tracks) * len(bins)).reshape(-1, len(bins))
+
+        distributions = []
+        for ii, (first_bin, end_bin) in enumerate(zip(first_bins, end_bins)):
+            pd = PitchDistribution(
+                bins[first_bin:end_bin], counts[ii, first_bin:end_bin],
+                kernel_width=0, ref_freq=ref_freq)
+            pd.smoothen(kernel_width=kernel_width)
+            pd.normalize(norm_type=norm_type)
+            distributions.append(pd)
+
+        return distributions
+
     def __eq__(self, other):
         eq_bool = True
         self_dict = self.__dict__
@@ -252,7 +330,7 @@ class PitchDistribution:
         if norm_type is None:  # nothing, keep the occurrences (histogram)
             normval = 1
         elif norm_type == 'area':  # area under the curve using simpsons rule
-            normval = scipy.integrate.simps(self.vals, dx=self.step_size)
+            normval = integrate.simps(self.vals, dx=self.step_size)
         elif norm_type == 'sum':  # sum normalization
             normval = np.sum(self.vals)
         elif norm_type == 'max':  # max number becomes 1
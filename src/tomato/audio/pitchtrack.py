@@ -0,0 +1,348 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ..converter import Converter
+
+
+class PitchTrack:
+    """
+    Pitch track of a recording, which is passed through the analysis steps
+    instead of the [time, pitch, salience] lists. The time stamps, pitch
+    and salience are stored as separate contiguous float arrays. The time
+    stamps of a regularly sampled track, e.g. the predominant melody, are
+    not stored; they are computed from the hop size and the sample rate.
+
+    The track is immutable. The slices share the arrays of the track, and
+    the track is cleaned and converted to cents once and shared by the
+    analysis steps. The validity mask, i.e. the finite pitch values above
+    min_freq, is computed on the first use. The cent values are cached for
+    the last few reference frequencies, e.g. the dummy reference of the
+    distributions and the tonic:
+
+        pitch_track = PitchTrack.from_pitch(pitch)  # [time, Hz, (salience)]
+        cents = pitch_track.get_valid_cents(440.0)  # computed once
+        phrase = pitch_track.slice_time(10.0, 20.0)  # no copy
+
+    The legacy [time, pitch, salience] lists are only created for the JSON
+    output, see IO.to_json and tolist.
+    """
+    min_freq = 20.0  # Hz, the lower values are unvoiced (exclusive)
+    _max_cached_refs = 4
+
+    def __init__(self, pitch):
+        """
+        :param pitch: [time, pitch (Hz), (salience)] matrix or 1-D array of
+                      pitch values in Hz, as a list or numpy array
+        """
+        pitch = np.asarray(pitch, dtype=float)
+        if pitch.ndim > 1:
+            self._set_columns(
+                np.array(pitch[:, 1]), time=np.array(pitch[:, 0]),
+                salience=np.array(pitch[:, 2]) if pitch.shape[1] > 2
+                else None)
+        else:
+            self._set_columns(np.array(pitch))
+
+    @classmethod
+    def from_pitch(cls, pitch):
+        """
+        Returns the input if it is already a PitchTrack, else wraps it
+        """
+        if isinstance(pitch, cls):
+            return pitch
+        return cls(pitch)
+
+    @classmethod
+    def from_arrays(cls, hz, time=None, salience=None, hop_size=None,
+                    sample_rate=None, first_sample=0):
+        """
+        Creates a track from its columns. The arrays are not copied if they
+        are contiguous float arrays; they should not be modified afterwards
+        :param hz: pitch values in Hz
+        :param time: time stamps in seconds. If None and hop_size is given,
+                     the time stamp of the ith sample is
+                     (first_sample + i) * hop_size / sample_rate
+        :param salience: salience of the pitch values, optional
+        :param hop_size: hop size of the pitch track in audio samples
+        :param sample_rate: sample rate of the audio in Hz
+        :param first_sample: index of the first sample of the track
+        :return: PitchTrack
+        """
+        track = cls.__new__(cls)
+        track._set_columns(hz, time=time, salience=salience,
+                           hop_size=hop_size, sample_rate=sample_rate,
+                           first_sample=first_sample)
+        return track
+
+    def _set_columns(self, hz, time=None, salience=None, hop_size=None,
+                     sample_rate=None, first_sample=0):
+        if time is None and hop_size is not None and sample_rate is None:
+            raise ValueError('The sample rate is needed to compute the time '
+                             'stamps from the hop size.')
+
+        self.hz = self._to_column(hz)
+        self._time = None if time is None else self._to_column(time)
+        self.salience = None if salience is None else \
+            self._to_column(salience)
+        for column in [self._time, self.salience]:
+            if column is not None and len(column) != len(self.hz):
+                raise ValueError('The columns of the pitch track should '
+                                 'have the same length.')
+
+        self.hop_size = hop_size
+        self.sample_rate = sample_rate
+        self.first_sample = first_sample
+        self._implicit_time = time is None and hop_size is not None
+
+        self._valid = None
+        self._cents = OrderedDict()  # reference frequency -> cents
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _to_column(arr):
+        # read-only view, the input array itself stays writeable
+        column = np.ascontiguousarray(arr, dtype=float).view()
+        if column.ndim != 1:
+            raise ValueError('The columns of the pitch track should be 1-D.')
+        column.setflags(write=False)
+        return column
+
+    def __getstate__(self):
+        # the caches are not pickled; the implicit time stamps are computed
+        # again if needed
+        return {'hz': self.hz, 'salience': self.salience,
+                'time': None if self.has_implicit_time else self._time,
+                'hop_size': self.hop_size, 'sample_rate': self.sample_rate,
+                'first_sample': self.first_sample}
+
+    def __setstate__(self, state):
+        self._set_columns(**state)
+
+    def __len__(self):
+        return len(self.hz)
+
+    def __repr__(self):
+        return '{0:s}(num_samples={1:d}, implicit_time={2!r})'.format(
+            self.__class__.__name__, len(self), self.has_implicit_time)
+
+    @property
+    def has_implicit_time(self):
+        """
+        True if the time stamps are computed from the hop size
+        """
+        return self._implicit_time
+
+    @property
+    def time(self):
+        """
+        Time stamps in seconds, None if the track has no time information.
+        The implicit time stamps are computed on the first use
+        """
+        if self._time is None and self._implicit_time:
+            self._time = self._to_column(
+                np.arange(self.first_sample, self.first_sample + len(self)) *
+                self.hop_size / float(self.sample_rate))
+        return self._time
+
+    def _get_time_at(self, idx):
+        # same arithmetic as the time property, without creating the array
+        return (self.first_sample + idx) * self.hop_size / \
+            float(self.sample_rate)
+
+    def _get_columns(self):
+        return [c for c in [self.time, self.hz, self.salience]
+                if c is not None]
+
+    def __getitem__(self, key):
+        """
+        A slice returns a PitchTrack sharing the arrays of the track, an
+        integer returns the [time, pitch, (salience)] row. The other keys
+        index the [time, pitch, (salience)] matrix
+        """
+        if isinstance(key, slice):
+            return self._slice(key)
+        if isinstance(key, (int, np.integer)):
+            if self.time is None:
+                return self.hz[key]
+            return np.array([c[key] for c in self._get_columns()])
+        return self.to_array()[key]
+
+    def __iter__(self):
+        return iter(self.to_array())
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.to_array()  # always a new array
+        return arr if dtype is None else arr.astype(dtype, copy=False)
+
+    def _slice(self, key):
+        start, stop, step = key.indices(len(self))
+        if self._implicit_time and step == 1:
+            return self.from_arrays(
+                self.hz[key], salience=self._slice_column(self.salience, key),
+                hop_size=self.hop_size, sample_rate=self.sample_rate,
+                first_sample=self.first_sample + start)
+
+        return self.from_arrays(
+            self.hz[key], time=self._slice_column(self.time, key),
+            salience=self._slice_column(self.salience, key))
+
+    @staticmethod
+    def _slice_column(column, key):
+        return None if column is None else column[key]
+
+    def slice_time(self, start=None, end=None, include_end=False):
+        """
+        Returns the samples in the time interval [start, end) without
+        copying the arrays
+        :param start: start time in seconds, None starts from the beginning
+        :param end: end time in seconds, None continues to the end
+        :param include_end: includes the samples at the end time, i.e. the
+                            interval is [start, end]
+        :return: PitchTrack
+        """
+        if self.time is None and not self._implicit_time:
+            raise ValueError('The pitch track does not have time stamps.')
+
+        start_idx = 0 if start is None else self.search_time(start, 'left')
+        end_idx = len(self) if end is None else self.search_time(
+            end, 'right' if include_end else 'left')
+
+        return self[start_idx:max(start_idx, end_idx)]
+
+    def search_time(self, time_stamp, side='left'):
+        """
+        Finds the index of a time stamp as numpy.searchsorted. The implicit
+        time axis is searched arithmetically
+        :param time_stamp: time in seconds
+        :param side: "left" or "right", see numpy.searchsorted
+        :return: index of the first sample at or after ("left") or after
+                 ("right") the time stamp
+        """
+        if not self._implicit_time:
+            return int(np.searchsorted(self.time, time_stamp, side=side))
+
+        if side == 'left':
+            def is_before(idx):
+                return self._get_time_at(idx) < time_stamp
+        else:
+            def is_before(idx):
+                return self._get_time_at(idx) <= time_stamp
+
+        # estimate the index, then fix the floating point errors
+        idx = int(np.ceil(time_stamp * self.sample_rate / self.hop_size)) - \
+            self.first_sample
+        idx = min(max(idx, 0), len(self))
+        while idx > 0 and not is_before(idx - 1):
+            idx -= 1
+        while idx < len(self) and is_before(idx):
+            idx += 1
+
+        return idx
+
+    def replace(self, hz=None, salience=None):
+        """
+        Returns a new track with the same time stamps, e.g. to store the
+        output of a pitch filter
+        :param hz: new pitch values, None keeps the pitch values
+        :param salience: new salience values, None keeps the salience
+        :return: PitchTrack
+        """
+        return self.from_arrays(
+            self.hz if hz is None else hz,
+            time=None if self._implicit_time else self._time,
+            salience=self.salience if salience is None else salience,
+            hop_size=self.hop_size, sample_rate=self.sample_rate,
+            first_sample=self.first_sample)
+
+    def to_array(self):
+        """
+        Returns the track as a new [time, pitch, (salience)] matrix, or the
+        pitch values if the track does not have time stamps
+        """
+        if self.time is None:
+            return np.array(self.hz)
+        return np.column_stack(self._get_columns())
+
+    def tolist(self):
+        """
+        Returns the track in the legacy [[time, pitch, (salience)], ...]
+        list format, e.g. for the JSON output
+        """
+        return self.to_array().tolist()
+
+    @property
+    def valid(self):
+        """
+        Boolean mask of the voiced samples, i.e. finite and above min_freq
+        """
+        if self._valid is None:
+            with np.errstate(invalid='ignore'):
+                self._valid = np.isfinite(self.hz) & (self.hz > self.min_freq)
+        return self._valid
+
+    def get_cents(self, ref_freq):
+        """
+        Returns the pitch values in cents with respect to ref_freq; the
+        unvoiced samples are NaN. The output is shared, do not modify it
+        :param ref_freq: reference frequency in Hz
+        :return: 1-D numpy array with the length of the track
+        """
+        return self._get_cents(ref_freq)[0]
+
+    def get_valid_cents(self, ref_freq):
+        """
+        Returns the voiced pitch values in cents with respect to ref_freq.
+        The output is shared, do not modify it
+        :param ref_freq: reference frequency in Hz
+        :return: 1-D numpy array
+        """
+        return self._get_cents(ref_freq)[1]
+
+    def _get_cents(self, ref_freq):
+        ref_freq = float(ref_freq)
+        with self._lock:
+            try:
+                self._cents.move_to_end(ref_freq)
+                return self._cents[ref_freq]
+            except KeyError:
+                pass
+
+        valid_cents = Converter.hz_to_cent(self.hz[self.valid], ref_freq,
+                                           min_freq=self.min_freq)
+        cents = np.full(len(self.hz), np.nan)
+        cents[self.valid] = valid_cents
+        for arr in [cents, valid_cents]:
+            arr.setflags(write=False)
+
+        with self._lock:
+            self._cents[ref_freq] = (cents, valid_cents)
+            while len(self._cents) > self._max_cached_refs:
+                self._cents.popitem(last=False)
+
+        return cents, valid_cents
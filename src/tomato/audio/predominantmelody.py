@@ -22,23 +22,31 @@
 # of 3rd International Conference on Audio Technologies for Music and Media
 # (ATMM 2014), pages 142–153, Ankara, Turkey.
 
+import bisect
+import heapq
+import os
+import shutil
+import tempfile
 import warnings
 from math import ceil
 
-import essentia.standard as estd
 import numpy as np
-from essentia import Pool
-from essentia import __version__ as essentia_version
-from essentia import array as e_array
 
+from ..lazyimport import lazy_import
 from .pitchfilter import PitchFilter
+from .pitchtrack import PitchTrack
+
+essentia = lazy_import('essentia')  # pylint: disable-msg=C0103
+estd = lazy_import('essentia.standard')  # pylint: disable-msg=C0103
+estr = lazy_import('essentia.streaming')  # pylint: disable-msg=C0103
 
 
 class PredominantMelody:
     def __init__(self, hop_size=128, frame_size=2048, bin_resolution=1.0,
                  min_frequency=55, max_frequency=1760, magnitude_threshold=0,
                  peak_distribution_threshold=1.4, filter_pitch=True,
-                 confidence_threshold=36, min_chunk_size=50):
+                 confidence_threshold=36, min_chunk_size=50, streaming=False,
+                 segment_dur=60.0, segment_overlap=5.0):
 
         self.hop_size = hop_size  # default hopSize of PredominantMelody
         self.frame_size = frame_size  # default frameSize of PredominantMelody
@@ -57,6 +65,12 @@ class PredominantMelody:
         self.min_chunk_size = min_chunk_size  # number of minimum allowed
         # samples of a chunk in PitchFilter; ~145 ms with
         # 128 sample hopSize & 44100 Fs
+        self.streaming = streaming  # process the audio in blocks and track
+        # the contours in overlapping segments to bound the memory usage
+        self.segment_dur = segment_dur  # duration of a contour tracking
+        # segment in seconds, used in the streaming mode
+        self.segment_overlap = segment_overlap  # context added to both
+        # sides of a segment in seconds, used in the streaming mode
 
         self.sample_rate = 44100
 
@@ -77,17 +91,26 @@ class PredominantMelody:
                 'confidenceThreshold': self.confidence_threshold,
                 'sampleRate': self.sample_rate,
                 'minChunkSize': self.min_chunk_size,
-                'essentiaVersion': essentia_version,
+                'streaming': self.streaming,
+                'segmentDuration': self.segment_dur,
+                'segmentOverlap': self.segment_overlap,
+                'essentiaVersion': essentia.__version__,
                 'citation': citation}
 
     def run(self, fname):
-        # load audio and eqLoudness
-        # Note: MonoLoader resamples the audio signal to 44100 Hz by default
-        audio = estd.MonoLoader(filename=fname)()  # pylint: disable-msg=E1101
-        audio = estd.EqualLoudness()(audio)  # pylint: disable-msg=E1101
-
-        contours_bins, contours_start_times, contour_saliences, duration = \
-            self._extract_pitch_contours(audio)
+        if self.streaming:
+            contours_bins, contours_start_times, contour_saliences, \
+                duration = self._extract_pitch_contours_streaming(fname)
+        else:
+            # load audio and eqLoudness
+            # Note: MonoLoader resamples the audio signal to 44100 Hz by
+            # default
+            audio = estd.MonoLoader(  # pylint: disable-msg=E1101
+                filename=fname)()
+            audio = estd.EqualLoudness()(audio)  # pylint: disable-msg=E1101
+
+            contours_bins, contours_start_times, contour_saliences, \
+                duration = self._extract_pitch_contours(audio)
 
         # run the simplified contour selection
         [pitch, pitch_salience] = self.select_contours(
@@ -97,21 +120,18 @@ class PredominantMelody:
         pitch = [0. if p == 0
                  else 55. * 2. ** (self.bin_resolution * p / 1200.)
                  for p in pitch]
-        pitch = e_array(pitch)
-        pitch_salience = e_array(pitch_salience)
+        pitch = essentia.array(pitch)
+        pitch_salience = essentia.array(pitch_salience)
 
         # pitch filter
         if self.filter_pitch:
             pitch, pitch_salience = self._post_filter_pitch(
                 pitch, pitch_salience)
 
-        # generate time stamps
-        time_stamps = self._gen_time_stamps(0, len(pitch))
-
-        # [time pitch salience] matrix
-        out = np.transpose(
-            np.vstack((time_stamps, pitch.tolist(), pitch_salience.tolist())))
-        out = out.tolist()
+        # the time stamps are implicit in the hop size and the sample rate
+        out = PitchTrack.from_arrays(
+            pitch, salience=pitch_salience, hop_size=self.hop_size,
+            sample_rate=self.sample_rate)
 
         # settings
         settings = self.get_settings()
@@ -153,7 +173,7 @@ class PredominantMelody:
             peakDistributionThreshold=self.peak_distribution_threshold)
 
         # compute frame by frame
-        pool = Pool()
+        pool = essentia.Pool()
         for frame in estd.FrameGenerator(audio,  # pylint: disable-msg=E1101
                                          frameSize=self.frame_size,
                                          hopSize=self.hop_size):
@@ -182,6 +202,162 @@ class PredominantMelody:
                  for f in pool['allframes_salience_peaks_contourSaliences']])
         return contours_bins, contours_start_times, contour_saliences, duration
 
+    def _extract_pitch_contours_streaming(self, fname):
+        """
+        Computes the pitch contours without keeping the audio or the
+        salience peaks of the whole recording in the memory. The audio is
+        processed in blocks by an Essentia streaming network, which writes the
+        salience peaks of each frame to temporary files. The contours are
+        then tracked in overlapping segments of these frames. A segment only
+        keeps the contours starting in its own part, the overlapping context
+        on its left is used to skip the contours continuing from the previous
+        segment. A segment is extended until its contours end, so that the
+        contours crossing the segment boundaries are not cut.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            bins_file = os.path.join(tmp_dir, 'salience_peaks_bins.txt')
+            saliences_file = os.path.join(tmp_dir,
+                                          'salience_peaks_saliences.bin')
+            self._write_salience_peaks(fname, bins_file, saliences_file)
+
+            return self._track_pitch_contours_in_segments(
+                self._read_salience_peaks(bins_file, saliences_file))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def _write_salience_peaks(self, fname, bins_file, saliences_file):
+        # the same chain as the standard mode, i.e. MonoLoader, EqualLoudness
+        # and the FrameGenerator loop in _extract_pitch_contours
+        # pylint: disable-msg=E1101
+        loader = estr.MonoLoader(filename=fname)
+        equal_loudness = estr.EqualLoudness()
+        frame_cutter = estr.FrameCutter(frameSize=self.frame_size,
+                                        hopSize=self.hop_size)
+        windowing = estr.Windowing(zeroPadding=3 * self.frame_size)
+        spectrum = estr.Spectrum(size=self.frame_size * 4)
+        spectral_peaks = estr.SpectralPeaks(
+            minFrequency=self.min_frequency, maxFrequency=self.max_frequency,
+            magnitudeThreshold=self.magnitude_threshold,
+            sampleRate=self.sample_rate, orderBy='magnitude')
+        pitch_salience_function = estr.PitchSalienceFunction(
+            binResolution=self.bin_resolution)
+        pitch_salience_function_peaks = estr.PitchSalienceFunctionPeaks(
+            binResolution=self.bin_resolution,
+            minFrequency=self.min_frequency, maxFrequency=self.max_frequency)
+
+        # the bins are integer indices, which are written exactly in text.
+        # The text lines also delimit the frames in the binary saliences
+        bins_output = estr.FileOutput(filename=bins_file, mode='text')
+        saliences_output = estr.FileOutput(filename=saliences_file,
+                                           mode='binary')
+        # pylint: enable-msg=E1101
+
+        loader.audio >> equal_loudness.signal
+        equal_loudness.signal >> frame_cutter.signal
+        frame_cutter.frame >> windowing.frame
+        windowing.frame >> spectrum.frame
+        spectrum.spectrum >> spectral_peaks.spectrum
+        spectral_peaks.frequencies >> pitch_salience_function.frequencies
+        spectral_peaks.magnitudes >> pitch_salience_function.magnitudes
+        pitch_salience_function.salienceFunction >> \
+            pitch_salience_function_peaks.salienceFunction
+        pitch_salience_function_peaks.salienceBins >> bins_output
+        pitch_salience_function_peaks.salienceValues >> saliences_output
+
+        essentia.run(loader)
+
+    @staticmethod
+    def _read_salience_peaks(bins_file, saliences_file):
+        with open(bins_file) as bins_f, open(saliences_file, 'rb') as sal_f:
+            for line in bins_f:
+                line = line.strip()[1:-1]  # remove the brackets
+                if line:
+                    salience_peaks_bins = [float(b) for b in line.split(',')]
+                    salience_peaks_saliences = np.fromfile(
+                        sal_f, dtype=np.float32,
+                        count=len(salience_peaks_bins)).tolist()
+                else:  # no peaks; the standard mode inputs a dummy peak
+                    salience_peaks_bins = [0.]
+                    salience_peaks_saliences = [0.]
+
+                yield salience_peaks_bins, salience_peaks_saliences
+
+    def _track_pitch_contours_in_segments(self, salience_peaks):
+        run_pitch_contours = estd.PitchContours(  # pylint: disable-msg=E1101
+            hopSize=self.hop_size, binResolution=self.bin_resolution,
+            peakDistributionThreshold=self.peak_distribution_threshold)
+        frame_dur = self.hop_size / float(self.sample_rate)
+        segment_size = max(int(round(self.segment_dur / frame_dur)), 1)
+        overlap_size = max(int(round(self.segment_overlap / frame_dur)), 0)
+
+        contours_bins = []
+        contours_start_times = []
+        contour_saliences = []
+
+        # frames in the memory, starting from the frame buffer_start
+        buffer_bins = []
+        buffer_saliences = []
+        buffer_start = 0
+        segment_start = 0  # the first frame of the current segment
+        num_frames = 0
+        exhausted = False
+        while not exhausted:
+            # read until the end of the segment plus the overlap
+            segment_end = segment_start + segment_size
+            read_end = segment_end + overlap_size
+            while True:
+                while num_frames < read_end:
+                    try:
+                        frame_bins, frame_saliences = next(salience_peaks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    buffer_bins.append(frame_bins)
+                    buffer_saliences.append(frame_saliences)
+                    num_frames += 1
+
+                if segment_start >= num_frames:
+                    break
+
+                seg_bins, seg_saliences, seg_start_times = run_pitch_contours(
+                    buffer_bins, buffer_saliences)[:3]
+                seg_contours = []
+                for cb, cs, st in zip(seg_bins, seg_saliences,
+                                      seg_start_times):
+                    start_frame = buffer_start + int(round(st / frame_dur))
+                    if segment_start <= start_frame < segment_end:
+                        seg_contours.append((cb, cs, start_frame))
+
+                # a contour reaching the last frame in the memory may
+                # continue; read further until all the kept contours end
+                # so that they are not cut at the segment boundary
+                if exhausted or all(start_frame + len(cb) < num_frames
+                                    for cb, _, start_frame in seg_contours):
+                    break
+                read_end = num_frames + max(overlap_size, 1)
+
+            if segment_start >= num_frames:
+                break
+
+            for cb, cs, start_frame in seg_contours:
+                contours_bins.append(cb)
+                contour_saliences.append(cs)
+                contours_start_times.append(start_frame * frame_dur)
+
+            # drop the frames, which are not in the context of the next
+            # segment
+            segment_start = segment_end
+            num_drop = max(segment_start - overlap_size - buffer_start, 0)
+            del buffer_bins[:num_drop]
+            del buffer_saliences[:num_drop]
+            buffer_start += num_drop
+
+        # computed the same way as in PitchContours, i.e. in single precision
+        duration = float(np.float32(num_frames) * np.float32(frame_dur))
+
+        return contours_bins, contours_start_times, contour_saliences, duration
+
     def _post_filter_pitch(self, pitch, pitch_salience):
         try:
             run_pitch_filter = estd.PitchFilter(
@@ -210,19 +386,95 @@ class PredominantMelody:
             self.sample_rate) for s in range(start_samp, end_samp)]
         return time_stamps
 
+    def _get_num_samples(self, duration):
+        # number in samples in the audio
+        return int(ceil((duration * self.sample_rate) / self.hop_size))
+
+    def _get_start_samples(self, start_times):
+        # Start points of the contours in samples
+        return [int(round(st * self.sample_rate / float(self.hop_size)))
+                for st in start_times]
+
     def select_contours(self, pitch_contours, contour_saliences, start_times,
                         duration):
-        sample_rate = self.sample_rate
+        """
+        Picks the longest contour repeatedly and trims the remaining contours
+        so that they do not overlap with the picked ones. The selected
+        contours are kept in a sorted list of disjoint intervals and the
+        remaining contours in a max-heap by length, which is updated lazily
+        when a contour is trimmed.
+        """
+        num_samples = self._get_num_samples(duration)
+        start_samples = self._get_start_samples(start_times)
 
-        hop_size = self.hop_size
+        # ties are broken by the contour order as in the original selection
+        heap = [(-len(pc), i, start_samples[i], start_samples[i] + len(pc))
+                for i, pc in enumerate(pitch_contours) if len(pc) > 0]
+        heapq.heapify(heap)
 
-        # number in samples in the audio
-        num_samples = int(ceil((duration * sample_rate) / hop_size))
+        picked_starts = []  # sorted, disjoint intervals of picked contours
+        picked_ends = []
+        pitch_contours_no_overlap = []
+        contour_saliences_no_overlap = []
+        start_samples_no_overlap = []
+        while heap:
+            neg_len, idx, start, end = heapq.heappop(heap)
+            start, end = self._trim_to_free_interval(
+                start, end, picked_starts, picked_ends)
+
+            if start >= end:  # totally overlapping
+                continue
+            if end - start < -neg_len:  # trimmed, check its place again
+                heapq.heappush(heap, (start - end, idx, start, end))
+                continue
+
+            pos = bisect.bisect_left(picked_starts, start)
+            picked_starts.insert(pos, start)
+            picked_ends.insert(pos, end)
+
+            keep_idx = slice(start - start_samples[idx],
+                             end - start_samples[idx])
+            pitch_contours_no_overlap.append(
+                np.array(pitch_contours[idx])[keep_idx])
+            contour_saliences_no_overlap.append(
+                np.array(contour_saliences[idx])[keep_idx])
+            start_samples_no_overlap.append(start)
 
-        # Start points of the contours in samples
-        start_samples = [
-            int(round(start_times[i] * sample_rate / float(hop_size)))
-            for i in range(0, len(start_times))]
+        pitch, salience = self._join_contours(pitch_contours_no_overlap,
+                                              contour_saliences_no_overlap,
+                                              start_samples_no_overlap,
+                                              num_samples)
+
+        return pitch, salience
+
+    @staticmethod
+    def _trim_to_free_interval(start, end, picked_starts, picked_ends):
+        # A picked contour is at least as long as the (trimmed) contours left
+        # at the time of picking. Therefore it cannot lie strictly inside
+        # them, and the overlaps are only at the boundaries
+        k = bisect.bisect_right(picked_starts, start) - 1
+        while 0 <= k < len(picked_starts) and \
+                picked_starts[k] <= start < picked_ends[k]:
+            start = picked_ends[k]
+            k += 1
+        if start >= end:
+            return start, end
+
+        k = bisect.bisect_right(picked_starts, end - 1) - 1
+        while k >= 0 and picked_starts[k] <= end - 1 < picked_ends[k]:
+            end = picked_starts[k]
+            k -= 1
+
+        return start, end
+
+    def _select_contours_by_overlap_sets(self, pitch_contours,
+                                         contour_saliences, start_times,
+                                         duration):
+        # The original implementation of select_contours, which compares the
+        # sample indices of every remaining contour after each pick. It is
+        # kept as a reference for the benchmarks
+        num_samples = self._get_num_samples(duration)
+        start_samples = self._get_start_samples(start_times)
 
         pitch_contours_no_overlap = []
         start_samples_no_overlap = []
@@ -25,11 +25,15 @@
 import copy
 import json
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from ..converter import Converter
+from ..lazyimport import lazy_import
 from .pitchdistribution import PitchDistribution
+from .pitchtrack import PitchTrack
+
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+signal = lazy_import('scipy.signal')  # pylint: disable-msg=C0103
 
 
 class Seyir:
@@ -39,9 +43,10 @@ class Seyir:
                "l’improvisation edited by Mondher Ayari, pp. 289-298, " \
                "ISBN: 9782752102485, 2015, Delatour France, Sampzon."
 
-    def __init__(self, kernel_width=7.5, step_size=7.5):
+    def __init__(self, kernel_width=7.5, step_size=7.5, incremental=True):
         self.kernel_width = kernel_width
         self.step_size = step_size
+        self.incremental = incremental
 
     def _get_settings(self):
         return {'kernel_width': self.kernel_width, 'step_size': self.step_size,
@@ -50,9 +55,10 @@ class Seyir:
     def analyze(self, pitch, frame_dur=20.0, hop_ratio=0.5):
         hop_size = frame_dur * hop_ratio
 
-        pitch = np.array(pitch)
-        tt = pitch[:, 0]
-        pp = pitch[:, 1]
+        # the pitch track is converted to cents once for all the frames
+        pitch_track = PitchTrack.from_pitch(pitch)
+        tt = pitch_track.time
+        p_cent = pitch_track.get_cents(self._dummy_ref_freq)
 
         # start the first frame "centered" around 0 seconds
         tb = -frame_dur / 2.0
@@ -64,62 +70,194 @@ class Seyir:
             t_center.append(min([max([tb + frame_dur / 2.0, 0]), tt[-1]]))
             tb += hop_size
 
-        return self._compute_seyir_features_per_interval(pp, tt, t_intervals,
-                                                         t_center)
+        # the incremental computation needs the time stamps to be sorted
+        if self.incremental and np.all(np.diff(tt) >= 0):
+            return self._compute_seyir_features_incremental(
+                p_cent, tt, t_intervals, t_center)
+
+        return self._compute_seyir_features_per_interval(
+            p_cent, tt, t_intervals, t_center)
 
-    def _compute_seyir_features_per_interval(self, pp, tt, t_intervals,
-                                             t_center):
+    def _compute_seyir_features_per_interval(self, p_cent_track, tt,
+                                             t_intervals, t_center):
         seyir_features = []
         maxdur = max(ti[1] - ti[0] for ti in t_intervals)
 
         for ti, tc in zip(t_intervals, t_center):
-            p_cent, p_sliced = self._slice_pitch(pp, ti, tt)
+            p_cent, p_sliced = self._slice_pitch(p_cent_track, ti, tt)
 
             if p_cent.size == 0:  # silence
-                seyir_features.append(
-                    {'pitch_distribution': [], 'average_pitch': np.nan,
-                     'stable_pitches': [], 'time_interval': ti,
-                     'time_center': tc})
+                seyir_features.append(self._get_silent_features(ti, tc))
             else:
                 pd = PitchDistribution.from_cent_pitch(
                     p_cent, ref_freq=self._dummy_ref_freq,
                     kernel_width=self.kernel_width, step_size=self.step_size)
 
-                # reconvert to Hz
-                pd.cent_to_hz()
-
-                # normalize to 1 (instead of the area under the curve)
-                maxval = max(pd.vals)
                 num_ratio = float(len(p_cent)) / len(p_sliced)  # ratio of
                 # number of samples
                 time_ratio = (ti[1] - ti[0]) / maxdur
-                pd.vals = pd.vals * num_ratio * time_ratio / maxval
+                seyir_features.append(self._get_frame_features(
+                    pd, p_cent, num_ratio, time_ratio, ti, tc))
 
-                # get the stable pitches, i.e. peaks
-                peak_idx, peak_vals = pd.detect_peaks()
-                stable_pitches = [{'frequency': float(pd.bins[idx]),
-                                   'value': float(val)}
-                                  for idx, val in zip(peak_idx, peak_vals)]
+        return seyir_features
 
-                # get the average pitch
-                avpitch = Converter.cent_to_hz(np.mean(p_cent),
-                                               self._dummy_ref_freq)
+    def _compute_seyir_features_incremental(self, p_cent, tt, t_intervals,
+                                            t_center):
+        """--------------------------------------------------------------------
+        Computes the same features as _compute_seyir_features_per_interval
+        in a single pass: the frame boundaries are found by binary search,
+        the histograms of all frames are read from a cumulative (time x
+        pitch) histogram and they are smoothed by a single batched
+        convolution.
+        --------------------------------------------------------------------"""
+        maxdur = max(ti[1] - ti[0] for ti in t_intervals)
 
-                seyir_features.append(
-                    {'pitch_distribution': pd, 'average_pitch': avpitch,
-                     'stable_pitches': stable_pitches, 'time_interval': ti,
-                     'time_center': tc})
+        # sample index range of each frame, i.e. ti[1] > t >= ti[0]
+        bounds = np.searchsorted(tt, np.array(t_intervals), side='left')
+
+        # the valid (non-nan, non-inf) samples in cents and their index range
+        # in each frame
+        valid_idx = np.flatnonzero(np.isfinite(p_cent))
+        p_cent = p_cent[valid_idx]
+        valid_bounds = np.searchsorted(valid_idx, bounds, side='left')
+
+        is_voiced = valid_bounds[:, 1] > valid_bounds[:, 0]
+        if not is_voiced.any():
+            return [self._get_silent_features(ti, tc)
+                    for ti, tc in zip(t_intervals, t_center)]
+
+        # the histogram edges of each frame are a contiguous part of the
+        # edges computed from the whole track. The range is extended by a bin
+        # on each side such that every sample falls into a bin
+        edges = PitchDistribution._get_edges(
+            np.min(p_cent) - self.step_size, np.max(p_cent) + self.step_size,
+            self.step_size)
+        bin_idx = np.searchsorted(edges, p_cent, side='right') - 1
+
+        frame_edge_idx = np.zeros((len(t_intervals), 2), dtype=int)
+        for ii in np.flatnonzero(is_voiced):
+            p_frame = p_cent[valid_bounds[ii, 0]:valid_bounds[ii, 1]]
+            frame_edges = PitchDistribution._get_edges(
+                np.min(p_frame), np.max(p_frame), self.step_size)
+            frame_edge_idx[ii] = np.searchsorted(
+                edges, frame_edges[[0, -1]], side='left')
+
+        frame_hists = self._get_frame_histograms(
+            p_cent, edges, bin_idx, valid_bounds, frame_edge_idx)
+
+        # smooth all the frames at once
+        if self.kernel_width > 0:
+            kernel = PitchDistribution._get_kernel(
+                self.kernel_width, self.step_size)
+            frame_hists = signal.convolve(
+                frame_hists, kernel[np.newaxis, :], method='direct')
+            num_pad_bins = len(kernel) // 2
+        else:
+            num_pad_bins = 0
+        frame_hists = frame_hists.astype(float)
+
+        seyir_features = []
+        for ii, (ti, tc) in enumerate(zip(t_intervals, t_center)):
+            if not is_voiced[ii]:  # silence
+                seyir_features.append(self._get_silent_features(ti, tc))
+                continue
+
+            first_edge, last_edge = frame_edge_idx[ii]
+            frame_bins = np.convolve(edges[first_edge:last_edge + 1],
+                                     [0.5, 0.5])[1:-1]
+            frame_vals = frame_hists[
+                ii, first_edge:last_edge + 2 * num_pad_bins]
+
+            pd = PitchDistribution(
+                PitchDistribution._pad_bins(
+                    frame_bins, num_pad_bins, self.step_size),
+                frame_vals, kernel_width=self.kernel_width,
+                ref_freq=self._dummy_ref_freq)
+            pd.normalize()
+
+            p_frame = p_cent[valid_bounds[ii, 0]:valid_bounds[ii, 1]]
+            num_ratio = float(len(p_frame)) / (bounds[ii, 1] - bounds[ii, 0])
+            seyir_features.append(self._get_frame_features(
+                pd, p_frame, num_ratio, (ti[1] - ti[0]) / maxdur, ti, tc))
 
         return seyir_features
 
-    def _slice_pitch(self, pp, ti, tt):
-        p_sliced = [p for t, p in zip(tt, pp) if ti[1] > t >= ti[0]]
-        p_cent = Converter.hz_to_cent(
-            p_sliced, self._dummy_ref_freq)
+    @staticmethod
+    def _get_silent_features(ti, tc):
+        return {'pitch_distribution': [], 'average_pitch': np.nan,
+                'stable_pitches': [], 'time_interval': ti, 'time_center': tc}
+
+    def _get_frame_features(self, pd, p_cent, num_ratio, time_ratio, ti, tc):
+        # reconvert to Hz
+        pd.cent_to_hz()
+
+        # normalize to 1 (instead of the area under the curve)
+        maxval = max(pd.vals)
+        pd.vals = pd.vals * num_ratio * time_ratio / maxval
+
+        # get the stable pitches, i.e. peaks
+        peak_idx, peak_vals = pd.detect_peaks()
+        stable_pitches = [{'frequency': float(pd.bins[idx]),
+                           'value': float(val)}
+                          for idx, val in zip(peak_idx, peak_vals)]
+
+        # get the average pitch
+        avpitch = Converter.cent_to_hz(np.mean(p_cent), self._dummy_ref_freq)
+
+        return {'pitch_distribution': pd, 'average_pitch': avpitch,
+                'stable_pitches': stable_pitches, 'time_interval': ti,
+                'time_center': tc}
+
+    @staticmethod
+    def _get_frame_histograms(p_cent, edges, bin_idx, valid_bounds,
+                              frame_edge_idx):
+        num_bins = len(edges) - 1
+
+        # 2-D histogram of the samples between the consecutive frame
+        # boundaries, accumulated in time. The histogram of a frame is then
+        # the difference of the rows of its boundaries
+        boundaries, boundary_idx = np.unique(valid_bounds,
+                                             return_inverse=True)
+        boundary_idx = boundary_idx.reshape(valid_bounds.shape)
+
+        segment_idx = np.searchsorted(
+            boundaries, np.arange(len(p_cent)), side='right') - 1
+        in_segment = (segment_idx >= 0) & (segment_idx < len(boundaries) - 1)
+        cum_hists = np.zeros((len(boundaries), num_bins), dtype=int)
+        cum_hists[1:] = np.bincount(
+            segment_idx[in_segment] * num_bins + bin_idx[in_segment],
+            minlength=(len(boundaries) - 1) * num_bins).reshape(
+            len(boundaries) - 1, num_bins)
+        cum_hists = np.cumsum(cum_hists, axis=0)
+
+        frame_hists = (cum_hists[boundary_idx[:, 1]] -
+                       cum_hists[boundary_idx[:, 0]])
+
+        # keep the bins of each frame only; np.histogram drops the samples
+        # outside the edges of the frame
+        bin_range = np.arange(num_bins)
+        frame_hists[(bin_range < frame_edge_idx[:, :1]) |
+                    (bin_range >= frame_edge_idx[:, 1:])] = 0
+
+        # np.histogram includes the right-most edge in the last bin of a
+        # frame. Such samples fall into the next bin in the whole track
+        on_edge = np.flatnonzero(p_cent == edges[bin_idx])
+        for ii, (first_edge, last_edge) in enumerate(frame_edge_idx):
+            if last_edge > first_edge:
+                edge_bins = bin_idx[on_edge[
+                    np.searchsorted(on_edge, valid_bounds[ii, 0]):
+                    np.searchsorted(on_edge, valid_bounds[ii, 1])]]
+                frame_hists[ii, last_edge - 1] += np.sum(
+                    edge_bins == last_edge)
+
+        return frame_hists
+
+    @staticmethod
+    def _slice_pitch(p_cent_track, ti, tt):
+        p_sliced = p_cent_track[(tt >= ti[0]) & (tt < ti[1])]
 
         # pop nan and inf
-        p_cent = p_cent[~np.isnan(p_cent)]
-        p_cent = p_cent[~np.isinf(p_cent)]  # shouldn't exist, but anyways...
+        p_cent = p_sliced[np.isfinite(p_sliced)]
         return p_cent, p_sliced
 
     @staticmethod
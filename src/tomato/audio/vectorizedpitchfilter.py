@@ -0,0 +1,449 @@
+# Copyright 2014 - 2018 Hasan Sercan Atlı & Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# The algorithm is based on the pitch filter method originally explained in:
+#
+# Bozkurt, B. An Automatic Pitch Analysis Method for Turkish Maqam Music.
+# Journal of New Music Research. 37(1), 1-13.
+#
+# If you are using this implementation, please cite the following paper:
+#
+# Atlı, H. S., Uyar, B., Şentürk, S., Bozkurt, B., and Serra, X. (2014).
+# Audio feature extraction for exploring Turkish makam music. In Proceedings
+# of 3rd International Conference on Audio Technologies for Music and Media
+# (ATMM 2014), pages 142–153, Ankara, Turkey.
+
+import bisect
+
+import numpy as np
+
+from .pitchfilter import PitchFilter
+from .pitchtrack import PitchTrack
+
+
+class VectorizedPitchFilter(PitchFilter):
+    """
+    Array-based implementation of PitchFilter. The chunk decomposition,
+    extreme value removal and energy filtering are computed with boolean
+    masks and run-length chunk boundaries. The sample-by-sample corrections
+    are sequential by definition, i.e. each correction may change the
+    decision on the next samples. For these, the samples that would be
+    corrected are located with array operations and only those samples (and
+    the samples affected by the corrections) are visited in Python.
+    """
+    # number of samples after a corrected sample whose decision might change
+    # due to the correction, i.e. the last written index minus the first
+    # index read by the check, relative to the checked sample
+    _jump_reach = 7
+    _oct_error_reach = 4
+    _noise_reach = 3
+
+    @staticmethod
+    def _are_close_arr(num1, num2):
+        # array counterpart of PitchFilter.are_close
+        d = np.abs(num1 - num2)
+        av = (num1 + num2) / 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (av == 0) | (d / av < 0.2)
+
+    @staticmethod
+    def _sweep(candidates, step, start, stop, reach):
+        """
+        Calls step(i) for i in [start, stop) in the order of the loop it
+        replaces. The indices, which are neither marked in candidates nor
+        within the reach of a previous correction, are skipped as step would
+        not change anything there.
+        """
+        candidates = (np.flatnonzero(candidates) + start).tolist()
+
+        recheck_until = -1
+        i = start
+        while i < stop:
+            if i > recheck_until:  # jump to the next candidate
+                k = bisect.bisect_left(candidates, i)
+                if k == len(candidates):
+                    break
+                i = candidates[k]
+            if step(i):
+                recheck_until = i + reach
+            i += 1
+
+    def _chunk_boundaries(self, pitch):
+        # run-length boundaries of the chunks in decompose_into_chunks
+        pitch_vals = pitch[:, 1]
+        if pitch_vals.size < 2:
+            return np.array([], dtype=int), np.array([], dtype=int)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            interval = pitch_vals[1:] / pitch_vals[:-1]
+        is_cont = (self.lower_interval_thres < interval) & \
+                  (interval < self.upper_interval_thres)
+        is_break = np.where(pitch_vals[:-1] == 0, pitch_vals[1:] != 0,
+                            ~is_cont)
+
+        starts = np.concatenate(([0], np.flatnonzero(is_break) + 1))
+        ends = np.append(starts[1:], pitch_vals.size)
+
+        return starts, ends
+
+    @staticmethod
+    def _chunk_medians(vals, starts, ends):
+        # median of each chunk from a single sort
+        lengths = ends - starts
+        offsets = np.cumsum(lengths) - lengths
+        chunk_idx = np.repeat(np.arange(lengths.size), lengths)
+        sample_idx = np.arange(lengths.sum()) + np.repeat(starts - offsets,
+                                                          lengths)
+
+        chunk_vals = vals[sample_idx]
+        sorted_vals = chunk_vals[np.lexsort((chunk_vals, chunk_idx))]
+
+        return (sorted_vals[offsets + (lengths - 1) // 2] +
+                sorted_vals[offsets + lengths // 2]) / 2
+
+    def decompose_into_chunks(self, pitch):
+        pitch = np.array(pitch, dtype=float)
+        starts, _ = self._chunk_boundaries(pitch)
+
+        return np.split(pitch, starts[1:]) if starts.size else []
+
+    def correct_octave_errors_by_chunks(self, pitch):
+        pitch = np.array(pitch, dtype=float)
+        starts, ends = self._chunk_boundaries(pitch)
+
+        # the zero chunks are skipped while looking for the neighbors
+        nonzero = pitch[starts, 1] != 0
+        nz_starts = starts[nonzero]
+        nz_ends = ends[nonzero]
+        lens = nz_ends - nz_starts
+
+        meds = self._chunk_medians(pitch[:, 1], nz_starts, nz_ends)
+        firsts = pitch[nz_starts, 1]
+        lasts = pitch[nz_ends - 1, 1]
+
+        # the correction of a chunk is a power of two multiplication, which
+        # is carried exactly to its median and its boundary values
+        factors = np.ones(nz_starts.size)
+        for i in range(1, nz_starts.size - 1):
+            if not (lens[i] <= lens[i - 1] * 1.2 or
+                    lens[i] <= lens[i + 1] * 1.2):
+                continue
+
+            med_chunk_i = meds[i]
+            med_chunk_follow = meds[i + 1]
+            med_chunk_prev = meds[i - 1] * factors[i - 1]
+            prev_last = lasts[i - 1] * factors[i - 1]
+
+            if ((self.are_close(firsts[i] / 2., prev_last) and
+                 (lasts[i] / 1.5 > firsts[i + 1])) or
+                    (self.are_close(med_chunk_i / 2., med_chunk_prev) and
+                     med_chunk_i / 1.5 > med_chunk_follow)):
+                factors[i] = 0.5
+            elif (self.are_close(lasts[i] / 2., firsts[i + 1]) and
+                  (firsts[i] / 1.5 > prev_last)) or \
+                    (self.are_close(med_chunk_i / 2., med_chunk_follow) and
+                     med_chunk_i / 1.5 > med_chunk_prev):
+                factors[i] = 0.5
+            elif (self.are_close(firsts[i] * 2., prev_last) and
+                  (lasts[i] * 1.5 < firsts[i + 1])) or \
+                    (self.are_close(med_chunk_i * 2., med_chunk_prev) and
+                     med_chunk_prev * 1.5 < med_chunk_follow):
+                factors[i] = 2.
+            elif ((firsts[i] * 1.5 < prev_last and
+                   self.are_close(lasts[i] * 2., firsts[i + 1])) or
+                  (self.are_close(med_chunk_prev * 2, med_chunk_follow) and
+                   med_chunk_i * 1.5 < med_chunk_prev)):
+                factors[i] = 2.
+
+        chunk_factors = np.ones(starts.size)
+        chunk_factors[nonzero] = factors
+        pitch[:, 1] *= np.repeat(chunk_factors, ends - starts)
+
+        return pitch
+
+    def _correct_jump(self, pitch, i):
+        p = pitch[:, 1]
+        p_in = p[i:i + 4].copy()
+
+        # quadruple point
+        if self.are_close(p[i + 4], p[i + 5]) and \
+                self.are_close(p[i + 5], p[i + 6]):
+            if not self.are_close(p[i], p[i - 1]) and \
+                    not self.are_close(p[i], p[i + 4]):
+                p[i] = p[i - 1]
+            if not self.are_close(p[i + 3], p[i - 1]) and \
+                    not self.are_close(p[i + 3], p[i + 4]):
+                p[i + 3] = p[i + 4]
+
+        # triple point
+        if self.are_close(p[i + 3], p[i + 4]) and \
+                self.are_close(p[i + 4], p[i + 5]):
+            if not self.are_close(p[i], p[i - 1]) and \
+                    not self.are_close(p[i], p[i + 3]):
+                p[i] = p[i - 1]
+            if not self.are_close(p[i + 2], p[i - 1]) and \
+                    not self.are_close(p[i + 2], p[i + 3]):
+                p[i + 2] = p[i + 3]
+
+        # double point
+        if self.are_close(p[i + 2], p[i + 3]) and \
+                self.are_close(p[i + 3], p[i + 4]):
+            if not self.are_close(p[i], p[i - 1]) and \
+                    not self.are_close(p[i], p[i + 2]):
+                p[i] = p[i - 1]
+            if not self.are_close(p[i + 1], p[i - 1]) and \
+                    not self.are_close(p[i + 1], p[i + 2]):
+                p[i + 1] = p[i + 2]
+
+        # single point
+        if self.are_close(p[i + 1], p[i + 2]) and \
+                self.are_close(p[i + 2], p[i + 3]):
+            if not self.are_close(p[i], p[i - 1]) and \
+                    not self.are_close(p[i], p[i + 1]):
+                p[i] = p[i - 1]
+
+        return not np.array_equal(p_in, p[i:i + 4])
+
+    def correct_jumps(self, pitch):
+        pitch = np.asarray(pitch)
+        p = pitch[:, 1]
+        start, stop = 4, p.size - 6
+        if start >= stop:
+            return pitch
+
+        def shifted(offset):  # p[i + offset] for all i in [start, stop)
+            return p[start + offset:stop + offset]
+
+        def close(off1, off2):
+            return self._are_close_arr(shifted(off1), shifted(off2))
+
+        # the decisions in a single step are taken on the values before the
+        # step; the first correction in a step is always predicted by them
+        cand = close(-4, -3) & close(-3, -2) & close(-2, -1) & (
+            (close(4, 5) & close(5, 6) & (
+                (~close(0, -1) & ~close(0, 4)) |
+                (~close(3, -1) & ~close(3, 4)))) |
+            (close(3, 4) & close(4, 5) & (
+                (~close(0, -1) & ~close(0, 3)) |
+                (~close(2, -1) & ~close(2, 3)))) |
+            (close(2, 3) & close(3, 4) & (
+                (~close(0, -1) & ~close(0, 2)) |
+                (~close(1, -1) & ~close(1, 2)))) |
+            (close(1, 2) & close(2, 3) & ~close(0, -1) & ~close(0, 1)))
+
+        def step(i):
+            # the check on the preceding samples might have changed by a
+            # previous correction
+            if self.are_close(p[i - 4], p[i - 3]) and \
+                    self.are_close(p[i - 3], p[i - 2]) and \
+                    self.are_close(p[i - 2], p[i - 1]):
+                return self._correct_jump(pitch, i)
+            return False
+
+        self._sweep(cand, step, start, stop, self._jump_reach)
+
+        return pitch
+
+    def correct_oct_error(self, pitch):
+        pitch = np.asarray(pitch)
+        p = pitch[:, 1]
+
+        p_contiguous = np.ascontiguousarray(p)
+        midf0 = (np.median(p_contiguous) + np.mean(p_contiguous)) / 2
+
+        start, stop = 4, p.size - 2
+        if start >= stop:
+            return pitch
+
+        def shifted(offset):  # p[i + offset] for all i in [start, stop)
+            return p[start + offset:stop + offset]
+
+        # the silent samples stay as they are, i.e. 0 * 2 = 0
+        curr = shifted(0)
+        prev = shifted(-1)
+        cand = (curr != 0) & (self._are_close_arr(prev, shifted(-2)) &
+                              self._are_close_arr(shifted(-2), shifted(-3)) &
+                              self._are_close_arr(shifted(-3), shifted(-4)) &
+                              (((curr > midf0 * 1.8) &
+                                (self._are_close_arr(prev, curr / 2.) |
+                                 self._are_close_arr(prev, curr / 4.))) |
+                               ((curr < midf0 / 1.8) &
+                                (self._are_close_arr(prev, curr * 2) |
+                                 self._are_close_arr(prev, curr * 4)))))
+
+        def step(i):
+            if p[i] != 0 and self.are_close(p[i - 1], p[i - 2]) and \
+                    self.are_close(p[i - 2], p[i - 3]) and \
+                    self.are_close(p[i - 3], p[i - 4]):
+                if p[i] > (midf0 * 1.8):
+                    if self.are_close(p[i - 1], p[i] / 2.):
+                        p[i] /= 2.
+                        return True
+                    if self.are_close(p[i - 1], p[i] / 4.):
+                        p[i] /= 4.
+                        return True
+                elif p[i] < (midf0 / 1.8):
+                    if self.are_close(p[i - 1], p[i] * 2):
+                        p[i] *= 2.
+                        return True
+                    if self.are_close(p[i - 1], p[i] * 4):
+                        p[i] *= 4.
+                        return True
+            return False
+
+        self._sweep(cand, step, start, stop, self._oct_error_reach)
+
+        return pitch
+
+    @staticmethod
+    def remove_extreme_values(pitch):
+        pitch = np.asarray(pitch)
+        p = np.ascontiguousarray(pitch[:, 1])
+
+        pitch_max = np.max(p)
+        pitch_mean = np.mean(p)
+        pitch_std = np.std(p)
+
+        # the last pair of empty bins, which leaves more than 90% of the
+        # samples to the left
+        counts, edges = np.histogram(p, 100)
+        empty_pairs = (counts[:-1] == 0) & (counts[1:] == 0)
+        empty_pairs &= np.cumsum(counts)[:-1] > 0.9 * np.sum(counts)
+        if empty_pairs.any():
+            i = np.flatnonzero(empty_pairs)[-1]
+            pitch_max = (edges[i] + edges[i + 1]) / 2.
+
+        pitch_max_cand = max(pitch_mean * 4., pitch_mean + (2 * pitch_std))
+        pitch_max = min(pitch_max, pitch_max_cand)
+        pitch_min = pitch_mean / 4.
+
+        is_extreme = (p >= pitch_max) | (p <= pitch_min)
+        pitch[is_extreme, 1] = 0
+        pitch[is_extreme, 2] = 0
+
+        return pitch
+
+    def filter_noise_region(self, pitch):
+        pitch = np.asarray(pitch)
+        p = pitch[:, 1]
+        s = pitch[:, 2]
+        num_samples = p.size
+
+        def step_noise(j):
+            if not self.are_close(p[j - 2], p[j]) and \
+                    not self.are_close(p[j - 1], p[j]) and \
+                    not self.are_close(p[j + 1], p[j + 2]) and \
+                    not self.are_close(p[j + 1], p[j + 3]):
+                p[j] = 0
+                p[j + 1] = 0
+                return True
+            return False
+
+        def step_spike(i):
+            if not self.are_close(p[i - 1], p[i]) and \
+                    not self.are_close(p[i], p[i + 1]) and \
+                    not self.are_close(p[i + 1], p[i + 2]) and \
+                    not self.are_close(p[i - 1], p[i + 1]) and \
+                    not self.are_close(p[i], p[i + 2]) and \
+                    not self.are_close(p[i - 1], p[i + 2]):
+                p[i] = 0
+                s[i] = 0
+                p[i + 1] = 0
+                s[i + 2] = 0
+                return True
+            return False
+
+        def not_close(start, stop, off1, off2):
+            return ~self._are_close_arr(p[start + off1:stop + off1],
+                                        p[start + off2:stop + off2])
+
+        for i in range(3):
+            # the first three samples; "i - 1" wraps around to the last
+            # sample. The repetitions of this check in PitchFilter are
+            # idempotent, hence it is applied once
+            if num_samples > 3 and not self.are_close(p[i - 1], p[i]) and \
+                    self.are_close(p[i], p[i + 1]):
+                p[i] = 0
+                s[i] = 0
+
+            start, stop = 2, num_samples - 3
+            if start < stop:
+                cand = (not_close(start, stop, -2, 0) &
+                        not_close(start, stop, -1, 0) &
+                        not_close(start, stop, 1, 2) &
+                        not_close(start, stop, 1, 3))
+                self._sweep(cand, step_noise, start, stop, self._noise_reach)
+
+        start, stop = 1, num_samples - 2
+        if start < stop:
+            cand = (not_close(start, stop, -1, 0) &
+                    not_close(start, stop, 0, 1) &
+                    not_close(start, stop, 1, 2) &
+                    not_close(start, stop, -1, 1) &
+                    not_close(start, stop, 0, 2) &
+                    not_close(start, stop, -1, 2))
+            self._sweep(cand, step_spike, start, stop, self._noise_reach)
+
+        return pitch
+
+    def filter_chunks_by_energy(self, pitch):
+        pitch = np.array(pitch, dtype=float)
+        starts, ends = self._chunk_boundaries(pitch)
+        lens = ends - starts
+
+        longest = np.argmax(lens)
+        min_energy = (np.cumsum(pitch[starts[longest]:ends[longest], 2])[-1] /
+                      lens[longest]) / 6.
+
+        ave_energies = np.add.reduceat(pitch[:, 2], starts) / lens
+        is_filtered = (ave_energies != 0) & (
+            (lens <= self.min_chunk_size) | (ave_energies <= min_energy))
+
+        is_filtered = np.repeat(is_filtered, lens)
+        pitch[is_filtered, 1] = 0
+        pitch[is_filtered, 2] = 0
+
+        return pitch
+
+    def run(self, pitch):
+        """
+        Filters the pitch track. A PitchTrack input returns a new PitchTrack
+        with the same time stamps, the [time, pitch, salience] lists return
+        lists
+        """
+        pitch_track = pitch if isinstance(pitch, PitchTrack) else None
+        pitch = np.array(pitch, dtype=float)
+
+        pitch = self.correct_octave_errors_by_chunks(pitch)
+        pitch = self.remove_extreme_values(pitch)
+
+        # the reversed passes work on reversed views; the corrections are
+        # written to the pitch track in place
+        self.correct_jumps(pitch)
+        self.correct_jumps(pitch[::-1])
+
+        self.filter_noise_region(pitch)
+
+        self.correct_oct_error(pitch)
+        self.correct_oct_error(pitch[::-1])
+
+        pitch = self.correct_octave_errors_by_chunks(pitch)
+        pitch = self.filter_chunks_by_energy(pitch)
+
+        if pitch_track is not None:
+            return pitch_track.replace(hz=pitch[:, 1], salience=pitch[:, 2])
+        return pitch.tolist()
@@ -21,20 +21,52 @@
 # scores for the description and discovery of Ottoman-Turkish makam music.
 # PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
 
+import asyncio
 import configparser
 import os
+import signal
 import subprocess
+import threading
+import warnings
+import weakref
 
 from .io import IO
+from .mcrworker import McrWorkerError, McrWorkerPool
 
 
 class BinCaller:
-    def __init__(self):
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_concurrent_calls=None):
         self.mcr_filepath = IO.get_abspath_from_relpath_in_tomato(
             'config', 'mcr_path.cfg')
 
         self.env, self.sys_os = self.set_environment()
 
+        self._worker_pools = {}  # resident workers per binary path
+
+        # maximum number of binaries run at the same time by acall, None
+        # for the number of CPUs. Set it before the first call in an event
+        # loop
+        self.max_concurrent_calls = max_concurrent_calls
+        self._semaphores = weakref.WeakKeyDictionary()  # per event loop
+
+    @classmethod
+    def get_default(cls):
+        """
+        Returns the BinCaller shared by the analyzers and the converters. It
+        is created at the first call instead of the import of tomato, since
+        reading the MCR configuration touches the filesystem and fails, if
+        the MCR is not installed
+        :return: the shared BinCaller
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+
+            return cls._default
+
     def set_environment(self):
         config = configparser.SafeConfigParser()
         config.read(self.mcr_filepath)
@@ -61,6 +93,115 @@ class BinCaller:
                                 env=self.env)
         return proc.communicate()
 
+    async def acall(self, argv, timeout=None):
+        """
+        Calls a binary without blocking the event loop. At most
+        max_concurrent_calls binaries run at the same time; the other calls
+        wait for their turn
+        :param argv: list of the binary path and its arguments; no shell is
+                     involved
+        :param timeout: seconds to wait for the binary after it is started,
+                        None to wait forever. The binary is killed together
+                        with its child processes when the timeout expires
+        :return: (stdout, stderr) of the call in bytes
+        :raises subprocess.TimeoutExpired: if the timeout expires
+        """
+        async with self._get_semaphore():
+            # the binary starts a new process group, which is killed as a
+            # whole, e.g. with the MATLAB Runtime processes
+            proc = await asyncio.create_subprocess_exec(
+                *argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                env=self.env, start_new_session=True)
+            try:
+                return await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await self._kill_process_group(proc)
+                raise subprocess.TimeoutExpired(argv, timeout)
+            except asyncio.CancelledError:
+                await self._kill_process_group(proc)
+                raise
+
+    async def acall_binary(self, bin_path, args, timeout=None):
+        """
+        Asynchronous counterpart of call_binary, which always starts a new
+        process of the binary. See acall
+        """
+        return await self.acall([bin_path] + list(args), timeout=timeout)
+
+    def _get_semaphore(self):
+        loop = asyncio.get_event_loop()
+        try:
+            return self._semaphores[loop]
+        except KeyError:
+            max_calls = self.max_concurrent_calls or os.cpu_count() or 1
+            self._semaphores[loop] = asyncio.Semaphore(max_calls)
+            return self._semaphores[loop]
+
+    @staticmethod
+    async def _kill_process_group(proc):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:  # already exited
+            pass
+        await proc.wait()
+
+    def call_binary(self, bin_path, args):
+        """
+        Calls the binary with the arguments. The job is sent to a resident
+        worker of the binary, if they are started by start_workers. Otherwise,
+        or if the worker fails, the binary is called in a new process
+        :param bin_path: path of the binary
+        :param args: list of arguments
+        :return: (stdout, stderr) of the call as returned by the call method
+        """
+        pool = self._worker_pools.get(bin_path)
+        if pool is not None:
+            try:
+                return pool.run(args)
+            except McrWorkerError as err:
+                warnings.warn('{0:s}. Falling back to a one-shot call of {1:s}'
+                              .format(str(err), bin_path), RuntimeWarning,
+                              stacklevel=2)
+                if not pool.num_alive:
+                    self.stop_workers(bin_path)
+
+        callstr = ' '.join('"{0:s}"'.format(arg)
+                           for arg in [bin_path] + list(args))
+        return self.call([callstr])
+
+    def start_workers(self, bin_path, num_workers=1, worker_args=('--worker',),
+                      **kwargs):
+        """
+        Starts resident workers of a binary, which keep the MATLAB Runtime
+        loaded between the calls. See McrWorker for the job protocol
+        :param bin_path: path of the binary
+        :param num_workers: number of workers
+        :param worker_args: the arguments to start the binary in the worker
+                            mode
+        :param kwargs: the other parameters of McrWorkerPool
+        :return: True if the workers are started, False if the binary falls
+                 back to the one-shot calls
+        """
+        self.stop_workers(bin_path)
+        try:
+            self._worker_pools[bin_path] = McrWorkerPool(
+                [bin_path] + list(worker_args), num_workers=num_workers,
+                env=self.env, **kwargs)
+        except McrWorkerError as err:
+            warnings.warn('{0:s}. Using one-shot calls of {1:s}'.format(
+                str(err), bin_path), RuntimeWarning, stacklevel=2)
+            return False
+
+        return True
+
+    def stop_workers(self, bin_path=None):
+        bin_paths = list(self._worker_pools) if bin_path is None \
+            else [bin_path]
+        for bp in bin_paths:
+            pool = self._worker_pools.pop(bp, None)
+            if pool is not None:
+                pool.close()
+
     @staticmethod
     def _get_mcr_config(config, section_str):
         op_sys = config.get(section_str, 'sys_os')
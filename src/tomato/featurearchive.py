@@ -0,0 +1,225 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+import struct
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from .lazyimport import lazy_import
+
+json = lazy_import('json_tricks')  # pylint: disable-msg=C0103
+np = lazy_import('numpy')  # pylint: disable-msg=C0103
+
+
+class FeatureArchive(Mapping):
+    """
+    Binary storage of the features in a NPZ file. The numeric arrays with at
+    least min_array_size elements, e.g. the pitch tracks, the bins and
+    values of the pitch distributions and the note models, are stored as
+    (compressed) npy arrays. The rest of each feature is stored as JSON,
+    in which the arrays are replaced by references.
+
+    The features are read lazily: only the features, which are accessed,
+    are decoded. If the archive is written without compression, the arrays
+    can be memory-mapped instead of read into the memory:
+
+        FeatureArchive.write(features, 'features.npz', compress=False)
+        with FeatureArchive('features.npz', mmap=True) as archive:
+            pitch = archive['pitch_filtered']  # only this feature is read
+
+    The nested features, e.g. the summary of JointAnalyzer.summarize, can be
+    written with a larger depth. The top-level features are then groups,
+    i.e. mappings of features, which are also read lazily:
+
+        FeatureArchive.write(summary, 'summary.npz', depth=2)
+        pitch = FeatureArchive('summary.npz')['audio']['pitch']
+    """
+    min_array_size = 64
+    _meta_prefix = '__meta__/'
+
+    def __init__(self, filepath, mmap=False):
+        """
+        :param filepath: path of the NPZ file
+        :param mmap: memory-map the arrays stored without compression. The
+                     memory-mapped arrays are read-only
+        """
+        self.filepath = filepath
+        self.mmap = mmap
+
+        self._npz = np.load(filepath, allow_pickle=False)
+        self._names = [f[len(self._meta_prefix):] for f in self._npz.files
+                       if f.startswith(self._meta_prefix)]
+        self._features = {}
+        self._lock = threading.RLock()
+
+        self._prefix = ''  # the path of a group
+
+    @classmethod
+    def write(cls, features, filepath, compress=True, depth=1):
+        """
+        Writes the features to a NPZ file
+        :param features: dictionary of the features
+        :param filepath: path of the NPZ file
+        :param compress: compress the arrays. The arrays stored without
+                         compression can be memory-mapped by the reader
+        :param depth: number of the dictionary levels, which are stored as
+                      separately readable features
+        """
+        members = OrderedDict()
+        for name, feature in cls._flatten(features, depth):
+            meta = json.dumps(feature, allow_nan=True,
+                              extra_obj_encoders=[cls._get_encoder(
+                                  name, members)])
+            members[cls._meta_prefix + name] = np.frombuffer(
+                meta.encode('utf-8'), dtype=np.uint8)
+
+        save = np.savez_compressed if compress else np.savez
+        with open(filepath, 'wb') as f:  # savez would append ".npz"
+            save(f, **members)
+
+    @classmethod
+    def _flatten(cls, features, depth, prefix=''):
+        for name, feature in features.items():
+            if '/' in name:
+                raise ValueError('The feature names cannot contain "/".')
+
+            if depth > 1 and isinstance(feature, dict) and feature:
+                yield from cls._flatten(feature, depth - 1,
+                                        prefix + name + '/')
+            else:
+                yield prefix + name, feature
+
+    @classmethod
+    def _get_encoder(cls, name, members):
+        from .audio.pitchtrack import PitchTrack
+
+        def encode(obj):
+            if isinstance(obj, PitchTrack):
+                return {'__pitch_track__': {
+                    'hz': obj.hz, 'salience': obj.salience,
+                    'time': None if obj.has_implicit_time else obj.time,
+                    'hop_size': obj.hop_size, 'sample_rate': obj.sample_rate,
+                    'first_sample': obj.first_sample}}
+            if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biuf' \
+                    and obj.size >= cls.min_array_size:
+                key = '{0:s}/{1:d}'.format(name, len(members))
+                members[key] = obj
+                return {'__npz__': key}
+            return obj
+
+        return encode
+
+    def __getitem__(self, name):
+        path = self._prefix + name
+        with self._lock:
+            try:
+                return self._features[path]
+            except KeyError:
+                pass
+
+            if path in self._names:
+                feature = self._decode(path)
+            elif any(n.startswith(path + '/') for n in self._names):
+                feature = self._get_group(path)
+            else:
+                raise KeyError(name)
+
+            self._features[path] = feature
+            return feature
+
+    def __iter__(self):
+        names = OrderedDict()  # unique names in the stored order
+        for n in self._names:
+            if n.startswith(self._prefix):
+                names[n[len(self._prefix):].split('/')[0]] = None
+        return iter(names)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{0:s}({1:s})'.format(type(self).__name__, ', '.join(self))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Closes the file. The memory-mapped arrays stay readable
+        """
+        self._npz.close()
+
+    def _get_group(self, path):
+        group = object.__new__(type(self))
+        group.__dict__.update(self.__dict__)  # shares the file and the cache
+        group._prefix = path + '/'
+        return group
+
+    def _decode(self, path):
+        meta = self._npz[self._meta_prefix + path].tobytes().decode('utf-8')
+        return json.loads(meta, preserve_order=False,
+                          extra_obj_pairs_hooks=[self._decode_hook])
+
+    def _decode_hook(self, obj):
+        if '__npz__' in obj:
+            return self._load_array(obj['__npz__'])
+        if '__pitch_track__' in obj:
+            from .audio.pitchtrack import PitchTrack
+            return PitchTrack.from_arrays(**obj['__pitch_track__'])
+        return obj
+
+    def _load_array(self, key):
+        if self.mmap:
+            arr = self._memmap(key)
+            if arr is not None:
+                return arr
+        return self._npz[key]
+
+    def _memmap(self, key):
+        # the npy file of an uncompressed member is a contiguous block in
+        # the zip file; its data follows the local zip header and the npy
+        # header
+        info = self._npz.zip.getinfo(key + '.npy')
+        if info.compress_type != 0:  # not zipfile.ZIP_STORED
+            return None
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack('<HH', f.read(4))
+            f.seek(name_len + extra_len, 1)
+
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 \
+                if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(f)
+            offset = f.tell()
+
+        if dtype.hasobject or not np.prod(shape):
+            return None
+        return np.memmap(self.filepath, dtype=dtype, mode='r', shape=shape,
+                         order='F' if fortran_order else 'C', offset=offset)
@@ -0,0 +1,178 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from . import __version__
+
+
+class FeatureCache:
+    _extension = '.pkl'
+    _hash_block_size = 1 << 20  # bytes
+
+    def __init__(self, cache_dir, max_size=None):
+        """--------------------------------------------------------------------
+        On-disk cache of the features computed by the analyzers. The entries
+        are addressed by a key computed from the content of the input file,
+        the name and the parameters of the step computing the feature and the
+        keys of the features the step depends on (see make_key() method).
+        -----------------------------------------------------------------------
+        cache_dir    : The folder to store the cached features
+        max_size     : The maximum total size of the cached features in
+                       bytes. The least recently used features are removed,
+                       when the size is exceeded. None for no limit
+        --------------------------------------------------------------------"""
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        self._size = None  # computed from the folder on the first write
+        self._file_hashes = {}
+
+    def hash_file(self, filepath):
+        """--------------------------------------------------------------------
+        Returns the SHA-1 of the file content. The hash is memoized for the
+        file as long as its size and modification time do not change.
+        --------------------------------------------------------------------"""
+        stat = os.stat(filepath)
+        memo_key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._file_hashes:
+            sha = hashlib.sha1()
+            with open(filepath, 'rb') as f:
+                for block in iter(lambda: f.read(self._hash_block_size), b''):
+                    sha.update(block)
+            self._file_hashes[memo_key] = sha.hexdigest()
+
+        return self._file_hashes[memo_key]
+
+    @staticmethod
+    def hash_object(obj):
+        # used for the features given by the user instead of computed
+        return hashlib.sha1(pickle.dumps(
+            obj, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+
+    @staticmethod
+    def make_key(step, params=None, upstream_keys=()):
+        """--------------------------------------------------------------------
+        Returns the key of a feature
+        -----------------------------------------------------------------------
+        step           : Name of the step computing the feature
+        params         : The parameters of the step
+        upstream_keys  : The keys of the inputs of the step, e.g. the hash of
+                         the audio file or the key of another feature
+        --------------------------------------------------------------------"""
+        key_str = json.dumps(
+            {'step': step, 'params': params,
+             'upstream': list(upstream_keys), 'version': __version__},
+            sort_keys=True, default=repr)
+
+        return hashlib.sha1(key_str.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self._extension)
+
+    def get(self, key):
+        """--------------------------------------------------------------------
+        Returns the cached feature. Raises KeyError if the feature is not in
+        the cache.
+        --------------------------------------------------------------------"""
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                feature = pickle.load(f)
+        except (IOError, EOFError, pickle.UnpicklingError) as err:
+            raise KeyError(key) from err
+
+        try:  # mark as recently used
+            os.utime(path, None)
+        except OSError:  # removed by another process in the meantime
+            pass
+
+        return feature
+
+    def set(self, key, feature):
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temporary file first so that other processes never read
+        # a partially written feature
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(feature, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        if self.max_size is not None:
+            if self._size is None:
+                self._size = self.get_size()
+            else:
+                self._size += os.path.getsize(path)
+
+            if self._size > self.max_size:
+                self.evict()
+
+    def _get_entries(self):
+        entries = []
+        for path, _, files in os.walk(self.cache_dir):
+            for f in files:
+                if f.endswith(self._extension):
+                    try:
+                        stat = os.stat(os.path.join(path, f))
+                        entries.append((stat.st_mtime, stat.st_size,
+                                        os.path.join(path, f)))
+                    except OSError:  # removed by another process
+                        pass
+        return entries
+
+    def get_size(self):
+        return sum(size for _, size, _ in self._get_entries())
+
+    def evict(self, max_size=None):
+        """--------------------------------------------------------------------
+        Removes the least recently used features until the total size is
+        below max_size (defaults to the max_size of the cache)
+        --------------------------------------------------------------------"""
+        if max_size is None:
+            max_size = self.max_size
+
+        entries = sorted(self._get_entries())
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in entries:
+            if size <= max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:  # removed by another process
+                pass
+            size -= entry_size
+
+        self._size = size
+
+    def clear(self):
+        self.evict(max_size=0)
@@ -29,7 +29,11 @@ import subprocess
 import tempfile
 import unicodedata
 
-import json_tricks as json
+from .featurearchive import FeatureArchive
+from .lazyimport import lazy_import
+from .musicdata import MusicData
+
+json = lazy_import('json_tricks')  # pylint: disable-msg=C0103
 
 
 class IO:
@@ -87,9 +91,8 @@ class IO:
 
     @staticmethod
     def load_music_data(attrstr):
-        attrfile = IO.get_abspath_from_relpath_in_tomato(
-            'music_data', attrstr + '.json')
-        return json.load(open(attrfile))
+        # modifiable copy of the table. Use MusicData.get for read-only access
+        return MusicData.thaw(MusicData.get(attrstr))
 
     @staticmethod
     def dict_keys_to_snake_case(camel_case_dict):
@@ -133,12 +136,39 @@ class IO:
     @staticmethod
     def to_json(features, filepath=None):
         if filepath is None:
-            return json.dumps(features, indent=2, allow_nan=True)
+            return json.dumps(features, indent=2, allow_nan=True,
+                              extra_obj_encoders=[IO._encode_pitch_track])
 
         return json.dump(features,
                          open(filepath, 'w'),
                          indent=2,
-                         allow_nan=True)
+                         allow_nan=True,
+                         extra_obj_encoders=[IO._encode_pitch_track])
+
+    @staticmethod
+    def _encode_pitch_track(obj):
+        # the pitch tracks are written in the legacy [time, pitch, salience]
+        # list format
+        from .audio.pitchtrack import PitchTrack
+        if isinstance(obj, PitchTrack):
+            return obj.tolist()
+        return obj
+
+    @staticmethod
+    def to_npz(features, filepath, compress=True, depth=1):
+        """
+        Writes the features in the binary format, see FeatureArchive
+        """
+        FeatureArchive.write(features, filepath, compress=compress,
+                             depth=depth)
+
+    @staticmethod
+    def from_npz(filepath, mmap=False):
+        """
+        Returns a FeatureArchive, a mapping which reads the features at
+        their first access
+        """
+        return FeatureArchive(filepath, mmap=mmap)
 
     @staticmethod
     def from_pickle(input_str):
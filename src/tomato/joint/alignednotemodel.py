@@ -24,16 +24,19 @@ import json
 import logging
 from copy import deepcopy
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from ..audio.pitchdistribution import PitchDistribution
+from ..audio.pitchtrack import PitchTrack
 from ..converter import Converter
-from ..io import IO
+from ..lazyimport import lazy_import
+from ..musicdata import MusicData
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.INFO)
 
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+
 
 class AlignedNoteModel:
     def __init__(self, kernel_width=7.5, step_size=7.5, pitch_threshold=50):
@@ -43,9 +46,10 @@ class AlignedNoteModel:
         # pitches to be considered close. Used in stable pitch computation
 
     def get_models(self, pitch, alignednotes, tonic_symbol):
-        note_dict = IO.load_music_data('note')
+        note_cents = MusicData.get_note_cents()
 
-        pitch = np.array(pitch)
+        pitch_track = PitchTrack.from_pitch(pitch)  # time index of the notes
+        pitch = pitch_track.to_array()
         alignednotes_ext = deepcopy(alignednotes)
 
         note_names = set(an['Symbol'] for an in alignednotes_ext)
@@ -55,16 +59,15 @@ class AlignedNoteModel:
                 note_models[nn] = {
                     'notes': [], 'distribution': [], 'stable_pitch': [],
                     'performed_interval': [], 'theoretical_interval': {
-                        'Value': (note_dict[nn]['Value'] -
-                                  note_dict[tonic_symbol]['Value']),
+                        'Value': note_cents[nn] - note_cents[tonic_symbol],
                         'Unit': 'cent'}, 'theoretical_pitch': []}
             except KeyError:
                 logger.warning(
-                    "The note {0:s} is not in the note_dict.".format(nn))
+                    "The note {0:s} is not in the note table.".format(nn))
 
         # compute note trajectories and add to each model
         self._distribute_pitch_trajectories(alignednotes_ext, note_models,
-                                            pitch)
+                                            pitch, pitch_track)
 
         # remove models without any aligned note
         self._remove_unaligned_notes(note_models)
@@ -106,11 +109,19 @@ class AlignedNoteModel:
         return note_models, recording_distribution, newtonic
 
     def _get_note_histogram(self, note_models, temp_tonic_freq):
-        for nm in note_models.values():
-            peak_freq, distribution = self._get_stablepitch_distribution(
-                [nn['PitchTrajectory'][:, 1] for nn in nm['notes']],
-                nm['theoretical_interval']['Value'],
-                ref_freq=temp_tonic_freq)
+        # the distributions of all note models are computed at once on a
+        # cent grid anchored at the temporary tonic
+        distributions = PitchDistribution.from_hz_pitches(
+            [np.hstack([nn['PitchTrajectory'][:, 1] for nn in nm['notes']])
+             for nm in note_models.values()], ref_freq=temp_tonic_freq,
+            kernel_width=self.kernel_width, step_size=self.step_size,
+            norm_type=None)
+
+        for nm, distribution in zip(note_models.values(), distributions):
+            peak_freq = self._get_stable_pitch(
+                distribution, nm['theoretical_interval']['Value'],
+                temp_tonic_freq)
+            distribution.cent_to_hz()
 
             nm['stable_pitch'] = {'Value': peak_freq, 'Unit': 'Hz'}
             nm['distribution'] = distribution
@@ -134,12 +145,15 @@ class AlignedNoteModel:
                 note_models.pop(key, None)
 
     @staticmethod
-    def _distribute_pitch_trajectories(alignednotes_ext, note_models, pitch):
+    def _distribute_pitch_trajectories(alignednotes_ext, note_models, pitch,
+                                       pitch_track):
         for an in alignednotes_ext:
             if not an['Interval'][0] == an['Interval'][1]:  # not aligned
-                trajectory = np.vstack(
-                    p for p in pitch
-                    if an['Interval'][0] <= p[0] <= an['Interval'][1])
+                # the samples in the closed interval of the note; the
+                # trajectory is a view of the pitch matrix
+                start = pitch_track.search_time(an['Interval'][0], 'left')
+                end = pitch_track.search_time(an['Interval'][1], 'right')
+                trajectory = pitch[start:end]
                 notetemp = dict(an)
                 notetemp['PitchTrajectory'] = trajectory
 
@@ -151,7 +165,7 @@ class AlignedNoteModel:
 
     def _get_stablepitch_distribution(self, note_trajectories,
                                       theoretical_interval, ref_freq=None):
-        temp_pitch_vals = np.hstack(nn for nn in note_trajectories)
+        temp_pitch_vals = np.hstack(note_trajectories)
 
         # useful to keep the bins coinciding with a desired value,
         # e.g. tonic frequency
@@ -163,6 +177,16 @@ class AlignedNoteModel:
             kernel_width=self.kernel_width, step_size=self.step_size,
             norm_type=None)
 
+        peak_freq = self._get_stable_pitch(distribution, theoretical_interval,
+                                           ref_freq)
+
+        # convert to hz scale
+        distribution.cent_to_hz()
+
+        return peak_freq, distribution
+
+    def _get_stable_pitch(self, distribution, theoretical_interval,
+                          ref_freq):
         # get the stable pitch as the highest peaks among the peaks close to
         # the theoretical pitch TODO
         peaks = distribution.detect_peaks()
@@ -183,10 +207,7 @@ class AlignedNoteModel:
             # misalignment
             peak_freq = None
 
-        # convert to hz scale
-        distribution.cent_to_hz()
-
-        return peak_freq, distribution
+        return peak_freq
 
     @staticmethod
     def _get_median_pitch(pitch):
@@ -23,9 +23,13 @@
 
 import copy
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+from ..audio.pitchtrack import PitchTrack
+from ..lazyimport import lazy_import
+
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+
 
 class AlignedPitchFilter:
     def __init__(self):
@@ -50,9 +54,8 @@ class AlignedPitchFilter:
             notes_corrected, pitch_corrected[:, 0])
 
         # octave correction
-        for i, sp in enumerate(synth_pitch[:, 1]):
-            pitch_corrected[i][1] = self._move_to_closest_octave(
-                pitch_corrected[i][1], sp)
+        pitch_corrected[:, 1] = self._move_to_closest_octave(
+            pitch_corrected[:, 1], synth_pitch[:, 1])
 
         self._get_pitch_trajectories(notes_corrected, pitch_corrected)
 
@@ -70,112 +73,103 @@ class AlignedPitchFilter:
 
     @staticmethod
     def _get_pitch_trajectories(notes_corrected, pitch_corrected):
+        # the samples of each note are found by binary search on the time
+        # stamps instead of scanning the whole track
+        pitch_track = PitchTrack.from_arrays(pitch_corrected[:, 1],
+                                             time=pitch_corrected[:, 0])
         for nc in notes_corrected:
-            # TODO: Fix FutureWarning: arrays to stack must be passed as a
-            # "sequence" type such as list or tuple. Support for non-sequence
-            # iterables such as generators is deprecated as of NumPy 1.16 and
-            # will raise an error in the future.
-            trajectory = np.vstack(
-                p[1] for p in pitch_corrected
-                if nc['Interval'][0] <= p[0] <= nc['Interval'][1])
+            trajectory = pitch_track.slice_time(
+                nc['Interval'][0], nc['Interval'][1], include_end=True).hz
             nc['PerformedPitch']['Value'] = np.median(trajectory).tolist()
 
     def _notes_to_synth_pitch(self, notes, time_stamps):
-        synth_pitch = np.array([0] * len(time_stamps))
-
-        for i, _ in enumerate(notes):
-            prevlabel = ([] if i == 0 else
-                         notes[i - 1]['Label'].split('--')[0])
-            label = notes[i]['Label'].split('--')[0]
-            nextlabel = ([] if i == len(notes) - 1 else
-                         notes[i + 1]['Label'].split('--')[0])
-
-            # let the synthetic pitch continue in the boundaries a little bit
-            # more
-            startidx = self._preinterpolate_synth(
-                i, label, notes, prevlabel, time_stamps)
-            self._postinterpolate_synth(i, label, nextlabel, notes, startidx,
-                                        synth_pitch, time_stamps)
+        time_stamps = np.ascontiguousarray(time_stamps)
+        synth_pitch = np.zeros(len(time_stamps), dtype=int)
+
+        if notes:
+            starts, ends = self._get_synth_boundaries(notes, time_stamps)
+
+            # the later notes overwrite the earlier ones, if they overlap
+            for note, start_idx, end_idx in zip(notes, starts, ends):
+                synth_pitch[start_idx:end_idx + 1] = \
+                    note['TheoreticalPitch']['Value']
 
         # add time_stamps
         synth_pitch = np.transpose(np.vstack((time_stamps, synth_pitch)))
 
         return synth_pitch
 
-    def _postinterpolate_synth(self, i, label, next_label, notes, start_idx,
-                               synth_pitch, time_stamps):
-
-        if not next_label:
-            # post interpolation end time on the last note
-            endidx = self._find_closest_sample_idx(
-                notes[i]['Interval'][1] + self.max_boundary_tol,
-                time_stamps)
-        elif not label == next_label:
-            # post interpolation end time on a group end
-            nextstartidx = self._find_closest_sample_idx(
-                notes[i + 1]['Interval'][0], time_stamps)
-            endidx = self._find_closest_sample_idx(
-                notes[i]['Interval'][1] + self.max_boundary_tol,
-                time_stamps[:nextstartidx])
-        else:
-            # post interpolation within a group
-            nextstartidx = self._find_closest_sample_idx(
-                notes[i + 1]['Interval'][0], time_stamps)
-            endidx = nextstartidx - 1
-        synth_pitch[start_idx:endidx + 1] = \
-            notes[i]['TheoreticalPitch']['Value']
-
-    def _preinterpolate_synth(self, i, label, notes, prevlabel, time_stamps):
-        # pre interpolation start time on the first note
-        if not prevlabel:
-            startidx = self._find_closest_sample_idx(
-                notes[i]['Interval'][0] - self.max_boundary_tol,
-                time_stamps)
-        elif not label == prevlabel:
-            # post interpolation start time on a group start
-
-            # recalculate the end time of the previous
-            tempstartidx = self._find_closest_sample_idx(
-                notes[i]['Interval'][0], time_stamps)
-            prevendidx = self._find_closest_sample_idx(
-                notes[i - 1]['Interval'][1] + self.max_boundary_tol,
-                time_stamps[:tempstartidx])
-
-            startidx = prevendidx + self._find_closest_sample_idx(
-                notes[i]['Interval'][0] - self.max_boundary_tol,
-                time_stamps[prevendidx:]) + 1
-        else:  # no pre interpolation
-            startidx = self._find_closest_sample_idx(
-                notes[i]['Interval'][0], time_stamps)
-        return startidx
-
-    @staticmethod
-    def _find_closest_sample_idx(val, sample_vals):
-        return np.argmin(abs(sample_vals - val))
-
-    @classmethod
-    def _move_to_closest_octave(cls, pp, sp):
-        minpp = pp
-        if not (pp in [0, np.nan] or sp in [0, np.nan]):
-            cent_diff = cls._hz2cent(pp, sp)
-            octave_cands = [cent_diff, cent_diff - 1200]
-            cand_dist = [abs(oc) for oc in octave_cands]
-            closest_cent_diff = octave_cands[cand_dist.index(min(cand_dist))]
-
-            minpp = cls._cent2hz(closest_cent_diff, sp)
-
-        return minpp
+    def _get_synth_boundaries(self, notes, time_stamps):
+        # the synthetic pitch of a note continues a little bit more at the
+        # boundaries of the groups of notes with the same label, i.e. by
+        # max_boundary_tol. All boundaries are found at once
+        labels = [n['Label'].split('--')[0] for n in notes]
+        prev_labels = [[]] + labels[:-1]
+        next_labels = labels[1:] + [[]]
+
+        note_starts = np.array([n['Interval'][0] for n in notes], dtype=float)
+        note_ends = np.array([n['Interval'][1] for n in notes], dtype=float)
+
+        start_idx = self._find_closest_sample_idx(note_starts, time_stamps)
+        start_tol_idx = self._find_closest_sample_idx(
+            note_starts - self.max_boundary_tol, time_stamps)
+        end_tol_idx = self._find_closest_sample_idx(
+            note_ends + self.max_boundary_tol, time_stamps)
+        next_start_idx = np.append(start_idx[1:], 0)
+
+        # the group end is searched before the start of the next note
+        group_end_idx = np.minimum(end_tol_idx, next_start_idx - 1)
+        ends = np.where(
+            [not nl for nl in next_labels], end_tol_idx, np.where(
+                [not la == nl for la, nl in zip(labels, next_labels)],
+                group_end_idx, next_start_idx - 1))
+
+        # the group start is searched after the end of the previous group
+        prev_group_end_idx = np.append(0, group_end_idx[:-1])
+        starts = np.where(
+            [not pl for pl in prev_labels], start_tol_idx, np.where(
+                [not la == pl for la, pl in zip(labels, prev_labels)],
+                np.maximum(start_tol_idx, prev_group_end_idx) + 1,
+                start_idx))
+
+        return starts, ends
 
     @staticmethod
-    def _cent2hz(cent_val, ref_hz):
-        try:
-            return ref_hz * 2 ** (cent_val / 1200.0)
-        except TypeError:  # _NaN_; rest
-            return None
+    def _find_closest_sample_idx(vals, sample_vals):
+        """
+        Finds the index of the closest sample to each value, the first one
+        if two samples are equally close, by binary search
+        :param vals: 1-D array of values
+        :param sample_vals: monotonically increasing sample values
+        :return: 1-D array of indices
+        """
+        if len(sample_vals) < 2:
+            return np.zeros(len(vals), dtype=int)
+
+        idx = np.clip(np.searchsorted(sample_vals, vals), 1,
+                      len(sample_vals) - 1)
+        is_prev_closer = (abs(sample_vals[idx - 1] - vals) <=
+                          abs(sample_vals[idx] - vals))
+
+        return idx - is_prev_closer
 
     @staticmethod
-    def _hz2cent(val, ref_hz):
-        return 1200.0 * np.log2(val / ref_hz)
+    def _move_to_closest_octave(pitch_vals, synth_vals):
+        # moves the pitch to the octave below, if it is closer to the
+        # synthetic pitch. The zero pitch (silence) and synthetic pitch
+        # (rest or unaligned) are kept
+        pitch_vals = np.array(pitch_vals, dtype=float)
+        is_voiced = (pitch_vals != 0) & (synth_vals != 0)
+        pp = pitch_vals[is_voiced]
+        sp = synth_vals[is_voiced]
+
+        cent_diff = 1200.0 * np.log2(pp / sp)
+        closest_cent_diff = np.where(
+            abs(cent_diff) <= abs(cent_diff - 1200), cent_diff,
+            cent_diff - 1200)
+        pitch_vals[is_voiced] = sp * 2 ** (closest_cent_diff / 1200.0)
+
+        return pitch_vals
 
     @staticmethod
     def _decompose_into_chunks(pitch, bottom_limit=0.7, upper_limit=1.3):
@@ -0,0 +1,456 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+import bisect
+from collections import OrderedDict
+
+import numpy as np
+
+from ..audio.pitchtrack import PitchTrack
+from ..musicdata import MusicData
+
+
+class AudioScoreAligner:
+    """
+    Aligns the notes of a SymbTr-txt score to the predominant melody of an
+    audio recording in-process, as an alternative to the MATLAB
+    alignAudioScore binary. The outputs have the format of the binary.
+
+    The score and the recording are compared as sequences of frames, which
+    carry the pitch in cents with respect to the tonic; the rests and the
+    unvoiced frames are NaN. First, each section of the score is searched
+    in the whole recording by subsequence DTW on coarse frames, and the best
+    set of non-overlapping section links is selected. Then the notes of each
+    link are aligned by DTW on fine frames, only within a band around the
+    path of the link. The DTW steps (1, 1), (1, 2) and (2, 1) let the
+    performance be twice slower or faster than the score-informed tempo.
+    """
+    _section_keys = ['name', 'slug', 'start_note', 'end_note',
+                     'melodic_structure', 'lyrics_structure']
+
+    def __init__(self, frame_dur=0.05, coarse_factor=4, band_dur=1.0,
+                 max_cent_distance=100.0, unvoiced_cost=0.5,
+                 max_link_distance=0.4):
+        self.frame_dur = frame_dur  # seconds, resolution of the note times
+        self.coarse_factor = coarse_factor  # number of frames merged in
+        # section linking
+        self.band_dur = band_dur  # seconds, the notes are searched at most
+        # this far from the path of the section link
+        self.max_cent_distance = max_cent_distance  # pitch distance with the
+        # maximum cost, 1. The octave errors are not penalized
+        self.unvoiced_cost = unvoiced_cost  # cost of a rest against a voiced
+        # frame or a note against an unvoiced frame
+        self.max_link_distance = max_link_distance  # maximum average cost of
+        # a section link
+
+    def align(self, score, sections, pitch, tonic, tempo=None):
+        """
+        Aligns the score to the audio recording
+        :param score: SymbTr-txt score as read by TxtReader
+        :param sections: sections of the score as extracted by
+                         SectionExtractor. The whole score is treated as a
+                         single section, if the list is empty or None
+        :param pitch: predominant melody of the recording; PitchTrack or the
+                      matrix of time stamps, Hz values (and salience)
+        :param tonic: tonic of the recording; dict with the "value" in Hz
+                      and the note "symbol"
+        :param tempo: score-informed tempo; dict with the "relative" tempo.
+                      If None, the recording is assumed to be performed in
+                      the tempo of the score
+        :return: the aligned sections, the aligned notes, the section links
+                 and the section candidates
+        """
+        tonic_freq = float(tonic['value'])
+        rel_tempo = 1.0 if tempo is None else float(
+            tempo['relative']['value'])
+
+        pitch_track = PitchTrack.from_pitch(pitch)
+        sections, section_notes, candidates, selected = self._link_sections(
+            score, sections, pitch_track, tonic, rel_tempo)
+        audio_cents = self._get_audio_frames(
+            pitch_track, tonic_freq, self.frame_dur)
+
+        section_candidates = [
+            self._to_link(sections[sec_idx], c['time'], c['distance'])
+            for c in candidates for sec_idx in c['sections']]
+
+        # align the notes in each section link. A link of repeated sections
+        # is assigned to the first repetition after the previous link in the
+        # score order
+        section_links = []
+        aligned_links = []
+        aligned_notes = []
+        sec_idx = -1
+        for c in selected:
+            sec_idx = next((s for s in candidates[c]['sections']
+                            if s > sec_idx), candidates[c]['sections'][0])
+            section = sections[sec_idx]
+            notes = section_notes[sec_idx]
+            section_links.append(self._to_link(
+                section, candidates[c]['time'], candidates[c]['distance']))
+
+            temp_out = self._align_notes(
+                notes, candidates[c]['rows'], candidates[c]['cols'],
+                audio_cents)
+            if temp_out is None:  # no path in the band
+                continue
+            starts, ends, distance = temp_out
+
+            aligned_links.append(self._to_link(
+                section, [starts[0], ends[-1]], distance))
+            label = '{0:s}--{1:d}'.format(section['slug'], len(aligned_links))
+            aligned_notes += self._to_notes(
+                score, notes, starts, ends, tonic_freq, label)
+
+        return aligned_links, aligned_notes, section_links, section_candidates
+
+    def estimate_relative_tempo(self, score, sections, pitch, tonic):
+        """
+        Estimates the tempo of the performance relative to the score tempo
+        from the slopes of the section links, which are searched in the
+        score tempo
+        :param score: SymbTr-txt score as read by TxtReader
+        :param sections: sections of the score, see align
+        :param pitch: predominant melody of the recording, see align
+        :param tonic: tonic of the recording, see align
+        :return: the relative tempo, e.g. 1.1 if the performance is 10%
+                 faster than the score
+        """
+        _, _, candidates, selected = self._link_sections(
+            score, sections, PitchTrack.from_pitch(pitch), tonic, 1.0)
+
+        num_score_frames = sum(candidates[c]['rows'][-1] + 1
+                               for c in selected)
+        num_audio_frames = sum(candidates[c]['cols'][-1] -
+                               candidates[c]['cols'][0] + 1
+                               for c in selected)
+
+        return num_score_frames / float(num_audio_frames)
+
+    def _link_sections(self, score, sections, pitch_track, tonic, rel_tempo):
+        coarse_dur = self.frame_dur * self.coarse_factor
+        coarse_cents = self._get_audio_frames(
+            pitch_track, float(tonic['value']), coarse_dur)
+
+        sections = self._get_sections(score, sections)
+        section_notes = [self._get_section_notes(
+            score, sec, tonic['symbol'], rel_tempo) for sec in sections]
+
+        candidates = self._get_link_candidates(
+            section_notes, coarse_cents, coarse_dur)
+        if not candidates:
+            raise RuntimeError("Audio score alignment is not successful. No "
+                               "section is linked to the recording.")
+        selected = self._select_links(candidates, tol=self.band_dur)
+
+        return sections, section_notes, candidates, selected
+
+    @staticmethod
+    def _get_sections(score, sections):
+        if sections:
+            return sections
+
+        return [{'name': 'Score', 'slug': 'score',
+                 'start_note': score['index'][0],
+                 'end_note': score['index'][-1]}]
+
+    @staticmethod
+    def _get_section_notes(score, section, tonic_symbol, rel_tempo):
+        # the rows of the notes (and the rests) in the section, the control
+        # rows, e.g. the usul changes, are skipped
+        start = score['index'].index(section['start_note'])
+        end = score['index'].index(section['end_note'])
+        rows = [ii for ii in range(start, end + 1)
+                if score['code'][ii] not in range(50, 57)]
+
+        note_cents = MusicData.get_note_cents()
+        tonic_cent = note_cents[tonic_symbol]
+        cents = np.array([note_cents.get(score['noteAE'][ii], np.nan)
+                          for ii in rows], dtype=float) - tonic_cent
+
+        durs = np.array([score['duration'][ii] for ii in rows],
+                        dtype=float) * 0.001 / rel_tempo  # seconds
+
+        return {'rows': rows, 'cents': cents, 'durs': durs}
+
+    @staticmethod
+    def _synth_frames(notes, frame_dur):
+        # the pitch of the notes sounding in the middle of the frames, and
+        # the positions of the notes. The grace notes (zero duration) do not
+        # sound in any frame
+        note_ends = np.cumsum(notes['durs'])
+        num_frames = max(int(round(note_ends[-1] / frame_dur)), 1)
+        frame_centers = (np.arange(num_frames) + 0.5) * frame_dur
+
+        note_pos = np.minimum(np.searchsorted(
+            note_ends, frame_centers, side='right'), len(note_ends) - 1)
+
+        return notes['cents'][note_pos], note_pos
+
+    @staticmethod
+    def _get_audio_frames(pitch_track, tonic_freq, frame_dur):
+        # the average pitch of the voiced samples in each frame. The frames
+        # with more unvoiced than voiced samples are unvoiced
+        frame_idx = (pitch_track.time / frame_dur).astype(int)
+        num_frames = frame_idx[-1] + 1
+        valid = pitch_track.valid
+
+        num_samples = np.bincount(frame_idx, minlength=num_frames)
+        num_voiced = np.bincount(frame_idx[valid], minlength=num_frames)
+        cent_sums = np.bincount(
+            frame_idx[valid], weights=pitch_track.get_valid_cents(tonic_freq),
+            minlength=num_frames)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cents = cent_sums / num_voiced
+        cents[num_voiced * 2 < num_samples] = np.nan
+
+        return cents
+
+    def _get_cost(self, score_cents, audio_cents):
+        # octave-wrapped pitch distances of the score frames (rows) and the
+        # audio frames (columns)
+        with np.errstate(invalid='ignore'):
+            dist = np.abs(score_cents[:, None] - audio_cents[None, :]) % 1200
+            cost = np.minimum(np.minimum(dist, 1200 - dist) /
+                              self.max_cent_distance, 1.0)
+
+        score_silent = np.isnan(score_cents)[:, None]
+        audio_silent = np.isnan(audio_cents)[None, :]
+        return np.where(score_silent | audio_silent, self.unvoiced_cost *
+                        (score_silent != audio_silent), cost)
+
+    def _subsequence_dtw(self, score_cents, audio_cents, lo=None, hi=None):
+        """
+        Subsequence DTW of the score frames (rows) in the audio frames
+        (columns) with the steps (1, 1), (1, 2) and (2, 1). The path starts
+        at any column of the first row and ends at any column of the last
+        row. The (2, 1) step adds the cost of the skipped row as well, so
+        every path sums a cost per row and compressing the score is not
+        favoured.
+
+        The costs and the accumulated costs are computed a row at a time
+        and only in the band of the row. Only the steps are stored, so the
+        memory grows with the area of the band.
+        :param score_cents: pitch of the score frames
+        :param audio_cents: pitch of the audio frames
+        :param lo: first column of the band in each row, optional
+        :param hi: end (exclusive) of the band in each row, optional
+        :return: the accumulated costs in the last row and the steps taken
+                 to each cell in the band (index of the step above)
+        """
+        num_rows, num_cols = len(score_cents), len(audio_cents)
+        if lo is None:
+            lo = np.zeros(num_rows, dtype=int)
+            hi = np.full(num_rows, num_cols)
+        steps = np.zeros((num_rows, max(np.max(hi - lo), 1)), dtype=np.int8)
+
+        # the accumulated costs of the last three rows; column j of the
+        # audio is column j + 2, the first two columns are the padding for
+        # the steps from outside
+        acc = np.full((3, num_cols + 2), np.inf)
+        acc[0, lo[0] + 2:hi[0] + 2] = self._get_cost(
+            score_cents[:1], audio_cents[lo[0]:hi[0]])[0]
+        for ii in range(1, num_rows):
+            j0, j1 = lo[ii], hi[ii]
+            cur, prev, prev2 = (acc[ii % 3], acc[(ii - 1) % 3],
+                                acc[(ii - 2) % 3])  # prev2 is inf in row 1
+            costs = self._get_cost(score_cents[ii - 1:ii + 1],
+                                   audio_cents[j0:j1])
+
+            candidates = np.vstack((prev[j0 + 1:j1 + 1], prev[j0:j1],
+                                    prev2[j0 + 1:j1 + 1] + costs[0]))
+            step = np.argmin(candidates, axis=0)
+
+            if ii > 2:  # clear the band of the row three rows before
+                cur[lo[ii - 3] + 2:hi[ii - 3] + 2] = np.inf
+            cur[j0 + 2:j1 + 2] = costs[1] + \
+                candidates[step, np.arange(j1 - j0)]
+            steps[ii, :j1 - j0] = step
+
+        return acc[(num_rows - 1) % 3, 2:], steps
+
+    @staticmethod
+    def _backtrack(steps, lo, end_col):
+        row, col = steps.shape[0] - 1, end_col
+        rows, cols = [row], [col]
+        while row > 0:
+            step = steps[row, col - lo[row]]
+            row -= 2 if step == 2 else 1
+            col -= 2 if step == 1 else 1
+            rows.append(row)
+            cols.append(col)
+
+        return np.array(rows[::-1]), np.array(cols[::-1])
+
+    def _get_link_candidates(self, section_notes, audio_cents, frame_dur):
+        # the sections with the same melody, e.g. the repetitions, are
+        # searched only once and their links are shared
+        melody_sections = OrderedDict()
+        melodies = {}
+        for sec_idx, notes in enumerate(section_notes):
+            if not notes['durs'].sum() > 0:
+                continue
+            frames, _ = self._synth_frames(notes, frame_dur)
+            melody_sections.setdefault(frames.tobytes(), []).append(sec_idx)
+            melodies[frames.tobytes()] = frames
+
+        candidates = []
+        for melody_key, sec_idxs in melody_sections.items():
+            for rows, cols, distance in self._search_section(
+                    melodies[melody_key], audio_cents):
+                candidates.append({
+                    'sections': sec_idxs, 'rows': rows, 'cols': cols,
+                    'time': [cols[0] * frame_dur, (cols[-1] + 1) * frame_dur],
+                    'distance': distance})
+
+        return candidates
+
+    def _search_section(self, section_cents, audio_cents):
+        # the paths ending with the lowest average cost, which are at least
+        # half a section apart from each other
+        last_acc, steps = self._subsequence_dtw(section_cents, audio_cents)
+        distances = last_acc / len(section_cents)
+
+        min_gap = max(len(section_cents) // 2, 1)
+        suppressed = np.zeros(len(distances), dtype=bool)
+        links = []
+        for end_col in np.argsort(distances, kind='stable'):
+            if not distances[end_col] <= self.max_link_distance:
+                break
+            if suppressed[end_col]:
+                continue
+            suppressed[max(end_col - min_gap, 0):end_col + min_gap + 1] = True
+
+            rows, cols = self._backtrack(
+                steps, np.zeros(len(section_cents), dtype=int), end_col)
+            links.append((rows, cols, float(distances[end_col])))
+
+        return links
+
+    def _select_links(self, candidates, tol=0.0):
+        """
+        Selects the non-overlapping section links, which cover the recording
+        best, weighting the duration of each link by its similarity
+        (weighted interval scheduling)
+        :param candidates: the section candidates
+        :param tol: the overlap allowed between two links in seconds
+        :return: indices of the selected candidates in time order
+        """
+        order = sorted(range(len(candidates)),
+                       key=lambda c: candidates[c]['time'][1])
+        ends = [candidates[c]['time'][1] for c in order]
+
+        best_weights = [0.0]  # of the first k candidates in order
+        choices = []
+        for k, c in enumerate(order):
+            start, end = candidates[c]['time']
+            weight = (end - start) * (
+                1.0 - candidates[c]['distance'] / self.max_link_distance)
+            num_before = bisect.bisect_right(ends, start + tol, 0, k)
+
+            if best_weights[num_before] + weight > best_weights[k]:
+                best_weights.append(best_weights[num_before] + weight)
+                choices.append(num_before)
+            else:
+                best_weights.append(best_weights[k])
+                choices.append(None)
+
+        selected = []
+        k = len(order)
+        while k > 0:
+            if choices[k - 1] is None:
+                k -= 1
+            else:
+                selected.append(order[k - 1])
+                k = choices[k - 1]
+
+        return selected[::-1]
+
+    def _align_notes(self, notes, link_rows, link_cols, audio_cents):
+        frame_cents, note_pos = self._synth_frames(notes, self.frame_dur)
+        num_rows = len(frame_cents)
+
+        # the band follows the path of the section link on the fine frames
+        factor = self.coarse_factor
+        radius = int(np.ceil(self.band_dur / self.frame_dur))
+        centers = (np.interp((np.arange(num_rows) + 0.5) / factor - 0.5,
+                             link_rows, link_cols) + 0.5) * factor - 0.5
+        centers = np.round(centers).astype(int)
+
+        win_start = max(centers.min() - radius, 0)
+        win_end = min(centers.max() + radius + 1, len(audio_cents))
+        if win_end <= win_start:
+            return None
+        lo = np.clip(centers - radius - win_start, 0, win_end - win_start)
+        hi = np.clip(centers + radius + 1 - win_start, 0, win_end - win_start)
+
+        last_acc, steps = self._subsequence_dtw(
+            frame_cents, audio_cents[win_start:win_end], lo, hi)
+        distances = last_acc / num_rows
+        end_col = np.argmin(distances)
+        if not np.isfinite(distances[end_col]):
+            return None
+
+        # the boundaries of the notes are the columns matched to their first
+        # frames; the rows skipped by the (2, 1) steps are interpolated
+        rows, cols = self._backtrack(steps, lo, end_col)
+        bounds = np.append(np.interp(np.arange(num_rows), rows, cols),
+                           cols[-1] + 1)
+        bounds = (bounds + win_start) * self.frame_dur
+
+        positions = np.arange(len(notes['rows']))
+        starts = bounds[np.searchsorted(note_pos, positions, side='left')]
+        ends = bounds[np.searchsorted(note_pos, positions, side='right')]
+
+        return starts, ends, float(distances[end_col])
+
+    def _to_link(self, section, time_interval, distance):
+        link = dict((key, section[key]) for key in self._section_keys
+                    if key in section)
+        link['time'] = [float(t) for t in time_interval]
+        link['distance'] = distance
+
+        return link
+
+    @staticmethod
+    def _to_notes(score, notes, starts, ends, tonic_freq, label):
+        # the theoretical pitch of the rests is None. The performed pitch is
+        # the theoretical pitch until the aligned pitch filter computes it
+        note_freqs = tonic_freq * 2 ** (notes['cents'] / 1200.0)
+
+        aligned_notes = []
+        for row, start, end, freq in zip(notes['rows'], starts, ends,
+                                         note_freqs):
+            freq = None if np.isnan(freq) else float(freq)
+            aligned_notes.append({
+                'index_in_score': score['index'][row],
+                'symbol': score['noteAE'][row],
+                'lyrics': score['lyrics'][row],
+                'label': label,
+                'interval': [float(start), float(end)],
+                'theoretical_pitch': {'value': freq, 'unit': 'Hz'},
+                'performed_pitch': {'value': freq, 'unit': 'Hz'}})
+
+        return aligned_notes
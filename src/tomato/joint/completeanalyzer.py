@@ -23,6 +23,7 @@
 
 from ..analyzer import Analyzer
 from ..audio.audioanalyzer import AudioAnalyzer
+from ..stagegraph import StageGraph
 from ..symbolic.symbtranalyzer import SymbTrAnalyzer
 from .jointanalyzer import JointAnalyzer
 
@@ -38,15 +39,41 @@ class CompleteAnalyzer(Analyzer):
     """
     _inputs = []
 
-    def __init__(self):
+    # the analysis stages and their upstream stages. The score analysis and
+    # the audio analysis steps, which do not need the makam from the score,
+    # are run at the same time
+    _stage_graph = StageGraph([
+        ('score_features', []),
+        ('makam_independent_audio_features', []),
+        ('audio_features', ['score_features',
+                            'makam_independent_audio_features']),
+        ('joint_analysis', ['score_features', 'audio_features']),
+        ('score_informed_audio_features', ['joint_analysis']),
+        ('summarized_features', ['score_features', 'audio_features',
+                                 'joint_analysis',
+                                 'score_informed_audio_features'])])
+
+    def __init__(self, cache=None, num_workers=4):
         """
         Initialize a CompleteAnalyzer object
+
+        Parameters
+        ----------
+        cache : FeatureCache, optional
+            The cache to store and reuse the score and audio features
+        num_workers : int, optional
+            The number of the analysis steps run at the same time. 1 runs
+            the steps one by one
         """
-        super(CompleteAnalyzer, self).__init__(verbose=True)
+        super(CompleteAnalyzer, self).__init__(verbose=True, cache=cache)
+        self.num_workers = num_workers
 
         # extractors
-        self._symbtr_analyzer = SymbTrAnalyzer(verbose=self.verbose)
-        self._audio_analyzer = AudioAnalyzer(verbose=self.verbose)
+        self._symbtr_analyzer = SymbTrAnalyzer(verbose=self.verbose,
+                                               cache=cache)
+        self._audio_analyzer = AudioAnalyzer(verbose=self.verbose,
+                                             cache=cache,
+                                             num_workers=num_workers)
         self._joint_analyzer = JointAnalyzer(verbose=self.verbose)
 
     def analyze(self, symbtr_txt_filename='', symbtr_mu2_filename='',
@@ -90,32 +117,67 @@ class CompleteAnalyzer(Analyzer):
             Features that are related to both the music scores and audio
             recordings.
         """
-        # score analysis
-        score_features = self._symbtr_analyzer.analyze(
-            symbtr_txt_filename, symbtr_mu2_filename, symbtr_name=symbtr_name)
+        features = {}
+        stages = {
+            # score analysis
+            'score_features': lambda: self._symbtr_analyzer.analyze(
+                symbtr_txt_filename, symbtr_mu2_filename,
+                symbtr_name=symbtr_name),
 
-        # audio analysis
-        audio_features = self._audio_analyzer.analyze(
-            audio_filename,
-            makam=score_features['metadata']['makam']['symbtr_slug'],
-            metadata=audio_metadata)
+            # audio analysis
+            'makam_independent_audio_features':
+                lambda: self._audio_analyzer.analyze(
+                    audio_filename, metadata=audio_metadata,
+                    **dict.fromkeys(self._get_makam_dependent_features(),
+                                    False)),
+            'audio_features': lambda: self._analyze_makam_dependent_audio(
+                audio_filename, features['makam_independent_audio_features'],
+                features['score_features']),
+
+            # joint analysis
+            'joint_analysis': lambda: self._joint_analyzer.analyze(
+                symbtr_txt_filename, features['score_features'],
+                audio_filename, features['audio_features']['pitch']),
 
-        # joint analysis
-        joint_features, score_informed_audio_features = self._joint_analyzer.\
-            analyze(symbtr_txt_filename, score_features, audio_filename,
-                    audio_features['pitch'])
+            # redo some steps in audio analysis
+            'score_informed_audio_features':
+                lambda: self._audio_analyzer.analyze(
+                    metadata=False, pitch=False,
+                    **features['joint_analysis'][1]),
 
-        # redo some steps in audio analysis
-        score_informed_audio_features = self._audio_analyzer.analyze(
-            metadata=False, pitch=False, **score_informed_audio_features)
+            # summarize all the features extracted from all sources
+            'summarized_features': lambda: self._joint_analyzer.summarize(
+                features['audio_features'], features['score_features'],
+                features['joint_analysis'][0],
+                features['score_informed_audio_features'])}
 
-        # summarize all the features extracted from all sources
-        summarized_features = self._joint_analyzer.summarize(
-            audio_features, score_features, joint_features,
-            score_informed_audio_features)
+        self._stage_graph.run(lambda name: stages[name](), features,
+                              num_workers=self.num_workers)
 
-        return (summarized_features, score_features, audio_features,
-                score_informed_audio_features, joint_features)
+        return (features['summarized_features'], features['score_features'],
+                features['audio_features'],
+                features['score_informed_audio_features'],
+                features['joint_analysis'][0])
+
+    @staticmethod
+    def _get_makam_dependent_features():
+        return AudioAnalyzer.get_downstream_features(['makam'])
+
+    def _analyze_makam_dependent_audio(self, audio_filename, audio_features,
+                                       score_features):
+        # the features computed without the makam are passed as precomputed;
+        # the ones, which could not be computed, are skipped
+        makam_dependent = self._get_makam_dependent_features()
+        computed = AudioAnalyzer.get_upstream_features(list(audio_features))
+        precomputed = dict(
+            (name, False if feature is None else feature)
+            for name, feature in audio_features.items()
+            if name in computed and name not in makam_dependent)
+
+        return self._audio_analyzer.analyze(
+            audio_filename,
+            makam=score_features['metadata']['makam']['symbtr_slug'],
+            **precomputed)
 
     @staticmethod
     def plot(summarized_features):
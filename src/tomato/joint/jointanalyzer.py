@@ -23,74 +23,120 @@
 
 import json
 import logging
-import tempfile
 import timeit
 import warnings
-from copy import deepcopy
+from contextlib import ExitStack
+from copy import copy, deepcopy
 from io import BytesIO
 
-from scipy.io import savemat
-
 from ..analyzer import Analyzer
+from ..audio.pitchtrack import PitchTrack
 from ..bincaller import BinCaller
 from ..io import IO
+from ..lazyimport import lazy_import
 from ..plotter import Plotter
+from ..scratcharea import ScratchArea
+from ..symbolic.symbtr.reader.txt import TxtReader
+from ..symbolic.symbtr.rhythmicfeature import RhythmicFeatureExtractor
 from .alignednotemodel import AlignedNoteModel
 from .alignedpitchfilter import AlignedPitchFilter
+from .audioscorealigner import AudioScoreAligner
+from .tonictempoextractor import TonicTempoExtractor
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.INFO)
 
-# instantiate a mcr_caller
-_mcr_caller = BinCaller()  # pylint: disable-msg=C0103
+sio = lazy_import('scipy.io')  # pylint: disable-msg=C0103
 
 
 class JointAnalyzer(Analyzer):
     _inputs = ['notes', 'note_models', 'makam', 'pitch_filtered', 'sections',
                'tonic', 'tempo']
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, tonic_tempo_engine='python',
+                 alignment_engine='python'):
         super(JointAnalyzer, self).__init__(verbose=verbose)
 
+        # 'python' runs the score-informed tonic and tempo extraction and the
+        # audio-score alignment in-process, 'binary' calls the respective
+        # MATLAB binary, e.g. to compare the results. The MCR is only needed
+        # for the 'binary' engines
+        self.tonic_tempo_engine = tonic_tempo_engine
+        self.alignment_engine = alignment_engine
+
         # extractors
-        self._tonic_tempo_extractor = _mcr_caller.get_mcr_binary_path(
-            'extractTonicTempoTuning')
-        self._audio_score_aligner = _mcr_caller.get_mcr_binary_path(
-            'alignAudioScore')
+        self._audio_score_aligner = AudioScoreAligner()
+        self._tonic_tempo_extractor = TonicTempoExtractor(
+            aligner=self._audio_score_aligner)
         self._aligned_pitch_filter = AlignedPitchFilter()
         self._aligned_note_model = AlignedNoteModel()
 
+    @property
+    def _mcr_caller(self):
+        return BinCaller.get_default()
+
+    @property
+    def _tonic_tempo_binary(self):
+        return self._mcr_caller.get_mcr_binary_path('extractTonicTempoTuning')
+
+    @property
+    def _audio_score_aligner_binary(self):
+        return self._mcr_caller.get_mcr_binary_path('alignAudioScore')
+
+    def start_mcr_workers(self, num_workers=1, **kwargs):
+        """
+        Keeps the MATLAB binaries resident in num_workers workers each
+        instead of starting them for every call. See BinCaller.start_workers
+        """
+        return all([self._mcr_caller.start_workers(
+            bin_path, num_workers=num_workers, **kwargs) for bin_path in
+            [self._tonic_tempo_binary, self._audio_score_aligner_binary]])
+
+    def stop_mcr_workers(self):
+        for bin_path in [self._tonic_tempo_binary,
+                         self._audio_score_aligner_binary]:
+            self._mcr_caller.stop_workers(bin_path)
+
     def analyze(self, symbtr_txt_filename='', score_features=None,
                 audio_filename='', audio_pitch=None, **kwargs):
         input_f = self._parse_inputs(**kwargs)
 
-        # joint score-informed tonic identification and tempo estimation
-        try:  # if both are given in advance don't recompute
-            input_f['tonic'], input_f['tempo'] = self.extract_tonic_tempo(
-                symbtr_txt_filename, score_features, audio_filename,
-                audio_pitch)
-        except RuntimeError as e:
-            warnings.warn(e.message, RuntimeWarning, stacklevel=2)
-            joint_features = None
-            score_informed_audio_features = {
-                'makam': score_features['metadata']['makam']['symbtr_slug']}
-            # Everything else will fail
-            return joint_features, score_informed_audio_features
-
-        # section linking and note-level alignment
-        try:
-            temp_out = self.align_audio_score(
-                symbtr_txt_filename, score_features, audio_filename,
-                audio_pitch, input_f['tonic'], input_f['tempo'])
-            input_f['aligned_sections'], input_f['notes'], input_f[
-                'section_links'], input_f['section_candidates'] = temp_out
-        except RuntimeError as e:
-            warnings.warn(e.message, RuntimeWarning, stacklevel=2)
-            joint_features = None
-            score_informed_audio_features = {
-                'tonic': input_f['tonic'], 'tempo': input_f['tempo'],
-                'makam': score_features['metadata']['makam']['symbtr_slug']}
-            return joint_features, score_informed_audio_features
+        # the score and pitch inputs of the binaries are written once and
+        # shared by the calls; the in-process engines need no files
+        with ExitStack() as stack:
+            scratch = stack.enter_context(ScratchArea()) \
+                if 'binary' in [self.tonic_tempo_engine,
+                                self.alignment_engine] else None
+
+            # joint score-informed tonic identification and tempo estimation
+            try:  # if both are given in advance don't recompute
+                input_f['tonic'], input_f['tempo'] = self.extract_tonic_tempo(
+                    symbtr_txt_filename, score_features, audio_filename,
+                    audio_pitch, scratch=scratch)
+            except RuntimeError as e:
+                warnings.warn(e.message, RuntimeWarning, stacklevel=2)
+                joint_features = None
+                score_informed_audio_features = {'makam': score_features[
+                    'metadata']['makam']['symbtr_slug']}
+                # Everything else will fail
+                return joint_features, score_informed_audio_features
+
+            # section linking and note-level alignment
+            try:
+                temp_out = self.align_audio_score(
+                    symbtr_txt_filename, score_features, audio_filename,
+                    audio_pitch, input_f['tonic'], input_f['tempo'],
+                    scratch=scratch)
+                input_f['aligned_sections'], input_f['notes'], input_f[
+                    'section_links'], input_f['section_candidates'] = temp_out
+            except RuntimeError as e:
+                warnings.warn(e.message, RuntimeWarning, stacklevel=2)
+                joint_features = None
+                score_informed_audio_features = {
+                    'tonic': input_f['tonic'], 'tempo': input_f['tempo'],
+                    'makam': score_features['metadata']['makam'][
+                        'symbtr_slug']}
+                return joint_features, score_informed_audio_features
 
         # aligned pitch filter
         temp_out = self._partial_caller(
@@ -176,148 +222,174 @@ class JointAnalyzer(Analyzer):
         return common_audio_features
 
     def extract_tonic_tempo(self, score_filename='', score_data=None,
-                            audio_filename='', audio_pitch=None):
+                            audio_filename='', audio_pitch=None,
+                            scratch=None):
         tic = timeit.default_timer()
         self.vprint("- Extracting score-informed tonic and tempo of {0:s}"
                     .format(audio_filename))
 
-        # create the temporary input and output files wanted by the binary
-        # metadata has to be flattened for the MATLAB binary to pick the keys
-        score_data_flattened = {**deepcopy(score_data),
-                                **deepcopy(score_data['metadata'])}
-        temp_score_data_file = IO.create_temp_file(
-            '.json', json.dumps(score_data_flattened))
-
-        # matlab
-        matout = BytesIO()
-        savemat(matout, audio_pitch)
+        if self.tonic_tempo_engine == 'python':
+            score = self._get_score(score_filename, score_data)
+            tonic, tempo = self._tonic_tempo_extractor.extract(
+                score, score_data.get('sections'),
+                score_data.get('rhythmic_structure') or
+                RhythmicFeatureExtractor.extract_rhythmic_structure(score),
+                score_data['metadata']['tonic'], audio_pitch['pitch'])
+        elif self.tonic_tempo_engine == 'binary':
+            tonic, tempo = self._extract_tonic_tempo_binary(
+                score_filename, score_data, audio_filename, audio_pitch,
+                scratch)
+        else:
+            raise ValueError("Unknown tonic and tempo engine: {0:s}. "
+                             "Possible engines are 'python' and 'binary'."
+                             .format(self.tonic_tempo_engine))
 
-        temp_pitch_file = IO.create_temp_file('.mat', matout.getvalue())
+        # tidy outputs
+        procedure = 'Score informed joint tonic and tempo extraction'
 
-        temp_out_folder = tempfile.mkdtemp()
+        tonic['procedure'] = procedure
+        tonic['source'] = audio_filename
 
-        # call the binary
-        callstr = [u'"{0:s}" "{1:s}" "{2:s}" "{3:s}" "{4:s}" "{5:s}"'.format(
-            self._tonic_tempo_extractor, score_filename, temp_score_data_file,
-            audio_filename, temp_pitch_file, temp_out_folder)]
-        out, err = _mcr_caller.call(callstr)
+        for tempo_type in ['average', 'relative']:
+            tempo[tempo_type]['procedure'] = procedure
+            tempo[tempo_type]['source'] = audio_filename
 
-        # check the MATLAB output
-        if "Tonic-Tempo-Tuning Extraction took" not in out.decode('utf-8'):
-            IO.remove_temp_files(
-                temp_score_data_file, temp_pitch_file, temp_out_folder)
-            raise RuntimeError("Score-informed tonic, tonic and tuning "
-                               "extraction is not successful. Please "
-                               "check the error in the terminal.")
+        # print elapsed time, if verbose
+        self.vprint_time(tic, timeit.default_timer())
 
-        out_dict = IO.load_json_from_temp_folder(
-            temp_out_folder, ['tempo', 'tonic', 'tuning'])
+        return tonic, tempo
 
-        # unlink the temporary files
-        IO.remove_temp_files(
-            temp_score_data_file, temp_pitch_file, temp_out_folder)
+    def _extract_tonic_tempo_binary(self, score_filename, score_data,
+                                    audio_filename, audio_pitch, scratch):
+        # the input and output files wanted by the binary. The inputs are
+        # shared with align_audio_score, if the same scratch area is given
+        with scratch or ScratchArea() as scratch_area:
+            score_data_file = self._write_score_data(scratch_area, score_data)
+            pitch_file = self._write_pitch(scratch_area, audio_pitch)
+            out_folder = scratch_area.make_dir('tonic_tempo')
+
+            # call the binary
+            out, err = self._mcr_caller.call_binary(
+                self._tonic_tempo_binary,
+                [score_filename, score_data_file, audio_filename, pitch_file,
+                 out_folder])
+
+            # check the MATLAB output
+            if "Tonic-Tempo-Tuning Extraction took" not in out.decode(
+                    'utf-8'):
+                raise RuntimeError("Score-informed tonic, tonic and tuning "
+                                   "extraction is not successful. Please "
+                                   "check the error in the terminal.")
+
+            out_dict = IO.load_json_from_temp_folder(
+                out_folder, ['tempo', 'tonic', 'tuning'])
 
-        # tidy outouts
         # We omit the tuning output in the binary because
         # get_aligned_note_models is more informative
-        procedure = 'Score informed joint tonic and tempo extraction'
-
-        tonic = out_dict['tonic']['scoreInformed']
-        tonic = IO.dict_keys_to_snake_case(tonic)
-        tonic['procedure'] = procedure
-        tonic['source'] = audio_filename
+        tonic = IO.dict_keys_to_snake_case(out_dict['tonic']['scoreInformed'])
 
         tempo = out_dict['tempo']['scoreInformed']
-        tempo['average'] = IO.dict_keys_to_snake_case(tempo['average'])
-        tempo['average']['procedure'] = procedure
-        tempo['average']['source'] = audio_filename
-        tempo['average'].pop("method", None)
-
-        tempo['relative'] = IO.dict_keys_to_snake_case(
-            tempo['relative'])
-        tempo['relative']['procedure'] = procedure
-        tempo['relative']['source'] = audio_filename
-        tempo['relative'].pop("method", None)
-
-        # print elapsed time, if verbose
-        self.vprint_time(tic, timeit.default_timer())
+        for tempo_type in ['average', 'relative']:
+            tempo[tempo_type] = IO.dict_keys_to_snake_case(tempo[tempo_type])
+            tempo[tempo_type].pop("method", None)
 
         return tonic, tempo
 
     def align_audio_score(self, score_filename='', score_data=None,
                           audio_filename='', audio_pitch=None,
-                          audio_tonic=None, audio_tempo=None):
+                          audio_tonic=None, audio_tempo=None, scratch=None):
         tic = timeit.default_timer()
         self.vprint("- Aligning audio recording {0:s} and music score {1:s}."
                     .format(audio_filename, score_filename))
 
-        # create the temporary input and output files wanted by the binary
-        # metadata has to be flattened for the MATLAB binary to pick the keys
-        score_data_flattened = {**deepcopy(score_data),
-                                **deepcopy(score_data['metadata'])}
-        temp_score_data_file = IO.create_temp_file(
-            '.json', json.dumps(score_data_flattened))
-
-        # tonic has to be enclosed in the key 'score_informed' and all the
-        # keys have to start with a capital letter
-        audio_tonic_ = IO.dict_keys_to_camel_case(audio_tonic)
-        temp_tonic_file = IO.create_temp_file(
-            '.json', json.dumps({'scoreInformed': audio_tonic_}))
-
-        # tempo has to be enclosed in the key 'score_informed' and all the
-        # keys have to start with a capital letter
-        audio_tempo_ = deepcopy(audio_tempo)
-        audio_tempo_['relative'] = IO.dict_keys_to_camel_case(
-            audio_tempo['relative'])
-        audio_tempo_['average'] = IO.dict_keys_to_camel_case(
-            audio_tempo['average'])
-        temp_tempo_file = IO.create_temp_file(
-            '.json', json.dumps({'scoreInformed': audio_tempo_}))
-
-        # matlab
-        matout = BytesIO()
-        savemat(matout, audio_pitch)
-
-        temp_pitch_file = IO.create_temp_file(
-            '.mat', matout.getvalue())
-
-        temp_out_folder = tempfile.mkdtemp()
-
-        # call the binary
-        callstr = ['"{0:s}" "{1:s}" "{2:s}" "" "{3:s}" "{4:s}" "{5:s}" '
-                   '"{6:s}" "" "{7:s}"'
-                   ''.format(self._audio_score_aligner, score_filename,
-                             temp_score_data_file, audio_filename,
-                             temp_pitch_file, temp_tonic_file,
-                             temp_tempo_file, temp_out_folder)]
-
-        out, err = _mcr_caller.call(callstr)
-
-        # check the MATLAB output
-        if "Audio-score alignment took" not in out.decode('utf-8'):
-            IO.remove_temp_files(
-                temp_score_data_file, temp_tonic_file, temp_tempo_file,
-                temp_pitch_file, temp_out_folder)
-            raise RuntimeError("Audio score alignment is not successful. "
-                               "Please check the error in the terminal.")
-
-        out_dict = IO.load_json_from_temp_folder(
-            temp_out_folder, ['sectionLinks', 'alignedNotes'])
-
-        # unlink the temporary files
-        IO.remove_temp_files(temp_score_data_file, temp_tonic_file,
-                             temp_tempo_file, temp_pitch_file, temp_out_folder)
-
-        notes = [IO.dict_keys_to_snake_case(n)
-                 for n in out_dict['alignedNotes']['notes']]
+        if self.alignment_engine == 'python':
+            score = self._get_score(score_filename, score_data)
+            aligned = self._audio_score_aligner.align(
+                score, score_data.get('sections'), audio_pitch['pitch'],
+                audio_tonic, audio_tempo)
+        elif self.alignment_engine == 'binary':
+            aligned = self._align_audio_score_binary(
+                score_filename, score_data, audio_filename, audio_pitch,
+                audio_tonic, audio_tempo, scratch)
+        else:
+            raise ValueError("Unknown alignment engine: {0:s}. Possible "
+                             "engines are 'python' and 'binary'.".format(
+                                 self.alignment_engine))
 
         # print elapsed time, if verbose
         self.vprint_time(tic, timeit.default_timer())
 
+        return aligned
+
+    def _align_audio_score_binary(self, score_filename, score_data,
+                                  audio_filename, audio_pitch, audio_tonic,
+                                  audio_tempo, scratch):
+        # the input and output files wanted by the binary. The score and
+        # pitch inputs are shared with extract_tonic_tempo, if the same
+        # scratch area is given
+        with scratch or ScratchArea() as scratch_area:
+            score_data_file = self._write_score_data(scratch_area, score_data)
+            pitch_file = self._write_pitch(scratch_area, audio_pitch)
+
+            # tonic has to be enclosed in the key 'score_informed' and all
+            # the keys have to start with a capital letter
+            tonic_file = scratch_area.write('tonic.json', json.dumps(
+                {'scoreInformed': IO.dict_keys_to_camel_case(audio_tonic)}))
+
+            # tempo has to be enclosed in the key 'score_informed' and all
+            # the keys have to start with a capital letter
+            audio_tempo_ = dict(audio_tempo)
+            audio_tempo_['relative'] = IO.dict_keys_to_camel_case(
+                audio_tempo['relative'])
+            audio_tempo_['average'] = IO.dict_keys_to_camel_case(
+                audio_tempo['average'])
+            tempo_file = scratch_area.write('tempo.json', json.dumps(
+                {'scoreInformed': audio_tempo_}))
+
+            out_folder = scratch_area.make_dir('alignment')
+
+            # call the binary
+            out, err = self._mcr_caller.call_binary(
+                self._audio_score_aligner_binary,
+                [score_filename, score_data_file, '', audio_filename,
+                 pitch_file, tonic_file, tempo_file, '', out_folder])
+
+            # check the MATLAB output
+            if "Audio-score alignment took" not in out.decode('utf-8'):
+                raise RuntimeError("Audio score alignment is not successful. "
+                                   "Please check the error in the terminal.")
+
+            out_dict = IO.load_json_from_temp_folder(
+                out_folder, ['sectionLinks', 'alignedNotes'])
+
+        notes = [IO.dict_keys_to_snake_case(n)
+                 for n in out_dict['alignedNotes']['notes']]
+
         return (out_dict['sectionLinks']['alignedLinks'], notes,
                 out_dict['sectionLinks']['sectionLinks'],
                 out_dict['sectionLinks']['candidateLinks'])
 
+    @staticmethod
+    def _get_score(score_filename, score_data):
+        # the score is read from the file, if it is not in the score data
+        return score_data.get('score') or TxtReader.read(score_filename)[0]
+
+    @staticmethod
+    def _write_score_data(scratch_area, score_data):
+        # metadata has to be flattened for the MATLAB binary to pick the keys
+        return scratch_area.write_once('score_data.json', lambda: json.dumps(
+            {**score_data, **score_data['metadata']}))
+
+    @staticmethod
+    def _write_pitch(scratch_area, audio_pitch):
+        def serialize_pitch():
+            matout = BytesIO()
+            sio.savemat(matout, {**audio_pitch, 'pitch': PitchTrack.from_pitch(
+                audio_pitch['pitch']).to_array()})
+            return matout.getvalue()
+
+        return scratch_area.write_once('pitch.mat', serialize_pitch)
+
     def filter_pitch(self, pitch, aligned_notes):
         tic = timeit.default_timer()
         self.vprint("- Filtering predominant melody of {0:s} after "
@@ -331,8 +403,10 @@ class JointAnalyzer(Analyzer):
         notes_filtered = [IO.dict_keys_to_snake_case(n)
                           for n in notes_filtered]
 
-        pitch_filtered = deepcopy(pitch)
-        pitch_filtered['pitch'] = pitch_temp
+        # the time stamps and the salience are not changed by the filter
+        pitch_filtered = copy(pitch)
+        pitch_filtered['pitch'] = PitchTrack.from_pitch(
+            pitch['pitch']).replace(hz=pitch_temp[:, 1])
         pitch_filtered['citation'] = 'SenturkThesis'
         pitch_filtered['procedure'] = 'Pitch filtering according to ' \
                                       'audio-score alignment'
@@ -365,10 +439,10 @@ class JointAnalyzer(Analyzer):
         return note_models, pitch_distribution, tonic
 
     def set_tonic_tempo_extractor_params(self, **kwargs):
-        raise NotImplementedError
+        self._set_params('_tonic_tempo_extractor', **kwargs)
 
     def set_audio_score_aligner_params(self, **kwargs):
-        raise NotImplementedError
+        self._set_params('_audio_score_aligner', **kwargs)
 
     def set_pitch_filter_params(self, **kwargs):
         self._set_params('_aligned_pitch_filter', **kwargs)
@@ -0,0 +1,150 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+import numpy as np
+
+from ..audio.pitchdistribution import PitchDistribution
+from ..audio.pitchtrack import PitchTrack
+from ..converter import Converter
+from ..musicdata import MusicData
+from ..symbolic.symbtr.scoreprocessor import ScoreProcessor
+from .audioscorealigner import AudioScoreAligner
+
+
+class TonicTempoExtractor:
+    """
+    Score-informed tonic identification and tempo estimation in-process, as
+    an alternative to the MATLAB extractTonicTempoTuning binary.
+
+    The tonic is found by matching the pitch distribution of the score
+    melody, synthesized in cents with respect to the tonic, to the pitch
+    distribution of the recording. The tempo of the performance relative
+    to the score is estimated from the slopes of the section links found by
+    the AudioScoreAligner, and the average tempo is the relative tempo
+    times the average tempo of the rhythmic structure of the score.
+    """
+    def __init__(self, kernel_width=7.5, step_size=7.5,
+                 peak_search_width=25.0, aligner=None):
+        self.kernel_width = kernel_width  # of the pitch distributions
+        self.step_size = step_size  # of the pitch distributions
+        self.peak_search_width = peak_search_width  # cents, the tonic is
+        # moved to the highest bin of the recording distribution this close
+        self._aligner = AudioScoreAligner() if aligner is None else aligner
+
+    def extract(self, score, sections, rhythmic_structure, tonic_symbol,
+                pitch):
+        """
+        Identifies the tonic and estimates the tempo of the recording
+        :param score: SymbTr-txt score as read by TxtReader
+        :param sections: sections of the score as extracted by
+                         SectionExtractor
+        :param rhythmic_structure: rhythmic structure of the score as
+                                   extracted by RhythmicFeatureExtractor
+        :param tonic_symbol: symbol of the tonic note in the score
+        :param pitch: predominant melody of the recording; PitchTrack or the
+                      matrix of time stamps, Hz values (and salience)
+        :return: the tonic and the tempo
+        """
+        pitch_track = PitchTrack.from_pitch(pitch)
+
+        tonic = self.identify_tonic(score, tonic_symbol, pitch_track)
+        tempo = self.estimate_tempo(score, sections, rhythmic_structure,
+                                    pitch_track, tonic)
+
+        return tonic, tempo
+
+    def identify_tonic(self, score, tonic_symbol, pitch):
+        score_distribution = PitchDistribution.from_cent_pitch(
+            self._synth_score_melody(score, tonic_symbol),
+            kernel_width=self.kernel_width, step_size=self.step_size)
+        audio_distribution = PitchDistribution.from_hz_pitch(
+            pitch, kernel_width=self.kernel_width, step_size=self.step_size)
+
+        # the shift of the score distribution (in cents wrt the tonic) with
+        # the highest correlation gives the tonic in the recording
+        correlation = np.correlate(audio_distribution.vals,
+                                   score_distribution.vals, mode='full')
+        shift = audio_distribution.bins[0] - score_distribution.bins[0] + \
+            (np.argmax(correlation) - len(score_distribution.vals) + 1) * \
+            audio_distribution.step_size
+
+        # the tonic is the highest bin around the shift
+        in_reach = np.abs(audio_distribution.bins - shift) <= \
+            self.peak_search_width
+        tonic_cent = audio_distribution.bins[in_reach][np.argmax(
+            audio_distribution.vals[in_reach])]
+
+        return {'value': float(Converter.cent_to_hz(
+            tonic_cent, audio_distribution.ref_freq)), 'unit': 'Hz',
+            'symbol': tonic_symbol, 'octave_wrapped': False}
+
+    def estimate_tempo(self, score, sections, rhythmic_structure, pitch,
+                       tonic):
+        rel_tempo = self._aligner.estimate_relative_tempo(
+            score, sections, pitch, tonic)
+        score_tempo = self._get_average_score_tempo(score, rhythmic_structure)
+        average_tempo = None if score_tempo is None \
+            else score_tempo * rel_tempo
+
+        return {'average': {'value': average_tempo, 'unit': 'bpm'},
+                'relative': {'value': rel_tempo}}
+
+    @staticmethod
+    def _synth_score_melody(score, tonic_symbol):
+        # the melody of the notes in cents wrt the tonic; the rests, the
+        # control rows and the grace notes are skipped
+        note_cents = MusicData.get_note_cents()
+        rows = [ii for ii, (code, symbol, dur) in enumerate(zip(
+            score['code'], score['noteAE'], score['duration']))
+            if code not in range(50, 57) and symbol in note_cents and dur > 0]
+
+        melody = {
+            'notes': [note_cents[score['noteAE'][ii]] -
+                      note_cents[tonic_symbol] for ii in rows],
+            'nums': [score['numerator'][ii] for ii in rows],
+            'denums': [score['denumerator'][ii] for ii in rows]}
+
+        return ScoreProcessor.synth_melody(melody, max(melody['denums']))
+
+    @staticmethod
+    def _get_average_score_tempo(score, rhythmic_structure):
+        # the tempi of the parts weighted by their durations; the parts
+        # without a tempo, e.g. in serbest usul, are skipped. None if no
+        # part has a tempo
+        tempi = []
+        durs = []
+        for rs in rhythmic_structure:
+            if rs['tempo']['value'] is None:
+                continue
+            start = score['index'].index(rs['startNote'])
+            end = score['index'].index(rs['endNote'])
+
+            tempi.append(rs['tempo']['value'])
+            durs.append(sum(score['duration'][start:end + 1]))
+
+        if not tempi:
+            return None
+        if sum(durs) > 0:
+            return float(np.average(tempi, weights=durs))
+        return float(np.mean(tempi))
@@ -0,0 +1,76 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+import threading
+from collections.abc import Mapping
+
+
+class LazyFeatures(Mapping):
+    """
+    Read-only mapping of the features of an analysis, which computes each
+    feature at its first access and keeps it for the later accesses. The
+    features, which are not accessed, are never computed:
+
+        features = audio_analyzer.analyze(filepath, lazy=True)
+        tonic = features['tonic']  # computes pitch, pitch_filtered, tonic
+
+    dict(features) computes all the features.
+    """
+    def __init__(self, compute, flags):
+        """
+        :param compute: function(name, flag, features) returning the
+                        feature. It reads the upstream features from
+                        "features", i.e. this mapping
+        :param flags: dictionary of the features and their flags: None
+                      (compute), False (skip) or the precomputed feature
+        """
+        self._compute = compute
+        self._flags = dict(flags)
+        self._features = {}
+        self._lock = threading.RLock()  # the upstream features are computed
+        # recursively in the same thread
+
+    def __getitem__(self, name):
+        with self._lock:
+            try:
+                return self._features[name]
+            except KeyError:
+                flag = self._flags[name]  # KeyError for unknown features
+
+            self._features[name] = self._compute(name, flag, self)
+            return self._features[name]
+
+    def __iter__(self):
+        return iter(self._flags)
+
+    def __len__(self):
+        return len(self._flags)
+
+    def __repr__(self):
+        return '{0:s}({1:s})'.format(type(self).__name__, ', '.join(
+            '{0:s}={1:s}'.format(name, 'computed' if name in self._features
+                                 else 'pending') for name in self._flags))
+
+    def is_computed(self, name):
+        return name in self._features
@@ -0,0 +1,83 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+import importlib
+import sys
+import threading
+import types
+
+_import_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in of a module, which is imported at the first access to one of
+    its attributes. It keeps the heavy dependencies, e.g. essentia or
+    matplotlib, out of the import of tomato until they are used:
+
+        plt = lazy_import('matplotlib.pyplot')
+
+        def plot(...):
+            fig, ax = plt.subplots()  # matplotlib.pyplot is imported here
+    """
+    def __init__(self, name, on_import=None):
+        super(LazyModule, self).__init__(name)
+        self.__dict__['_lazy_on_import'] = on_import
+
+    def __getattr__(self, attr):
+        with _import_lock:
+            module = importlib.import_module(self.__name__)
+
+            on_import = self.__dict__.pop('_lazy_on_import', None)
+            if on_import is not None:
+                on_import(module)
+
+            # the later accesses do not go through __getattr__
+            self.__dict__.update(module.__dict__)
+
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return '<lazy module {0:s}>'.format(repr(self.__name__))
+
+
+def lazy_import(name, on_import=None):
+    """
+    Returns the module, if it is already imported, else a LazyModule, which
+    imports it on first use
+    :param name: absolute name of the module, e.g. "scipy.stats"
+    :param on_import: function called with the module after it is imported,
+                      e.g. to configure it. It replaces the configuration
+                      calls at the module level, which would import the
+                      module right away
+    :return: the module or its LazyModule
+    """
+    try:
+        module = sys.modules[name]
+    except KeyError:
+        return LazyModule(name, on_import=on_import)
+
+    if on_import is not None:
+        on_import(module)
+    return module
@@ -0,0 +1,310 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+import json
+import os
+import queue
+import selectors
+import subprocess
+import threading
+import timeit
+
+
+class McrWorkerError(RuntimeError):
+    pass
+
+
+class McrWorker:
+    """
+    A resident binary, which accepts jobs over its stdin and stdout so that
+    the MATLAB Runtime is started only once.
+
+    The job protocol is line based. Each request and response is a JSON
+    object in a single line:
+        {"command": "ping"}                 -> {"status": "ok"}
+        {"command": "run", "args": [...]}   -> {"status": "ok" | "error",
+                                                "stdout": "...",
+                                                "message": "..."}
+        {"command": "quit"}                 -> (the worker exits)
+    The "args" are the arguments of the one-shot call of the binary and the
+    "stdout" is what the call would print. The worker also exits, when its
+    stdin is closed.
+
+    A binary, which does not answer the first ping in startup_timeout
+    seconds, e.g. one without the worker mode, and a job, which does not
+    finish in timeout seconds, raise McrWorkerError.
+    """
+    def __init__(self, command, env=None, timeout=600.0,
+                 startup_timeout=60.0):
+        self.command = list(command)
+        self.env = env
+        self.timeout = timeout  # seconds per job, None waits forever
+        self.startup_timeout = startup_timeout  # seconds to start the MCR
+
+        self._proc = None
+        self._buffer = b''
+        self.last_used = None
+
+        self.start()
+
+    def start(self):
+        try:
+            self._proc = subprocess.Popen(
+                self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                env=self.env)
+        except OSError as err:
+            raise McrWorkerError('The worker cannot be started: {0:s}'
+                                 .format(str(err)))
+        self._buffer = b''
+
+        # the MATLAB Runtime starts before the first response
+        if not self.ping(timeout=self.startup_timeout):
+            self.stop()
+            raise McrWorkerError('The worker does not respond: {0:s}'
+                                 .format(' '.join(self.command)))
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def stop(self):
+        if self._proc is None:
+            return
+
+        try:
+            self._write({'command': 'quit'})
+            self._proc.stdin.close()
+            self._proc.wait(timeout=1)
+        except (OSError, ValueError, McrWorkerError,
+                subprocess.TimeoutExpired):
+            self._proc.kill()
+            self._proc.wait()
+        finally:
+            self._proc.stdout.close()
+            self._proc = None
+
+    def is_alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def ping(self, timeout=None):
+        try:
+            response = self._request({'command': 'ping'}, timeout)
+        except McrWorkerError:
+            return False
+
+        return response.get('status') == 'ok'
+
+    def run(self, args):
+        """
+        Runs a job in the worker
+        :param args: list of arguments of the one-shot call
+        :return: (stdout, stderr) of the job in bytes, stderr is the message
+                 of an "error" response and None otherwise
+        """
+        response = self._request({'command': 'run', 'args': list(args)},
+                                 self.timeout)
+        if response.get('status') not in ['ok', 'error']:
+            raise McrWorkerError('Unexpected response from the worker: '
+                                 '{0:s}'.format(json.dumps(response)))
+
+        stdout = response.get('stdout', '').encode('utf-8')
+        if response['status'] == 'error':
+            return stdout, response.get('message', '').encode('utf-8')
+        return stdout, None
+
+    def _request(self, message, timeout):
+        if not self.is_alive():
+            raise McrWorkerError('The worker is not running.')
+
+        self._write(message)
+        response = self._read_line(timeout)
+        self.last_used = timeit.default_timer()
+
+        try:
+            return json.loads(response.decode('utf-8'))
+        except ValueError:
+            raise McrWorkerError('Unexpected response from the worker: '
+                                 '{0:s}'.format(repr(response)))
+
+    def _write(self, message):
+        try:
+            self._proc.stdin.write(json.dumps(message).encode('utf-8') +
+                                   b'\n')
+            self._proc.stdin.flush()
+        except (OSError, ValueError) as err:  # broken pipe, closed file
+            raise McrWorkerError('The worker does not accept jobs: {0:s}'
+                                 .format(str(err)))
+
+    def _read_line(self, timeout):
+        deadline = None if timeout is None else \
+            timeit.default_timer() + timeout
+        fd = self._proc.stdout.fileno()
+        with selectors.DefaultSelector() as selector:
+            selector.register(fd, selectors.EVENT_READ)
+            while b'\n' not in self._buffer:
+                remaining = None if deadline is None else \
+                    deadline - timeit.default_timer()
+                if remaining is not None and remaining <= 0:
+                    raise McrWorkerError('The worker timed out.')
+                if not selector.select(remaining):
+                    continue
+
+                chunk = os.read(fd, 65536)
+                if not chunk:  # EOF, the worker exited
+                    raise McrWorkerError('The worker exited unexpectedly.')
+                self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+
+
+class McrWorkerPool:
+    """
+    Pool of resident workers of a binary. A job is run by the next idle
+    worker. An idle worker is pinged before its next job if it has not been
+    used for health_check_interval seconds. A worker, which fails a job or
+    the health check, is restarted; it is retired after max_restarts
+    restarts. The failed jobs raise McrWorkerError such that the caller can
+    fall back to the one-shot call. The job itself is not retried in the
+    pool, since it may be the cause of the failure.
+    """
+    def __init__(self, command, num_workers=1, env=None, timeout=600.0,
+                 startup_timeout=60.0, max_restarts=3,
+                 health_check_interval=60.0, health_check_timeout=10.0):
+        self.command = list(command)
+        self.max_restarts = max_restarts
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._num_alive = 0
+        self._num_restarts = {}
+        self._closed = False
+
+        try:
+            for _ in range(num_workers):
+                self._add_worker(McrWorker(
+                    command, env=env, timeout=timeout,
+                    startup_timeout=startup_timeout))
+        except McrWorkerError:
+            self.close()
+            raise
+
+    def _add_worker(self, worker):
+        with self._lock:
+            self._num_restarts[id(worker)] = 0
+            self._num_alive += 1
+        self._idle.put(worker)
+
+    @property
+    def num_alive(self):
+        return self._num_alive
+
+    def run(self, args):
+        worker = self._acquire()
+        try:
+            if self._is_stale(worker) and not worker.ping(
+                    self.health_check_timeout):
+                if not self._restart(worker):
+                    raise McrWorkerError('The worker cannot be restarted.')
+
+            try:
+                return worker.run(args)
+            except McrWorkerError:
+                self._restart(worker)  # for the next jobs
+                raise
+        finally:
+            if self._closed:
+                worker.stop()
+            if worker.is_alive():
+                self._idle.put(worker)
+            else:
+                self._retire(worker)
+
+    def health_check(self):
+        """
+        Pings the idle workers and restarts the unresponsive ones
+        :return: number of live workers
+        """
+        workers = []
+        while True:
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+        for worker in workers:
+            if not worker.ping(self.health_check_timeout):
+                self._restart(worker)
+            if worker.is_alive():
+                self._idle.put(worker)
+            else:
+                self._retire(worker)
+
+        return self.num_alive
+
+    def close(self):
+        self._closed = True  # the busy workers stop after their jobs
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+            self._retire(worker)
+
+    def _acquire(self):
+        while self._num_alive > 0:
+            try:
+                return self._idle.get(timeout=1.0)
+            except queue.Empty:  # all busy, check if any is still alive
+                continue
+
+        raise McrWorkerError('There are no live workers.')
+
+    def _is_stale(self, worker):
+        return (worker.last_used is None or
+                timeit.default_timer() - worker.last_used >
+                self.health_check_interval)
+
+    def _restart(self, worker):
+        with self._lock:
+            num_restarts = self._num_restarts.get(id(worker), 0)
+            self._num_restarts[id(worker)] = num_restarts + 1
+
+        if num_restarts >= self.max_restarts:
+            worker.stop()
+            return False
+
+        try:
+            worker.restart()
+        except McrWorkerError:
+            return False
+
+        return True
+
+    def _retire(self, worker):
+        with self._lock:
+            if self._num_restarts.pop(id(worker), None) is not None:
+                self._num_alive -= 1
@@ -24,11 +24,12 @@
 import warnings
 from urllib.parse import urlparse
 
-import musicbrainzngs
-
+from ..lazyimport import lazy_import
 from .recording import Recording as RecordingMetadata
 from .work import Work as WorkMetadata
 
+musicbrainzngs = lazy_import('musicbrainzngs')  # pylint: disable-msg=C0103
+
 
 class MusicBrainz:
     @classmethod
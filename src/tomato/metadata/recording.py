@@ -23,25 +23,33 @@
 
 import logging
 
-import eyed3
-import musicbrainzngs as mb
-
 from .. import __version__
-from ..io import IO
+from ..lazyimport import lazy_import
+from ..musicdata import MusicData
 from .instrumentation import Instrumentation
 from .work import Work as WorkMetadata
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.WARNING)
 
-# set the agent to communicate with MusicBrainz
-mb.set_useragent("tomato", __version__, "compmusic.upf.edu")
 
-# set logging to report on the error level
-try:  # handle different eyeD3 versions
-    eyed3.utils.log.log.setLevel(logging.ERROR)
-except AttributeError:
-    eyed3.log.setLevel("ERROR")
+def _set_useragent(musicbrainzngs):
+    # set the agent to communicate with MusicBrainz
+    musicbrainzngs.set_useragent("tomato", __version__, "compmusic.upf.edu")
+
+
+def _set_eyed3_log_level(eyed3_module):
+    # set logging to report on the error level
+    try:  # handle different eyeD3 versions
+        eyed3_module.utils.log.log.setLevel(logging.ERROR)
+    except AttributeError:
+        eyed3_module.log.setLevel("ERROR")
+
+
+mb = lazy_import(  # pylint: disable-msg=C0103
+    'musicbrainzngs', on_import=_set_useragent)
+eyed3 = lazy_import(  # pylint: disable-msg=C0103
+    'eyed3', on_import=_set_eyed3_log_level)
 
 
 class Recording:
@@ -142,7 +150,7 @@ class Recording:
 
     @staticmethod
     def _get_key_from_musicbrainz_tag(attr_str, attr_type):
-        attr_dict = IO.load_music_data(attr_type)
+        attr_dict = MusicData.get(attr_type)
         for attr_key, attr_val in attr_dict.items():
             if attr_str in attr_val['mb_tag']:
                 return attr_key
@@ -26,7 +26,7 @@ import json
 import warnings
 from urllib.request import urlopen
 
-from ..io import IO
+from ..musicdata import MusicData
 from .musicbrainz import MusicBrainz
 
 
@@ -78,15 +78,15 @@ class SymbTr:
 
     @staticmethod
     def _get_attribute_key(attr_str, attr_type):
-        attr_dict = IO.load_music_data(attr_type)
-        for attr_key, attr_val in attr_dict.items():
-            if attr_val['symbtr_slug'] == attr_str:
-                return attr_key
-        raise ValueError("Unknown attribute key %s" % attr_str)
+        attr_key, _ = MusicData.get_attribute_by_symbtr_slug(attr_type,
+                                                             attr_str)
+        if attr_key is None:
+            raise ValueError("Unknown attribute key %s" % attr_str)
+        return attr_key
 
     @classmethod
     def validate_key_signature(cls, key_signature, makam_slug, symbtr_name):
-        attr_dict = IO.load_music_data('makam')
+        attr_dict = MusicData.get('makam')
         key_sig_makam = attr_dict[makam_slug]['key_signature']
 
         # the number of accidentals should be the same
@@ -263,21 +263,18 @@ class SymbTr:
 
     @staticmethod
     def _get_attribute(slug, attribute_name):
-        attribute_dict = IO.load_music_data(attribute_name)
+        _, attrib = MusicData.get_attribute_by_symbtr_slug(attribute_name,
+                                                           slug)
 
-        for attrib in attribute_dict.values():
-            if attrib['symbtr_slug'] == slug:
-                return attrib
-
-        # no match
-        return {}
+        # empty dict, if no match
+        return {} if attrib is None else attrib
 
     @classmethod
     def get_mbids_from_symbtr_name(cls, symbtr_name):
-        mbids = []  # extremely rare but there can be more than one mbid
-        for e in cls._read_symbtr_mbid_dict():
-            if e['name'] == symbtr_name:
-                mbids.append(e['uuid'])
+        cls._read_symbtr_mbid_dict()  # make sure the latest table is loaded
+
+        # extremely rare but there can be more than one mbid
+        mbids = list(MusicData.get_mbids_from_symbtr_name(symbtr_name))
         if not mbids:
             warnings.warn("No MBID returned for {0:s}".format(symbtr_name),
                           RuntimeWarning, )
@@ -285,16 +282,19 @@ class SymbTr:
 
     @classmethod
     def get_symbtr_names_from_mbid(cls, mbid):
-        score_work = cls._read_symbtr_mbid_dict()
-        symbtr_names = []
-        for sw in score_work:
-            if mbid in sw['uuid']:
-                symbtr_names.append(sw['name'])
+        cls._read_symbtr_mbid_dict()  # make sure the latest table is loaded
 
-        return symbtr_names
+        return list(MusicData.get_symbtr_names_from_mbid(mbid))
+
+    @classmethod
+    def _read_symbtr_mbid_dict(cls):
+        # github is only queried the first time the table is needed in the
+        # process
+        return MusicData.get('symbTr_mbid',
+                             loader=cls._download_symbtr_mbid_dict)
 
     @staticmethod
-    def _read_symbtr_mbid_dict():
+    def _download_symbtr_mbid_dict():
         try:
             url = "https://raw.githubusercontent.com/MTG/SymbTr/master/" \
                   "symbTr_mbid.json"
@@ -307,4 +307,4 @@ class SymbTr:
             warnings.warn("Cannot reach github to read the latest "
                           "symbtr_mbid.json. Using the back-up "
                           "symbTr_mbid.json included in this repository.")
-            return IO.load_music_data('symbTr_mbid')
+            return MusicData.load_json('symbTr_mbid')
@@ -23,12 +23,17 @@
 
 import warnings
 
-import musicbrainzngs as mb
-
 from .. import __version__
-from ..io import IO
+from ..lazyimport import lazy_import
+from ..musicdata import MusicData
+
+
+def _set_useragent(musicbrainzngs):
+    musicbrainzngs.set_useragent("tomato", __version__, "compmusic.upf.edu")
+
 
-mb.set_useragent("tomato", __version__, "compmusic.upf.edu")
+mb = lazy_import(  # pylint: disable-msg=C0103
+    'musicbrainzngs', on_import=_set_useragent)
 
 
 class Work:
@@ -146,7 +151,7 @@ class Work:
 
     @staticmethod
     def _get_key_from_musicbrainz_attribute(attr_str, attr_type):
-        attr_dict = IO.load_music_data(attr_type)
+        attr_dict = MusicData.get(attr_type)
         for attr_key, attr_val in attr_dict.items():
             if attr_val['dunya_name'] == attr_str:
                 return attr_key
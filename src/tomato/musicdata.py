@@ -0,0 +1,210 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+import json
+import os
+import threading
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary. It is a dict subclass so that it can be used
+    wherever a dictionary is expected, e.g. serialized to JSON or pickled.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("The music data is read-only. Use "
+                        "IO.load_music_data to get a modifiable copy.")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class MusicData:
+    """
+    Process-wide, read-only registry of the tables in the "music_data"
+    folder. Each table is parsed once and returned as nested FrozenDict's
+    and tuples. The commonly searched relations are indexed.
+    """
+    _tables = {}
+    _indexes = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, name, loader=None):
+        """
+        Returns the read-only view of a music data table
+        :param name: name of the table, e.g. "makam" for "makam.json"
+        :param loader: optional function returning the parsed table. It is
+                       only called if the table has not been loaded yet
+        :return: the table as nested FrozenDict's and tuples
+        """
+        try:
+            return cls._tables[name]
+        except KeyError:
+            pass
+
+        with cls._lock:
+            if name not in cls._tables:
+                table = cls.load_json(name) if loader is None else loader()
+                cls._tables[name] = cls.freeze(table)
+
+        return cls._tables[name]
+
+    @staticmethod
+    def load_json(name):
+        filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'music_data', name + '.json')
+        with open(filepath, encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def freeze(cls, obj):
+        if isinstance(obj, dict):
+            return FrozenDict((k, cls.freeze(v)) for k, v in obj.items())
+        if isinstance(obj, (list, tuple)):
+            return tuple(cls.freeze(v) for v in obj)
+        return obj
+
+    @classmethod
+    def thaw(cls, obj):
+        if isinstance(obj, dict):
+            return dict((k, cls.thaw(v)) for k, v in obj.items())
+        if isinstance(obj, (list, tuple)):
+            return [cls.thaw(v) for v in obj]
+        return obj
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._tables.clear()
+            cls._indexes.clear()
+
+    @classmethod
+    def _get_index(cls, name, builder):
+        try:
+            return cls._indexes[name]
+        except KeyError:
+            pass
+
+        with cls._lock:
+            if name not in cls._indexes:
+                cls._indexes[name] = builder()
+
+        return cls._indexes[name]
+
+    @classmethod
+    def get_note_cents(cls):
+        """
+        Returns the mapping from the note symbols to their cent values
+        with respect to C0
+        """
+        return cls._get_index('note_cents', lambda: FrozenDict(
+            (n, val['Value']) for n, val in cls.get('note').items()))
+
+    @classmethod
+    def get_note_cent(cls, note_symbol):
+        return cls.get_note_cents()[note_symbol]
+
+    @classmethod
+    def get_extended_key_signature(cls, makam):
+        """
+        Returns the accidentals in the key signature of the makam extended
+        to all the octaves in the note table
+        :param makam: makam slug
+        :return: tuple of note symbols
+        """
+        return cls._get_index(
+            'extended_key_signatures',
+            cls._build_extended_key_signatures)[makam]
+
+    @classmethod
+    def _build_extended_key_signatures(cls):
+        notes = list(cls.get('note').keys())
+
+        extended_key_signatures = {}
+        for makam, val in cls.get('makam').items():
+            # same pitch class: same note letter and accidental
+            pitch_classes = set(ks[0] + ks[2:] for ks in val['key_signature'])
+            key_signature = set(val['key_signature'])
+            key_signature.update(n for n in notes
+                                 if n[0] + n[2:] in pitch_classes)
+            extended_key_signatures[makam] = tuple(sorted(key_signature))
+
+        return FrozenDict(extended_key_signatures)
+
+    @classmethod
+    def _build_symbtr_mbid_index(cls):
+        name_to_mbids = {}
+        mbid_to_names = {}
+        for entry in cls.get('symbTr_mbid'):
+            name_to_mbids.setdefault(entry['name'], []).append(entry['uuid'])
+            mbid_to_names.setdefault(entry['uuid'], []).append(entry['name'])
+
+        return cls.freeze({'name': name_to_mbids, 'mbid': mbid_to_names})
+
+    @classmethod
+    def get_mbids_from_symbtr_name(cls, symbtr_name):
+        """
+        Returns the MusicBrainz work or recording URLs of a SymbTr score
+        :param symbtr_name: SymbTr score name
+        :return: tuple of URLs, empty if the score is not in the table
+        """
+        return cls._get_index('symbtr_mbid', cls._build_symbtr_mbid_index)[
+            'name'].get(symbtr_name, ())
+
+    @classmethod
+    def get_symbtr_names_from_mbid(cls, mbid):
+        """
+        Returns the SymbTr scores of a MusicBrainz work or recording
+        :param mbid: MBID or the MusicBrainz URL
+        :return: tuple of SymbTr score names
+        """
+        index = cls._get_index('symbtr_mbid', cls._build_symbtr_mbid_index)[
+            'mbid']
+        try:  # MusicBrainz URL
+            return index[mbid]
+        except KeyError:  # MBID, which is part of the URL
+            return tuple(name for url, names in index.items() if mbid in url
+                         for name in names)
+
+    @classmethod
+    def get_attribute_by_symbtr_slug(cls, attribute_name, slug):
+        """
+        Returns the key and the entry of a makam, form or usul
+        :param attribute_name: "makam", "form" or "usul"
+        :param slug: the SymbTr slug of the attribute
+        :return: (key, entry), (None, None) if the slug is not in the table
+        """
+        index = cls._get_index(
+            'symbtr_slug--' + attribute_name, lambda: FrozenDict(
+                (val['symbtr_slug'], key) for key, val in reversed(list(
+                    cls.get(attribute_name).items()))))
+
+        try:
+            key = index[slug]
+            return key, cls.get(attribute_name)[key]
+        except KeyError:
+            return None, None
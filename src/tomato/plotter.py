@@ -24,13 +24,16 @@
 import copy
 import logging
 
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib import gridspec
-from matplotlib.ticker import FixedLocator
 
+from .audio.pitchtrack import PitchTrack
 from .audio.seyir import Seyir as AudioSeyirAnalyzer
+from .lazyimport import lazy_import
+
+gridspec = lazy_import('matplotlib.gridspec')  # pylint: disable-msg=C0103
+patches = lazy_import('matplotlib.patches')  # pylint: disable-msg=C0103
+plt = lazy_import('matplotlib.pyplot')  # pylint: disable-msg=C0103
+ticker = lazy_import('matplotlib.ticker')  # pylint: disable-msg=C0103
 
 logger = logging.Logger(  # pylint: disable-msg=C0103
     __name__, level=logging.INFO)
@@ -103,7 +106,7 @@ class Plotter:
 
     @staticmethod
     def _parse_pitch(pitch_in):
-        if isinstance(pitch_in, np.ndarray):  # numpy array
+        if isinstance(pitch_in, (np.ndarray, PitchTrack)):
             # copy.deepcopy(np.ndarray) might result in an annoying Deprecated
             # warning, this is cleaner
             pitch = np.copy(pitch_in)
@@ -287,7 +290,7 @@ class Plotter:
 
             ax1.set_xticks(xgrid_locs, minor=True)
             ax1.xaxis.grid(True, which='minor')
-            ax1.xaxis.set_major_locator(FixedLocator(
+            ax1.xaxis.set_major_locator(ticker.FixedLocator(
                 xgrid_locs, nbins=len(xgrid_locs) / 2 + 1))
 
             plt.setp(ax4.get_yticklabels(), visible=False)
@@ -406,8 +409,9 @@ class Plotter:
                             format(tonic_symbol, tonic['value']))
 
         if tempo is not None:
-            anno_str.append('Av. Tempo: {0:d} bpm'.
-                            format(int(tempo['average']['value'])))
+            if tempo['average']['value'] is not None:  # e.g. serbest usul
+                anno_str.append('Av. Tempo: {0:d} bpm'.
+                                format(int(tempo['average']['value'])))
 
             rel_tempo_percentage = int(100 * (tempo['relative']['value'] - 1))
             anno_str.append('Performed {0:d}% faster'.
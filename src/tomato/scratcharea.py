@@ -0,0 +1,131 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+import os
+import shutil
+import tempfile
+import threading
+
+
+class ScratchArea:
+    """
+    Temporary folder of a job, e.g. the analysis of a recording, to hand the
+    inputs to the binaries and to collect their outputs. Each named
+    artifact is written once and shared by the calls in the job. The folder
+    is created on tmpfs (/dev/shm) when available.
+
+    The folder exists inside the "with" block and it is removed, with
+    everything in it, when the block exits. The blocks can be nested; the
+    folder is removed when the outermost block exits:
+
+        with ScratchArea() as scratch:
+            pitch_file = scratch.write_once('pitch.mat', serialize_pitch)
+            out_folder = scratch.make_dir('out')
+    """
+    _tmpfs_root = '/dev/shm'
+
+    def __init__(self, root=None):
+        self.root = root  # parent folder, default: tmpfs or system temp
+        self.path = None
+
+        self._artifacts = {}
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_default_root(cls):
+        if os.path.isdir(cls._tmpfs_root) and \
+                os.access(cls._tmpfs_root, os.W_OK):
+            return cls._tmpfs_root
+
+        return tempfile.gettempdir()
+
+    def __enter__(self):
+        with self._lock:
+            if self._depth == 0:
+                root = self.get_default_root() if self.root is None \
+                    else self.root
+                self.path = tempfile.mkdtemp(prefix='tomato-', dir=root)
+            self._depth += 1
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self._depth -= 1
+            if self._depth == 0:
+                self.cleanup()
+
+    def cleanup(self):
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+        self.path = None
+        self._artifacts = {}
+
+    def write(self, name, content):
+        """
+        Writes an artifact into the scratch area, overwriting the previous
+        content
+        :param name: file name of the artifact
+        :param content: str or bytes
+        :return: path of the artifact
+        """
+        self._check_entered()
+
+        filepath = os.path.join(self.path, name)
+        open_mode = 'wb' if isinstance(content, bytes) else 'w'
+        with open(filepath, open_mode) as f:
+            f.write(content)
+        self._artifacts[name] = filepath
+
+        return filepath
+
+    def write_once(self, name, producer):
+        """
+        Writes an artifact, unless it is already in the scratch area
+        :param name: file name of the artifact
+        :param producer: function returning the content (str or bytes). It is
+                         only called if the artifact is not written yet
+        :return: path of the artifact
+        """
+        with self._lock:
+            try:
+                return self._artifacts[name]
+            except KeyError:
+                return self.write(name, producer())
+
+    def make_dir(self, name):
+        """
+        Creates a new, empty folder in the scratch area, e.g. for the outputs
+        of a binary
+        :param name: prefix of the folder name
+        :return: path of the folder
+        """
+        self._check_entered()
+
+        return tempfile.mkdtemp(prefix=name + '-', dir=self.path)
+
+    def _check_entered(self):
+        if self.path is None:
+            raise RuntimeError('The scratch area is only available inside '
+                               'its "with" block.')
@@ -0,0 +1,138 @@
+# Copyright 2016 - 2018 Sertan Şentürk
+#
+# This file is part of tomato: https://github.com/sertansenturk/tomato/
+#
+# tomato is free software: you can redistribute it and/or modify it under
+# the terms of the GNU Affero General Public License as published by the Free
+# Software Foundation (FSF), either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Affero General Public License v3.0
+# along with this program. If not, see http://www.gnu.org/licenses/
+#
+# If you are using this extractor please cite the following thesis:
+#
+# Şentürk, S. (2016). Computational analysis of audio recordings and music
+# scores for the description and discovery of Ottoman-Turkish makam music.
+# PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
+
+
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class StageGraph:
+    """
+    Declarative graph of the stages of an analysis. Each stage names the
+    stages (or the inputs, e.g. the audio file) it is computed from:
+
+        graph = StageGraph([('pitch', ['audio']),
+                            ('pitch_filtered', ['pitch']),
+                            ('tonic', ['pitch_filtered']),
+                            ('melodic_progression', ['pitch_filtered'])])
+
+    The stages are given in an order of computation. The run method calls
+    the stages, whose upstream stages are computed, concurrently in a thread
+    pool, e.g. tonic and melodic_progression above. The names, which are
+    not stages, are the inputs of the graph.
+    """
+    def __init__(self, stages):
+        self.stages = OrderedDict(stages)
+
+        for name, upstream in self.stages.items():
+            if any(u in self.stages and list(self.stages).index(u) >=
+                   list(self.stages).index(name) for u in upstream):
+                raise ValueError('The upstream stages of {0:s} should be '
+                                 'given before it.'.format(name))
+
+    def __contains__(self, name):
+        return name in self.stages
+
+    def __iter__(self):
+        return iter(self.stages)
+
+    def __getitem__(self, name):
+        return self.stages[name]
+
+    def get_upstream(self, names):
+        """
+        Returns the stages needed to compute the given stages, i.e. the
+        stages and their upstream stages, in the order of computation
+        :param names: list of stage names
+        :return: list of stage names
+        """
+        needed = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages.get(name, []))
+
+        return [name for name in self.stages if name in needed]
+
+    def get_downstream(self, names):
+        """
+        Returns the given stages and the stages computed from them, in the
+        order of computation
+        :param names: list of stage names
+        :return: list of stage names
+        """
+        downstream = set(names)
+        for name, upstream in self.stages.items():
+            if any(u in downstream for u in upstream):
+                downstream.add(name)
+
+        return [name for name in self.stages if name in downstream]
+
+    def run(self, compute, results, names=None, num_workers=1):
+        """
+        Computes the stages
+        :param compute: function(name) returning the output of the stage. It
+                        reads the outputs of the upstream stages from results
+        :param results: dictionary, where the output of each stage is stored
+                        as soon as it is computed
+        :param names: the stages to compute, in the order of computation.
+                      None for all the stages. The upstream stages, which are
+                      not in names, are assumed to be in results already
+        :param num_workers: number of the stages computed at the same time.
+                            1 computes them one by one in the given order
+        :return: results
+        """
+        names = list(self.stages) if names is None else list(names)
+        if num_workers == 1:
+            for name in names:
+                results[name] = compute(name)
+            return results
+
+        pending = OrderedDict((name, set(u for u in self.stages[name]
+                                         if u in names))
+                              for name in names)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            running = {}
+            while pending or running:
+                for name in [n for n, upstream in pending.items()
+                             if not upstream]:
+                    del pending[name]
+                    running[executor.submit(compute, name)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException:
+                        # do not start the remaining stages; the executor
+                        # waits for the running ones before re-raising
+                        pending.clear()
+                        raise
+
+                    for upstream in pending.values():
+                        upstream.discard(name)
+
+        return results
@@ -2,12 +2,13 @@
 import os
 import warnings
 
-import pandas as pd
-
-from ....io import IO
+from ....lazyimport import lazy_import
+from ....musicdata import MusicData
 from ..dataextractor import DataExtractor
 from ..reader.mu2 import Mu2Reader
 
+pd = lazy_import('pandas')  # pylint: disable-msg=C0103
+
 
 class Txt:
     symbtr_cols = ['Sira', 'Kod', 'Nota53', 'NotaAE', 'Koma53', 'KomaAE',
@@ -39,7 +40,7 @@ class Txt:
     def _parse_usul_dict():
         mu2_usul_dict = {}
         inv_mu2_usul_dict = {}
-        usul_dict = IO.load_music_data('usul')
+        usul_dict = MusicData.get('usul')
         for _, val in usul_dict.items():
             for vrt in val['variants']:
                 if vrt['mu2_name']:  # if it doesn't have a mu2 name, the usul
@@ -261,7 +262,7 @@ class Txt:
 
     @staticmethod
     def _get_usul_variant(data):
-        usul_dict = IO.load_music_data('usul')
+        usul_dict = MusicData.get('usul')
         vrts = usul_dict[data['usul']['symbtr_slug']]['variants']
         for v in vrts:
             if v['mu2_name'] == data['usul']['mu2_name']:
@@ -272,7 +273,7 @@ class Txt:
 
     @staticmethod
     def _get_zaman_mertebe(data):
-        usul_dict = IO.load_music_data('usul')
+        usul_dict = MusicData.get('usul')
         for usul in usul_dict.values():
             for uv in usul['variants']:
                 if uv['mu2_name'] == data['usul']['mu2_name']:
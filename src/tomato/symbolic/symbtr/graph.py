@@ -21,10 +21,13 @@
 # scores for the description and discovery of Ottoman-Turkish makam music.
 # PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
 
-import Levenshtein
-import networkx as nx
 from numpy import matrix
 
+from ...lazyimport import lazy_import
+
+Levenshtein = lazy_import('Levenshtein')  # pylint: disable-msg=C0103
+nx = lazy_import('networkx')  # pylint: disable-msg=C0103
+
 
 class GraphOperations:
     _metrics = ['norm_levenshtein']
@@ -23,7 +23,7 @@
 
 import warnings
 
-from ...io import IO
+from ...musicdata import MusicData
 
 
 class RhythmicFeatureExtractor:
@@ -31,7 +31,7 @@ class RhythmicFeatureExtractor:
     def extract_rhythmic_structure(cls, score):
         usul_bounds = [ii for ii, code in enumerate(score['code'])
                        if code == 51]
-        usul_dict = IO.load_music_data('usul')
+        usul_dict = MusicData.get('usul')
 
         rhythmic_structure = []
         for ii, ub in enumerate(usul_bounds):
@@ -26,7 +26,7 @@ from copy import deepcopy
 
 import numpy as np
 
-from ...io import IO
+from ...musicdata import MusicData
 
 
 class ScoreProcessor:
@@ -70,7 +70,7 @@ class ScoreProcessor:
     def get_all_symbtr_labels():
         all_labels = [
             sl
-            for sub_list in IO.load_music_data('symbtr_labels').values()
+            for sub_list in MusicData.get('symbtr_labels').values()
             for sl in sub_list]
 
         return all_labels
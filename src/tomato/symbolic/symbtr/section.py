@@ -25,6 +25,7 @@ import warnings
 from math import floor
 
 from ...io import IO
+from ...musicdata import MusicData
 from .graph import GraphOperations
 from .offset import OffsetProcessor
 from .scoreprocessor import ScoreProcessor
@@ -102,7 +103,7 @@ class SectionExtractor:
     def _get_structure_labels(self):
         all_labels = ScoreProcessor.get_all_symbtr_labels()
         struct_lbl = all_labels if self.extract_all_labels else \
-            IO.load_music_data('symbtr_labels')['structure']
+            MusicData.get('symbtr_labels')['structure']
         return all_labels, struct_lbl
 
     def from_musicxml_score(self, score):
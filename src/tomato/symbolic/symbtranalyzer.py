@@ -22,8 +22,10 @@
 # PhD thesis, Universitat Pompeu Fabra, Barcelona, Spain.
 
 import json
+import logging
 import os
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 
 from ..analyzer import Analyzer
 from ..bincaller import BinCaller
@@ -36,8 +38,8 @@ from .symbtr.rhythmicfeature import RhythmicFeatureExtractor
 from .symbtr.section import SectionExtractor
 from .symbtr.segment import SegmentExtractor
 
-# instantiate a mcr_caller
-_mcr_caller = BinCaller()  # pylint: disable-msg=C0103
+logger = logging.Logger(  # pylint: disable-msg=C0103
+    __name__, level=logging.INFO)
 
 
 class SymbTrAnalyzer(Analyzer):
@@ -45,15 +47,29 @@ class SymbTrAnalyzer(Analyzer):
                'segment_boundaries', 'segments', 'rhythmic_structure',
                'score', 'is_data_valid']
 
-    def __init__(self, verbose=False):
-        super(SymbTrAnalyzer, self).__init__(verbose=verbose)
+    def __init__(self, verbose=False, cache=None):
+        super(SymbTrAnalyzer, self).__init__(verbose=verbose, cache=cache)
 
         # extractors
         self._data_extractor = DataExtractor(print_warnings=verbose)
-        self._phrase_segmenter = _mcr_caller.get_mcr_binary_path('phraseSeg')
+        self._mcr_caller = BinCaller.get_default()
+        self._phrase_segmenter = self._mcr_caller.get_mcr_binary_path(
+            'phraseSeg')
         self._section_extractor = SectionExtractor()
         self._segment_extractor = SegmentExtractor()
 
+    def start_mcr_workers(self, num_workers=1, **kwargs):
+        """
+        Keeps the phrase segmentation binary resident in num_workers
+        workers instead of starting it for every call. See
+        BinCaller.start_workers
+        """
+        return self._mcr_caller.start_workers(
+            self._phrase_segmenter, num_workers=num_workers, **kwargs)
+
+    def stop_mcr_workers(self):
+        self._mcr_caller.stop_workers(self._phrase_segmenter)
+
     def analyze(self, txt_filepath, mu2_filepath=None, symbtr_name=None,
                 **kwargs):
         score_data = self._parse_inputs(**kwargs)
@@ -105,9 +121,11 @@ class SymbTrAnalyzer(Analyzer):
         score_data['phrase_annotations'] = anno_phrases
 
         # Automatic phrase segmentation on the SymbTr-txt score
-        score_data['segment_boundaries'] = self._partial_caller(
+        score_data['segment_boundaries'] = self._cached_caller(
+            self._get_input_keys(txt_filepath), 'segment_boundaries',
             score_data['segment_boundaries'], self.segment_phrase,
-            txt_filepath, symbtr_name=symbtr_name)
+            txt_filepath, symbtr_name, params={'symbtr_name': symbtr_name},
+            upstream=['txt'])
         if score_data['segment_boundaries'] is None:
             score_data['segment_boundaries'] = {'boundary_beat': None,
                                                 'boundary_note_idx': None}
@@ -140,39 +158,133 @@ class SymbTrAnalyzer(Analyzer):
         if symbtr_name is None:
             symbtr_name = os.path.basename(txt_filename)
 
+        phrase_boundaries = self._segment_phrase_batch(
+            [(txt_filename, symbtr_name)])[0]
+
+        # print elapsed time, if verbose
+        self.vprint_time(tic, timeit.default_timer())
+
+        return phrase_boundaries
+
+    def segment_phrases(self, txt_filenames, symbtr_names=None,
+                        num_shards=1):
+        """
+        Automatic phrase segmentation on many SymbTr-txt files. The scores
+        are segmented in num_shards calls of the binary, which are run in
+        parallel, instead of a call per score. If the analyzer has a cache,
+        the boundaries already in the cache are reused and the new ones are
+        stored such that the analyze method picks them up. Alternatively,
+        the boundaries can be passed to analyze as "segment_boundaries".
+        :param txt_filenames: list of SymbTr-txt file paths
+        :param symbtr_names: list of SymbTr names, by default the filenames
+                             without the extension as in analyze
+        :param num_shards: number of parallel calls of the binary
+        :return: list of the segment boundaries in the order of the files,
+                 None for the scores, which could not be segmented
+        """
+        tic = timeit.default_timer()
+        self.vprint("- Automatic phrase segmentation on {0:d} SymbTr-txt "
+                    "files".format(len(txt_filenames)))
+
+        if symbtr_names is None:
+            symbtr_names = [os.path.splitext(os.path.basename(txt))[0]
+                            for txt in txt_filenames]
+        scores = list(zip(txt_filenames, symbtr_names))
+
+        phrase_boundaries = [None] * len(scores)
+        cache_keys = [None] * len(scores)
+        uncached_idx = []
+        for ii, (txt_filename, symbtr_name) in enumerate(scores):
+            if self.cache is not None:
+                cache_keys[ii] = self.cache.make_key(
+                    'segment_boundaries', params={'symbtr_name': symbtr_name},
+                    upstream_keys=[self.cache.hash_file(txt_filename)])
+                try:
+                    phrase_boundaries[ii] = self.cache.get(cache_keys[ii])
+                    continue
+                except KeyError:
+                    pass
+            uncached_idx.append(ii)
+
+        num_shards = max(min(num_shards, len(uncached_idx)), 1)
+        shards = [uncached_idx[jj * len(uncached_idx) // num_shards:
+                               (jj + 1) * len(uncached_idx) // num_shards]
+                  for jj in range(num_shards)]
+        shards = [shard for shard in shards if shard]
+        with ThreadPoolExecutor(max_workers=num_shards) as executor:
+            futures = [executor.submit(self._segment_phrase_batch,
+                                       [scores[ii] for ii in shard])
+                       for shard in shards]
+            for shard, future in zip(shards, futures):
+                try:
+                    shard_boundaries = future.result()
+                except RuntimeError:
+                    logger.exception('Phrase segmentation failed for {0:s}.'
+                                     .format(', '.join(scores[ii][0]
+                                                       for ii in shard)))
+                    continue
+
+                for ii, boundaries in zip(shard, shard_boundaries):
+                    phrase_boundaries[ii] = boundaries
+                    if self.cache is not None:
+                        self.cache.set(cache_keys[ii], boundaries)
+
+        # print elapsed time, if verbose
+        self.vprint_time(tic, timeit.default_timer())
+
+        return phrase_boundaries
+
+    def _segment_phrase_batch(self, scores):
         # create the temporary input and output files wanted by the binary
-        temp_in_file = IO.create_temp_file(
-            '.json', json.dumps([{'path': txt_filename, 'name': symbtr_name}]))
+        temp_in_file = IO.create_temp_file('.json', json.dumps(
+            [{'path': txt_filename, 'name': symbtr_name}
+             for txt_filename, symbtr_name in scores]))
         temp_out_file = IO.create_temp_file('.json', '')
 
         # get the pretrained model
         bound_stat_file, fld_model_file = self._get_phrase_seg_training()
 
-        # call the binary
-        callstr = [u'"{0:s}" "segmentWrapper" "{1:s}" "{2:s}" "{3:s}" "{4:s}"'
-                   ''.format(self._phrase_segmenter, bound_stat_file,
-                             fld_model_file, temp_in_file, temp_out_file)]
-
-        out, err = _mcr_caller.call(callstr)
-        out = out.decode("utf-8")  # convert from byte to urf-8 str
-
-        # check the MATLAB output,
-        # The prints are in segmentWrapper function in the MATLAB code
-        if "segmentation complete!" not in out:
+        try:
+            # call the binary
+            out, err = self._mcr_caller.call_binary(
+                self._phrase_segmenter,
+                ['segmentWrapper', bound_stat_file, fld_model_file,
+                 temp_in_file, temp_out_file])
+            out = out.decode("utf-8")  # convert from byte to urf-8 str
+
+            # check the MATLAB output,
+            # The prints are in segmentWrapper function in the MATLAB code
+            if "segmentation complete!" not in out:
+                raise RuntimeError("Phrase segmentation is not successful. "
+                                   "Please check the error in the terminal.")
+
+            # load the results from the temporary file
+            with open(temp_out_file) as f:
+                try:
+                    phrase_boundaries = json.load(f)
+                except ValueError as e:
+                    raise RuntimeError("Phrase segmentation returned an "
+                                       "invalid output: {0:s}".format(str(e)))
+        finally:
+            # unlink the temporary files
             IO.remove_temp_files(temp_in_file, temp_out_file)
-            raise RuntimeError("Phrase segmentation is not successful. Please "
-                               "check the error in the terminal.")
 
-        # load the results from the temporary file
-        phrase_boundaries = json.load(open(temp_out_file))
+        # the boundaries of a single score are written as an object, the
+        # boundaries of many scores as a list in the input order
+        if isinstance(phrase_boundaries, dict):
+            phrase_boundaries = [phrase_boundaries]
+        if len(phrase_boundaries) != len(scores):
+            raise RuntimeError("Phrase segmentation returned {0:d} results "
+                               "for {1:d} scores.".format(
+                                   len(phrase_boundaries), len(scores)))
 
-        # unlink the temporary files
-        IO.remove_temp_files(temp_in_file, temp_out_file)
+        return phrase_boundaries
 
-        # print elapsed time, if verbose
-        self.vprint_time(tic, timeit.default_timer())
+    def _get_input_keys(self, txt_filepath):
+        if self.cache is None:
+            return {}
 
-        return phrase_boundaries
+        return {'txt': self.cache.hash_file(txt_filepath)}
 
     @staticmethod
     def _get_phrase_seg_training():
@@ -26,10 +26,9 @@ import re
 import subprocess
 import tempfile
 
-import musicbrainzngs
-
 from ..bincaller import BinCaller
 from ..io import IO
+from ..lazyimport import lazy_import
 from ..metadata.musicbrainz import MusicBrainz
 from ..metadata.symbtr import SymbTr as SymbTrMetadata
 from .symbtr.converter.musicxml2lilypond import \
@@ -37,7 +36,7 @@ from .symbtr.converter.musicxml2lilypond import \
 from .symbtr.converter.symbtr2musicxml import symbtr2musicxml
 from .symbtr.reader.symbtr import SymbTrReader
 
-_bin_caller = BinCaller()  # pylint: disable-msg=C0103
+musicbrainzngs = lazy_import('musicbrainzngs')  # pylint: disable-msg=C0103
 
 
 class SymbTrConverter:
@@ -97,7 +96,8 @@ class SymbTrConverter:
 
         try:
             # 4. call MusikiToMusicXml ...
-            bin_path = _bin_caller.get_musikitomusicxml_binary_path()
+            bin_path = \
+                BinCaller.get_default().get_musikitomusicxml_binary_path()
 
             callstr = '{0:s} {1:s} {2:s} {3:s}'.format(bin_path, temp_in_file,
                                                        flag_str, midi_str)
@@ -194,7 +194,7 @@ class SymbTrConverter:
         tmp_dir = tempfile.mkdtemp()
 
         # call lilypond ...
-        lilypond_path = _bin_caller.get_lilypond_bin_path()
+        lilypond_path = BinCaller.get_default().get_lilypond_bin_path()
         callstr = '{0:s} -dpaper-size=\\"{1:s}\\" -dbackend=svg ' \
                   '-o {2:s} {3:s}'.format(lilypond_path, paper_size, tmp_dir,
                                           temp_in_file)
@@ -0,0 +1,47 @@
+import numpy as np
+
+import pytest
+from tomato.audio.makamtonic.knn import KNN
+from tomato.audio.pitchdistribution import PitchDistribution
+
+
+def _random_pcds(num_distribs, seed):
+    rand = np.random.RandomState(seed)
+    bins = np.arange(0, 1200, 7.5)
+
+    pcds = []
+    for _ in range(num_distribs):
+        vals = rand.rand(len(bins)) + 1e-3
+        pcds.append(PitchDistribution(bins, vals / np.sum(vals),
+                                      kernel_width=7.5, ref_freq=220.0))
+    return pcds
+
+
+@pytest.mark.parametrize("distance_method", [
+    "bhat", "l1", "l2", "l3", "jeffrey", "js", "dis_intersect", "dis_corr"])
+def test_generate_distance_matrix_pcd_same_as_pairwise(distance_method):
+    # GIVEN
+    test_distrib, *training_distribs = _random_pcds(21, seed=0)
+    peak_idx = np.array([0, 3, 47, 100, 159])
+
+    # WHEN
+    result = KNN.generate_distance_matrix(
+        test_distrib, peak_idx, training_distribs,
+        distance_method=distance_method)
+
+    # THEN
+    expected = KNN._generate_distance_matrix_pairwise(
+        test_distrib, peak_idx, training_distribs,
+        distance_method=distance_method)
+    np.testing.assert_allclose(result, expected)
+
+
+def test_generate_pcd_distance_matrix_unknown_method():
+    # GIVEN
+    test_distrib, *training_distribs = _random_pcds(3, seed=1)
+    training_vals = KNN.stack_pcd_vals(test_distrib, training_distribs)
+
+    # WHEN; THEN
+    with pytest.raises(ValueError):
+        KNN.generate_pcd_distance_matrix(
+            test_distrib, [0], training_vals, distance_method="unknown")
@@ -0,0 +1,69 @@
+import numpy as np
+
+from tomato.audio.makamtonic.knn import KNN
+from tomato.audio.makamtonic.knnclassifier import KNNClassifier
+from tomato.audio.pitchdistribution import PitchDistribution
+
+
+def _random_model(num_distribs, seed):
+    rand = np.random.RandomState(seed)
+    bins = np.arange(0, 1200, 7.5)
+    modes = ['hicaz', 'rast', 'ussak']
+
+    model = []
+    for i in range(num_distribs):
+        vals = rand.rand(len(bins)) + 1e-3
+        feature = PitchDistribution(bins, vals / np.sum(vals),
+                                    kernel_width=15.0, ref_freq=220.0)
+        model.append({'feature': feature, 'mode': modes[i % len(modes)],
+                      'tonic': 220.0, 'source': str(i)})
+    return model
+
+
+def test_compiled_model_round_trip(tmpdir):
+    # GIVEN
+    model = _random_model(9, seed=0)
+    folder = str(tmpdir.join('compiled'))
+
+    # WHEN
+    KNNClassifier.model_to_compiled(model, folder)
+    classifier = KNNClassifier()
+    classifier.model_from_compiled(folder)
+
+    # THEN
+    assert len(classifier.model) == len(model)
+    for result, expected in zip(classifier.model, model):
+        assert result['mode'] == expected['mode']
+        assert result['source'] == expected['source']
+        np.testing.assert_allclose(result['feature'].bins,
+                                   expected['feature'].bins)
+        np.testing.assert_allclose(result['feature'].vals,
+                                   expected['feature'].vals)
+
+
+def test_compiled_model_estimation_same_as_model(tmpdir, monkeypatch):
+    # GIVEN
+    model = _random_model(30, seed=1)
+    test_feature = _random_model(1, seed=2)[0]['feature']
+    test_feature.cent_to_hz()
+    folder = str(tmpdir.join('compiled'))
+    KNNClassifier.model_to_compiled(model, folder)
+
+    # WHEN
+    compiled_classifier = KNNClassifier()
+    compiled_classifier.model_from_compiled(folder, mmap_mode='r')
+    result = compiled_classifier.estimate_joint(test_feature, rank=3)
+
+    # THEN
+    # the list of training features compared one by one, as before the
+    # compiled model
+    classifier = KNNClassifier(model=model)
+    monkeypatch.setattr(classifier, '_get_training_model', lambda mode: (
+        [m['feature'] for m in model], np.array([m['mode'] for m in model])))
+    monkeypatch.setattr(KNN, 'generate_distance_matrix',
+                        KNN._generate_distance_matrix_pairwise)
+    expected = classifier.estimate_joint(test_feature, rank=3)
+
+    assert [r[0] for r in result] == [e[0] for e in expected]
+    np.testing.assert_allclose([r[1] for r in result],
+                               [e[1] for e in expected])
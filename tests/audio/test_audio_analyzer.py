@@ -0,0 +1,116 @@
+import numpy as np
+
+from tomato.audio.audioanalyzer import AudioAnalyzer
+from tomato.featurecache import FeatureCache
+
+
+def _synth_pitch_features(filename):
+    rand = np.random.RandomState(0)
+    time_stamps = np.arange(3000) * 128 / 44100.0
+    pitch = 220.0 * 2 ** (rand.choice([0, 200, 500, 700], 3000) / 1200.0)
+    return {'pitch': np.transpose([time_stamps, pitch, np.ones(3000)]),
+            'source': filename}
+
+
+def test_analyze_reuses_cached_pitch(tmpdir, monkeypatch):
+    # GIVEN
+    audio_file = tmpdir.join('audio.mp3')
+    audio_file.write('audio content')
+    cache = FeatureCache(str(tmpdir.join('cache')))
+
+    extracted = []
+
+    def extract_pitch(filename):
+        extracted.append(filename)
+        return _synth_pitch_features(filename)
+
+    # WHEN
+    results = []
+    for min_chunk_size in [40, 40, 60]:
+        analyzer = AudioAnalyzer(cache=cache)
+        monkeypatch.setattr(analyzer, 'extract_pitch', extract_pitch)
+        analyzer.set_pitch_filter_params(min_chunk_size=min_chunk_size)
+        results.append(analyzer.analyze(
+            str(audio_file), metadata=False, makam='ussak',
+            melodic_progression=False))
+
+    # THEN
+    assert extracted == [str(audio_file)]  # extracted only once
+    np.testing.assert_array_equal(results[0]['pitch_filtered']['pitch'],
+                                  results[1]['pitch_filtered']['pitch'])
+    assert results[0]['tonic'] == results[1]['tonic']
+
+
+def _record_calls(analyzer, monkeypatch, method_names):
+    called = []
+    for method_name in method_names:
+        def record(*args, method=getattr(analyzer, method_name),
+                   method_name=method_name):
+            called.append(method_name)
+            return method(*args)
+        monkeypatch.setattr(analyzer, method_name, record)
+
+    return called
+
+
+def test_analyze_computes_only_upstream_of_outputs(monkeypatch):
+    # GIVEN
+    analyzer = AudioAnalyzer()
+    monkeypatch.setattr(analyzer, 'extract_pitch', _synth_pitch_features)
+    called = _record_calls(analyzer, monkeypatch, [
+        'filter_pitch', 'identify_tonic', 'compute_pitch_distribution',
+        'get_makams', 'compute_melodic_progression'])
+
+    # WHEN
+    features = analyzer.analyze('audio.mp3', outputs=['tonic'])
+
+    # THEN
+    assert called == ['filter_pitch', 'identify_tonic']
+    assert features['tonic']['source'] == 'audio.mp3'
+    assert features['makam'] is None
+
+
+def test_analyze_lazy_computes_on_access(monkeypatch):
+    # GIVEN
+    analyzer = AudioAnalyzer()
+    monkeypatch.setattr(analyzer, 'extract_pitch', _synth_pitch_features)
+    called = _record_calls(analyzer, monkeypatch, [
+        'filter_pitch', 'identify_tonic', 'compute_pitch_distribution'])
+    expected = analyzer.analyze('audio.mp3', outputs=['pitch_distribution',
+                                                      'tonic'])
+    del called[:]
+
+    # WHEN
+    features = analyzer.analyze('audio.mp3', lazy=True)
+    called_before_access = list(called)
+    tonic = features['tonic']
+    pitch_distribution = features['pitch_distribution']
+    features['tonic']  # pylint: disable-msg=W0104
+
+    # THEN
+    assert called_before_access == []
+    assert called == ['filter_pitch', 'identify_tonic',
+                      'compute_pitch_distribution']  # memoized
+    assert tonic == expected['tonic']
+    np.testing.assert_array_equal(pitch_distribution.vals,
+                                  expected['pitch_distribution'].vals)
+    assert not features.is_computed('melodic_progression')
+
+
+def test_analyze_in_parallel_same_as_serial(monkeypatch):
+    # GIVEN
+    features = []
+
+    # WHEN
+    for num_workers in [1, 4]:
+        analyzer = AudioAnalyzer(num_workers=num_workers)
+        monkeypatch.setattr(analyzer, 'extract_pitch', _synth_pitch_features)
+        features.append(analyzer.analyze('audio.mp3', metadata=False,
+                                         makam='ussak'))
+
+    # THEN
+    assert features[0].keys() == features[1].keys()
+    assert features[0]['tonic'] == features[1]['tonic']
+    assert features[0]['transposition'] == features[1]['transposition']
+    np.testing.assert_array_equal(features[0]['pitch_distribution'].vals,
+                                  features[1]['pitch_distribution'].vals)
@@ -0,0 +1,49 @@
+import os
+
+from tomato.audio.audioanalyzer import AudioAnalyzer
+from tomato.audio.audiobatchanalyzer import AudioBatchAnalyzer
+
+
+def test_get_audio_files(tmpdir):
+    # GIVEN
+    tmpdir.mkdir('sub').join('b.MP3').write('')
+    tmpdir.join('a.mp3').write('')
+    tmpdir.join('c.txt').write('')
+    audio_dir = str(tmpdir)
+
+    # WHEN
+    result = AudioBatchAnalyzer.get_audio_files(
+        [audio_dir, 'other.mp3'], keyword='*.mp3')
+
+    # THEN
+    expected = [os.path.join(audio_dir, 'a.mp3'),
+                os.path.join(audio_dir, 'sub', 'b.MP3'),
+                'other.mp3']
+    assert result == expected
+
+
+def _analyze_or_fail(self, filepath='', **kwargs):
+    if 'fail' in filepath:
+        raise OSError('cannot analyze ' + filepath)
+    return {'filepath': filepath, 'kwargs': kwargs}
+
+
+def test_analyze_isolates_errors(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(AudioAnalyzer, 'analyze', _analyze_or_fail)
+    audio_files = ['ok1.mp3', 'fail.mp3', 'ok2.mp3', 'ok3.mp3']
+    batch_analyzer = AudioBatchAnalyzer(num_workers=2, chunksize=2)
+
+    # WHEN
+    results = list(batch_analyzer.analyze(audio_files, metadata=False))
+
+    # THEN
+    results = {r['filepath']: r for r in results}
+    assert sorted(results.keys()) == sorted(audio_files)
+
+    assert results['fail.mp3']['features'] is None
+    assert 'cannot analyze fail.mp3' in results['fail.mp3']['error']
+    for audio_file in ['ok1.mp3', 'ok2.mp3', 'ok3.mp3']:
+        assert results[audio_file]['error'] is None
+        assert results[audio_file]['features'] == {
+            'filepath': audio_file, 'kwargs': {'metadata': False}}
@@ -0,0 +1,44 @@
+import numpy as np
+
+from tomato.audio.notemodel import NoteModel
+
+
+def test_get_interval_table_sorted():
+    # GIVEN
+    makam = 'hicaz'
+
+    # WHEN
+    interval_table = NoteModel.get_interval_table(makam)
+
+    # THEN
+    theoretical_intervals = NoteModel._get_theoretical_intervals_to_search(
+        makam)
+    assert np.all(np.diff(interval_table['cents']) >= 0)
+    assert dict(zip(interval_table['notes'],
+                    interval_table['intervals'])) == theoretical_intervals
+    assert NoteModel.get_interval_table(makam) is interval_table
+
+
+def test_stable_pitches_to_notes_nearest_note():
+    # GIVEN
+    tonic_hz = 220.0
+    interval_table = NoteModel.get_interval_table('hicaz')
+    rand = np.random.RandomState(0)
+    stable_pitches_cent = rand.uniform(-1200, 2400, 50)
+    stable_pitches_hz = tonic_hz * 2 ** (stable_pitches_cent / 1200.0)
+
+    # WHEN
+    result = NoteModel(pitch_threshold=50)._stable_pitches_to_notes(
+        stable_pitches_hz, interval_table, tonic_hz)
+
+    # THEN
+    expected = {}
+    for pitch_cent in stable_pitches_cent:
+        dists = [abs(pitch_cent - i) for i in interval_table['intervals']]
+        idx = int(np.argmin(dists))
+        if dists[idx] < 50:
+            expected[interval_table['notes'][idx]] = \
+                interval_table['intervals'][idx]
+
+    assert {note: val['theoretical_interval']['value']
+            for note, val in result.items()} == expected
@@ -0,0 +1,23 @@
+import numpy as np
+
+from tomato.audio.pitchdistribution import PitchDistribution
+
+
+def test_from_hz_pitches_same_as_from_hz_pitch():
+    # GIVEN
+    rand = np.random.RandomState(0)
+    hz_tracks = [220.0 * 2 ** (rand.randn(num) * std / 1200.0)
+                 for num, std in [(500, 30), (20, 5), (1000, 400), (5, 20)]]
+    hz_tracks[0][:10] = 0  # silence
+    hz_tracks.append(np.array([220.0 * 2 ** (11.25 / 1200.0), 330.0]))
+
+    # WHEN
+    distributions = PitchDistribution.from_hz_pitches(
+        hz_tracks, ref_freq=220.0, norm_type=None)
+
+    # THEN
+    for hz_track, distribution in zip(hz_tracks, distributions):
+        expected = PitchDistribution.from_hz_pitch(
+            hz_track, ref_freq=220.0, norm_type=None)
+        np.testing.assert_array_equal(distribution.bins, expected.bins)
+        np.testing.assert_array_equal(distribution.vals, expected.vals)
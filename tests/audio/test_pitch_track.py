@@ -0,0 +1,115 @@
+import pickle
+
+import numpy as np
+
+from tomato.audio.pitchdistribution import PitchDistribution
+from tomato.audio.pitchtrack import PitchTrack
+from tomato.converter import Converter
+from tomato.io import IO
+
+
+def _synth_pitch(num_samples, seed):
+    rand = np.random.RandomState(seed)
+    time_stamps = np.arange(num_samples) * 128 / 44100.0
+    pitch = 220.0 * 2 ** (rand.randn(num_samples) * 300 / 1200.0)
+    pitch[rand.rand(num_samples) < 0.2] = 0  # silence
+    pitch[:3] = [np.nan, np.inf, 20.0]
+    return np.transpose([time_stamps, pitch, rand.rand(num_samples)])
+
+
+def test_get_cents_same_as_converter():
+    # GIVEN
+    pitch = _synth_pitch(1000, seed=0)
+    pitch_track = PitchTrack(pitch.tolist())
+
+    # WHEN
+    cents = pitch_track.get_cents(220.0)
+
+    # THEN
+    with np.errstate(invalid='ignore'):
+        expected = Converter.hz_to_cent(np.nan_to_num(pitch[:, 1]), 220.0)
+    expected[1] = np.nan  # inf is unvoiced
+    np.testing.assert_array_equal(cents, expected)
+    np.testing.assert_array_equal(pitch_track.valid, np.isfinite(expected))
+    np.testing.assert_array_equal(pitch_track.get_valid_cents(220.0),
+                                  expected[np.isfinite(expected)])
+
+
+def test_get_cents_cached_per_reference():
+    # GIVEN
+    pitch_track = PitchTrack(_synth_pitch(1000, seed=1))
+
+    # WHEN
+    cents_220 = pitch_track.get_cents(220.0)
+    cents_440 = pitch_track.get_cents(440.0)
+
+    # THEN
+    assert pitch_track.get_cents(220.0) is cents_220
+    assert pitch_track.get_cents(440) is cents_440
+    np.testing.assert_allclose(cents_220[pitch_track.valid] - 1200,
+                               cents_440[pitch_track.valid])
+
+
+def test_from_hz_pitch_accepts_pitch_track():
+    # GIVEN
+    pitch = _synth_pitch(1000, seed=2)
+
+    # WHEN
+    distribution = PitchDistribution.from_hz_pitch(PitchTrack(pitch))
+
+    # THEN
+    expected = PitchDistribution.from_hz_pitch(pitch.tolist())
+    np.testing.assert_array_equal(distribution.bins, expected.bins)
+    np.testing.assert_array_equal(distribution.vals, expected.vals)
+
+
+def test_implicit_time_same_as_time_stamps():
+    # GIVEN
+    pitch = _synth_pitch(1000, seed=3)
+
+    # WHEN
+    pitch_track = PitchTrack.from_arrays(
+        pitch[:, 1], salience=pitch[:, 2], hop_size=128, sample_rate=44100)
+
+    # THEN
+    assert pitch_track.has_implicit_time
+    np.testing.assert_array_equal(pitch_track.time, pitch[:, 0])
+    np.testing.assert_array_equal(np.asarray(pitch_track), pitch)
+    np.testing.assert_array_equal(pitch_track.tolist(), pitch)
+
+
+def test_slice_time_shares_arrays():
+    # GIVEN
+    pitch = _synth_pitch(1000, seed=4)
+    implicit_track = PitchTrack.from_arrays(
+        pitch[:, 1], salience=pitch[:, 2], hop_size=128, sample_rate=44100)
+    explicit_track = PitchTrack(pitch)
+    start, end = pitch[100, 0], pitch[200, 0]
+
+    for pitch_track in [implicit_track, explicit_track]:
+        # WHEN
+        sliced = pitch_track.slice_time(start, end)
+        sliced_incl = pitch_track.slice_time(start, end, include_end=True)
+
+        # THEN
+        np.testing.assert_array_equal(np.asarray(sliced), pitch[100:200])
+        np.testing.assert_array_equal(np.asarray(sliced_incl),
+                                      pitch[100:201])
+        assert np.shares_memory(sliced.hz, pitch_track.hz)
+
+
+def test_pickle_and_json_legacy_format():
+    # GIVEN
+    pitch = _synth_pitch(100, seed=5)
+    pitch_track = PitchTrack.from_arrays(
+        pitch[:, 1], salience=pitch[:, 2], hop_size=128, sample_rate=44100)
+    pitch_track.get_cents(440.0)  # fill the cache
+
+    # WHEN
+    unpickled = pickle.loads(pickle.dumps(pitch_track))
+    from_json = IO.from_json(IO.to_json({'pitch': pitch_track}))
+
+    # THEN
+    assert unpickled.has_implicit_time
+    np.testing.assert_array_equal(np.asarray(unpickled), pitch)
+    np.testing.assert_array_equal(from_json['pitch'], pitch)
@@ -0,0 +1,136 @@
+import copy
+import wave
+
+import numpy as np
+
+from tomato.audio.predominantmelody import PredominantMelody
+
+
+def _synth_contours(num_contours, num_samples, seed):
+    rand = np.random.RandomState(seed)
+    extractor = PredominantMelody()
+    sample_dur = extractor.hop_size / float(extractor.sample_rate)
+
+    lens = rand.randint(1, 100, num_contours)
+    start_samples = (rand.rand(num_contours) *
+                     (num_samples - lens)).astype(int)
+
+    pitch_contours = [3000 + np.cumsum(rand.randn(ll)) for ll in lens]
+    contour_saliences = [rand.rand(ll) for ll in lens]
+    start_times = (start_samples * sample_dur).tolist()
+
+    return (pitch_contours, contour_saliences, start_times,
+            num_samples * sample_dur)
+
+
+def _synth_audio(filepath, duration, seed):
+    rand = np.random.RandomState(seed)
+    sample_rate = 44100
+    num_samples = int(duration * sample_rate)
+
+    notes = 220.0 * 2 ** (rand.choice([0, 2, 3, 5, 7, 12],
+                                      int(duration * 2) + 1) / 12.0)
+    f0 = np.repeat(notes, sample_rate // 2)[:num_samples]
+    _write_audio(filepath, f0, sample_rate)
+
+
+def _synth_held_note(filepath, duration):
+    # a single note with vibrato, which lasts the whole duration
+    sample_rate = 44100
+    time_stamps = np.arange(int(duration * sample_rate)) / float(sample_rate)
+
+    f0 = 220.0 * 2 ** (0.3 * np.sin(2 * np.pi * 5 * time_stamps) / 12.0)
+    _write_audio(filepath, f0, sample_rate)
+
+
+def _write_audio(filepath, f0, sample_rate):
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    audio = sum(np.sin(h * phase) / h for h in range(1, 6))
+    audio = (audio / np.max(np.abs(audio)) * 0.5 * 32767).astype(np.int16)
+
+    with wave.open(filepath, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(audio.tobytes())
+
+
+def test_run_streaming_same_as_standard(tmpdir):
+    # GIVEN
+    audio_file = str(tmpdir.join('audio.wav'))
+    _synth_audio(audio_file, duration=5, seed=0)
+
+    # WHEN
+    result = PredominantMelody(streaming=True, segment_dur=10.0).run(
+        audio_file)
+
+    # THEN
+    expected = PredominantMelody(streaming=False).run(audio_file)
+    np.testing.assert_array_equal(result['pitch'], expected['pitch'])
+
+
+def test_run_streaming_segments(tmpdir):
+    # GIVEN
+    audio_file = str(tmpdir.join('audio.wav'))
+    _synth_audio(audio_file, duration=5, seed=0)
+
+    # WHEN
+    result = PredominantMelody(streaming=True, segment_dur=2.0,
+                               segment_overlap=1.0).run(audio_file)
+
+    # THEN
+    expected = PredominantMelody(streaming=False).run(audio_file)
+    result_pitch = np.array(result['pitch'])
+    expected_pitch = np.array(expected['pitch'])
+    assert result_pitch.shape == expected_pitch.shape
+    # the salience threshold of a segment differs slightly from the one of
+    # the whole recording, which changes a few frames at the note onsets
+    assert np.mean(np.isclose(result_pitch[:, 1],
+                              expected_pitch[:, 1])) > 0.99
+
+
+def test_run_streaming_stitches_held_note(tmpdir):
+    # GIVEN
+    audio_file = str(tmpdir.join('audio.wav'))
+    _synth_held_note(audio_file, duration=5)
+
+    # WHEN
+    result = PredominantMelody(streaming=True, segment_dur=1.0,
+                               segment_overlap=0.2).run(audio_file)
+
+    # THEN
+    expected = PredominantMelody(streaming=False).run(audio_file)
+    np.testing.assert_array_equal(result['pitch'], expected['pitch'])
+
+
+def test_select_contours_same_as_overlap_sets():
+    # GIVEN
+    extractor = PredominantMelody()
+    contour_set = _synth_contours(300, 2000, seed=0)
+
+    # WHEN
+    expected = extractor._select_contours_by_overlap_sets(
+        *copy.deepcopy(contour_set))
+    result = extractor.select_contours(*contour_set)
+
+    # THEN
+    np.testing.assert_array_equal(result[0], expected[0])
+    np.testing.assert_array_equal(result[1], expected[1])
+
+
+def test_select_contours_longest_first():
+    # GIVEN
+    extractor = PredominantMelody()
+    sample_dur = extractor.hop_size / float(extractor.sample_rate)
+    pitch_contours = [np.array([1., 1., 1.]), np.array([2., 2., 2., 2.])]
+    contour_saliences = [np.array([.1, .1, .1]), np.array([.2, .2, .2, .2])]
+    start_times = [0, 2 * sample_dur]
+    duration = 7 * sample_dur
+
+    # WHEN
+    pitch, salience = extractor.select_contours(
+        pitch_contours, contour_saliences, start_times, duration)
+
+    # THEN
+    np.testing.assert_array_equal(pitch, [1., 1., 2., 2., 2., 2., 0.])
+    np.testing.assert_array_equal(salience, [.1, .1, .2, .2, .2, .2, 0.])
@@ -0,0 +1,30 @@
+import numpy as np
+
+from tomato.audio.seyir import Seyir
+
+
+def test_analyze_incremental_same_as_per_interval():
+    # GIVEN
+    rand = np.random.RandomState(0)
+    num_samples = 20000
+    time_stamps = np.arange(num_samples) * 128 / 44100.0
+    cents = (np.repeat(rand.choice([0, 150, 300, 500, 700, 1200], 100), 200) +
+             rand.randn(num_samples) * 10 - 600)
+    pitch = 440.0 * 2 ** (cents / 1200.0)
+    pitch[rand.rand(num_samples) < 0.2] = 0  # silence
+    pitch_track = np.transpose([time_stamps, pitch])
+
+    # WHEN
+    result = Seyir(incremental=True).analyze(pitch_track, frame_dur=10.0)
+
+    # THEN
+    expected = Seyir(incremental=False).analyze(pitch_track, frame_dur=10.0)
+    assert len(result) == len(expected)
+    for res, exp in zip(result, expected):
+        assert res['time_interval'] == exp['time_interval']
+        np.testing.assert_allclose(res['pitch_distribution'].bins,
+                                   exp['pitch_distribution'].bins)
+        np.testing.assert_allclose(res['pitch_distribution'].vals,
+                                   exp['pitch_distribution'].vals)
+        assert np.isclose(res['average_pitch'], exp['average_pitch'])
+        assert res['stable_pitches'] == exp['stable_pitches']
@@ -0,0 +1,55 @@
+import copy
+
+import numpy as np
+
+from tomato.audio.pitchfilter import PitchFilter
+from tomato.audio.vectorizedpitchfilter import VectorizedPitchFilter
+
+
+def _synth_pitch(num_samples, seed):
+    # notes and silences with vibrato, octave errors and spurious jumps
+    rand = np.random.RandomState(seed)
+    pitch = np.zeros(num_samples)
+    salience = np.zeros(num_samples)
+    idx = 0
+    while idx < num_samples:
+        note_len = rand.randint(5, 300)
+        if rand.rand() > 0.25:  # else silence
+            freq = 150 * 2 ** (rand.randint(-12, 24) / 12.)
+            if rand.rand() < 0.1:  # octave error
+                freq *= 2
+            note = freq * (1 + 0.01 * np.sin(np.arange(note_len) / 5.)) * \
+                (1 + 0.003 * rand.randn(note_len))
+            pitch[idx:idx + note_len] = note[:num_samples - idx]
+            salience[idx:idx + note_len] = rand.uniform(0.01, 1)
+        idx += note_len
+
+    jump_idx = rand.randint(0, num_samples, num_samples // 50)
+    pitch[jump_idx] *= rand.choice([0.25, 0.5, 2, 3], jump_idx.size)
+    time_stamps = np.arange(num_samples) * 128 / 44100.
+
+    return np.transpose([time_stamps, pitch, salience]).tolist()
+
+
+def test_vectorized_pitch_filter_same_as_pitch_filter():
+    # GIVEN
+    pitch = _synth_pitch(5000, seed=0)
+
+    # WHEN
+    expected = PitchFilter().run(copy.deepcopy(pitch))
+    result = VectorizedPitchFilter().run(pitch)
+
+    # THEN
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_vectorized_pitch_filter_does_not_modify_input():
+    # GIVEN
+    pitch = _synth_pitch(1000, seed=1)
+    pitch_in = copy.deepcopy(pitch)
+
+    # WHEN
+    VectorizedPitchFilter().run(pitch)
+
+    # THEN
+    assert pitch == pitch_in
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Stand-in for a MATLAB binary, which speaks the job protocol of McrWorker
+when called with "--worker". When called with "--silent", it neither
+answers nor exits like a binary without the worker mode. The jobs print
+their arguments. The "crash" and "hang" jobs simulate failing workers and
+the "fail" job a failing job.
+"""
+import json
+import os
+import sys
+import time
+
+
+def run_job(args):
+    if args and args[0] == 'crash':
+        os._exit(1)
+    if args and args[0] == 'hang':
+        time.sleep(60)
+
+    return 'stand-in called by pid {0:d} with {1:s}\n'.format(
+        os.getpid(), ' '.join(args))
+
+
+def main():
+    if sys.argv[1:] == ['--silent']:
+        time.sleep(60)
+        return
+    if sys.argv[1:] != ['--worker']:  # one-shot call
+        sys.stdout.write(run_job(sys.argv[1:]))
+        return
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request['command'] == 'quit':
+            return
+        elif request['command'] == 'ping':
+            response = {'status': 'ok'}
+        elif request['args'][:1] == ['fail']:
+            response = {'status': 'error', 'stdout': '',
+                        'message': 'job failed'}
+        else:
+            response = {'status': 'ok', 'stdout': run_job(request['args'])}
+
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+import numpy as np
+
+from tomato.audio.pitchtrack import PitchTrack
+from tomato.joint.alignednotemodel import AlignedNoteModel
+
+
+def test_distribute_pitch_trajectories_closed_intervals():
+    # GIVEN
+    rand = np.random.RandomState(0)
+    pitch = np.transpose([np.arange(1000) * 128 / 44100.0,
+                          220.0 + rand.rand(1000), rand.rand(1000)])
+    notes = [{'Symbol': 'A4', 'Interval': [pitch[10, 0], pitch[20, 0]]},
+             {'Symbol': 'A4', 'Interval': [0.5, 1.234]},
+             {'Symbol': 'A4', 'Interval': [1.5, 1.5]}]  # not aligned
+    note_models = {'A4': {'notes': []}}
+
+    # WHEN
+    AlignedNoteModel._distribute_pitch_trajectories(
+        notes, note_models, pitch, PitchTrack(pitch))
+
+    # THEN
+    trajectories = [n['PitchTrajectory'] for n in note_models['A4']['notes']]
+    assert len(trajectories) == 2
+    for note, trajectory in zip(notes, trajectories):
+        in_note = (pitch[:, 0] >= note['Interval'][0]) & \
+                  (pitch[:, 0] <= note['Interval'][1])
+        np.testing.assert_array_equal(trajectory, pitch[in_note])
@@ -0,0 +1,30 @@
+import numpy as np
+
+from tomato.joint.alignedpitchfilter import AlignedPitchFilter
+
+
+def test_find_closest_sample_idx_same_as_argmin():
+    # GIVEN
+    time_stamps = np.arange(100) * 0.5
+    vals = np.array([-3.0, 0.0, 0.25, 0.26, 10.1, 49.5, 49.75, 60.0])
+
+    # WHEN
+    idx = AlignedPitchFilter._find_closest_sample_idx(vals, time_stamps)
+
+    # THEN
+    expected = [np.argmin(abs(time_stamps - val)) for val in vals]
+    np.testing.assert_array_equal(idx, expected)
+
+
+def test_move_to_closest_octave():
+    # GIVEN
+    synth_vals = np.array([220.0, 220.0, 220.0, 0.0, 220.0])
+    pitch_vals = np.array([440.0, 225.0, 0.0, 300.0, 660.0])
+
+    # WHEN
+    corrected = AlignedPitchFilter._move_to_closest_octave(pitch_vals,
+                                                           synth_vals)
+
+    # THEN
+    np.testing.assert_allclose(corrected, [220.0, 225.0, 0.0, 300.0, 330.0])
+    assert pitch_vals[0] == 440.0  # input is not modified
@@ -0,0 +1,95 @@
+import numpy as np
+
+from tomato.joint.audioscorealigner import AudioScoreAligner
+from tomato.musicdata import MusicData
+
+
+def _synth_performance(score, sections, order, rel_tempo, tonic_freq,
+                       hop_size=128 / 44100.0, seed=0):
+    # pitch track of the sections performed in the given order, with a
+    # second of silence at the start and the end. Returns the track and
+    # the (index, start, end) of the performed notes
+    rand = np.random.RandomState(seed)
+    note_cents = MusicData.get_note_cents()
+
+    segments = [np.zeros(int(1.0 / hop_size))]
+    performed_notes = []
+    time_stamp = len(segments[0]) * hop_size
+    for sec_idx in order:
+        start = score['index'].index(sections[sec_idx]['start_note'])
+        end = score['index'].index(sections[sec_idx]['end_note'])
+        for row in range(start, end + 1):
+            num_samples = int(round(score['duration'][row] * 0.001 /
+                                    rel_tempo / hop_size))
+            segments.append(tonic_freq * 2 ** (
+                (note_cents[score['noteAE'][row]] - note_cents['A4'] +
+                 10 * rand.randn(num_samples)) / 1200.0))
+            performed_notes.append(
+                (score['index'][row], time_stamp,
+                 time_stamp + num_samples * hop_size))
+            time_stamp += num_samples * hop_size
+    segments.append(np.zeros(int(1.0 / hop_size)))
+
+    hz = np.concatenate(segments)
+    return np.column_stack((np.arange(len(hz)) * hop_size, hz)), \
+        performed_notes
+
+
+def test_align():
+    # GIVEN
+    melodies = [['A4', 'B4b1', 'C5', 'D5', 'C5', 'B4b1', 'A4', 'G4', 'A4'],
+                ['D5', 'E5', 'F5#4', 'G5', 'F5#4', 'E5', 'D5', 'C5', 'B4b1']]
+    score = {'index': [1], 'code': [51], 'noteAE': [''], 'duration': [0],
+             'lyrics': ['']}
+    sections = []
+    for ii, melody in enumerate(melodies):
+        for jj, symbol in enumerate(melody):
+            score['index'].append(len(score['index']) + 1)
+            score['code'].append(9)
+            score['noteAE'].append(symbol)
+            score['duration'].append(250 * (1 + (ii + jj) % 3))
+            score['lyrics'].append('')
+        sections.append({'name': 'S{0:d}'.format(ii),
+                         'slug': 'S{0:d}'.format(ii),
+                         'start_note': score['index'][-len(melody)],
+                         'end_note': score['index'][-1]})
+    rel_tempo = 1.1
+    pitch, performed_notes = _synth_performance(
+        score, sections, [0, 1, 0], rel_tempo, tonic_freq=220.0)
+
+    # WHEN
+    aligned_sections, aligned_notes, _, _ = AudioScoreAligner().align(
+        score, sections, pitch, {'value': 220.0, 'symbol': 'A4'},
+        {'relative': {'value': rel_tempo}})
+
+    # THEN
+    assert [s['name'] for s in aligned_sections] == ['S0', 'S1', 'S0']
+    assert [n['index_in_score'] for n in aligned_notes] == \
+        [n[0] for n in performed_notes]
+    np.testing.assert_allclose([n['interval'] for n in aligned_notes],
+                               [n[1:] for n in performed_notes], atol=0.11)
+    assert aligned_notes[0]['theoretical_pitch'] == {'value': 220.0,
+                                                     'unit': 'Hz'}
+
+
+def test_subsequence_dtw_in_band():
+    # GIVEN
+    aligner = AudioScoreAligner()
+    audio_cents = np.full(40, np.nan)
+    audio_cents[10:30] = np.repeat([0.0, 200.0, 300.0, 500.0], 5)
+    score_cents = np.repeat([0.0, 200.0, 300.0, 500.0], 5)
+    lo = np.arange(len(score_cents)) + 5
+    hi = lo + 10
+
+    # WHEN
+    last_acc, steps = aligner._subsequence_dtw(score_cents, audio_cents,
+                                               lo, hi)
+    end_col = np.argmin(last_acc)
+    rows, cols = aligner._backtrack(steps, lo, end_col)
+
+    # THEN
+    assert last_acc[end_col] == 0
+    assert np.all(np.isinf(last_acc[:lo[-1]])) and \
+        np.all(np.isinf(last_acc[hi[-1]:]))
+    np.testing.assert_array_equal(audio_cents[cols], score_cents[rows])
+    assert np.all((cols >= lo[rows]) & (cols < hi[rows]))
@@ -0,0 +1,94 @@
+import numpy as np
+
+from tomato.joint.tonictempoextractor import TonicTempoExtractor
+from tomato.musicdata import MusicData
+
+
+def _synth_score(melody, nums, score_tempo=120):
+    # a score in a single usul with the given melody; the shortest note is
+    # an eighth, which lasts half a beat
+    score = {'index': [1], 'code': [51], 'noteAE': [''], 'duration': [0],
+             'numerator': [10], 'denumerator': [8], 'lyrics': ['']}
+    for symbol, num in zip(melody, nums):
+        score['index'].append(len(score['index']) + 1)
+        score['code'].append(9)
+        score['noteAE'].append(symbol)
+        score['numerator'].append(num)
+        score['denumerator'].append(8)
+        score['duration'].append(int(num * 0.5 * 60000 / score_tempo))
+        score['lyrics'].append('')
+
+    rhythmic_structure = [{'tempo': {'value': score_tempo, 'unit': 'bpm'},
+                           'startNote': 1, 'endNote': score['index'][-1]}]
+    return score, rhythmic_structure
+
+
+def _synth_pitch(score, tonic_freq, rel_tempo, hop_size=128 / 44100.0,
+                 seed=0):
+    rand = np.random.RandomState(seed)
+    note_cents = MusicData.get_note_cents()
+
+    hz = [np.zeros(300)]
+    for symbol, dur in zip(score['noteAE'][1:], score['duration'][1:]):
+        num_samples = int(round(dur * 0.001 / rel_tempo / hop_size))
+        hz.append(tonic_freq * 2 ** ((
+            note_cents[symbol] - note_cents['A4'] +
+            10 * rand.randn(num_samples)) / 1200.0))
+    hz.append(np.zeros(300))
+
+    hz = np.concatenate(hz)
+    return np.column_stack((np.arange(len(hz)) * hop_size, hz))
+
+
+def test_extract():
+    # GIVEN
+    melody = ['A4', 'B4b1', 'C5', 'D5', 'C5', 'B4b1', 'A4', 'G4', 'A4', 'D5',
+              'E5', 'F5#4', 'G5', 'F5#4', 'E5', 'D5', 'C5', 'B4b1', 'A4']
+    nums = [1, 1, 2, 1, 3, 1, 2, 1, 4, 2, 1, 1, 2, 1, 1, 2, 1, 1, 4]
+    score, rhythmic_structure = _synth_score(melody * 3, nums * 3)
+    sections = [{'name': 'S0', 'slug': 'S0', 'start_note': 2,
+                 'end_note': score['index'][-1]}]
+    pitch = _synth_pitch(score, tonic_freq=246.94, rel_tempo=0.8)
+
+    # WHEN
+    tonic, tempo = TonicTempoExtractor().extract(
+        score, sections, rhythmic_structure, 'A4', pitch)
+
+    # THEN
+    assert tonic['symbol'] == 'A4' and tonic['unit'] == 'Hz'
+    assert abs(1200 * np.log2(tonic['value'] / 246.94)) < 7.5
+    assert abs(tempo['relative']['value'] - 0.8) < 0.02
+    assert tempo['average']['value'] == 120 * tempo['relative']['value']
+
+
+def test_average_score_tempo():
+    # GIVEN
+    score, _ = _synth_score(['A4'] * 4, [1, 1, 2, 2])
+    rhythmic_structure = [
+        {'tempo': {'value': 60}, 'startNote': 1, 'endNote': 3},
+        {'tempo': {'value': 120}, 'startNote': 4, 'endNote': 5}]
+
+    # WHEN
+    score_tempo = TonicTempoExtractor._get_average_score_tempo(
+        score, rhythmic_structure)
+
+    # THEN
+    assert score_tempo == 100  # the second part lasts twice as long
+
+
+def test_average_score_tempo_skips_serbest():
+    # GIVEN
+    score, _ = _synth_score(['A4'] * 4, [1, 1, 2, 2])
+    rhythmic_structure = [
+        {'tempo': {'value': None}, 'startNote': 1, 'endNote': 3},
+        {'tempo': {'value': 120}, 'startNote': 4, 'endNote': 5}]
+
+    # WHEN
+    score_tempo = TonicTempoExtractor._get_average_score_tempo(
+        score, rhythmic_structure)
+    serbest_tempo = TonicTempoExtractor._get_average_score_tempo(
+        score, rhythmic_structure[:1])
+
+    # THEN
+    assert score_tempo == 120  # the serbest part is not weighted
+    assert serbest_tempo is None
@@ -0,0 +1,125 @@
+import json
+import os
+
+import pytest
+from tomato.bincaller import BinCaller
+from tomato.featurecache import FeatureCache
+from tomato.metadata.musicbrainz import MusicBrainz
+from tomato.symbolic.symbtranalyzer import SymbTrAnalyzer
+
+SYMBTR_NAME = 'ussak--sazsemaisi--aksaksemai----neyzen_aziz_dede'
+TXT_FILEPATH = os.path.join('sample-data', SYMBTR_NAME, SYMBTR_NAME + '.txt')
+
+
+def _get_analyzer(monkeypatch, cache=None):
+    # the MCR and the binary are not needed, since the binary calls are
+    # replaced
+    monkeypatch.setattr(BinCaller, 'set_environment',
+                        lambda self: (os.environ.copy(), 'linux'))
+    monkeypatch.setattr(BinCaller, 'check_bin_exists',
+                        staticmethod(lambda bin_path: None))
+    monkeypatch.setattr(BinCaller, '_default', None)
+
+    return SymbTrAnalyzer(cache=cache)
+
+
+def _fake_segment_phrase_batch(calls, failing_names=()):
+    # boundaries, which tell the segmented score, instead of the binary
+    def segment_phrase_batch(scores):
+        calls.append([symbtr_name for _, symbtr_name in scores])
+        if any(name in failing_names for _, name in scores):
+            raise RuntimeError('Phrase segmentation is not successful.')
+
+        return [{'boundary_beat': [4.0], 'boundary_note_idx': [10],
+                 'symbtr_name': symbtr_name} for _, symbtr_name in scores]
+
+    return segment_phrase_batch
+
+
+def _fake_call_binary(output):
+    # writes the output to the output file of the binary
+    def call_binary(bin_path, args):
+        with open(args[-1], 'w') as f:
+            f.write(output)
+        return b'segmentation complete!', None
+
+    return call_binary
+
+
+def test_segment_phrases_in_shards(monkeypatch):
+    # GIVEN
+    analyzer = _get_analyzer(monkeypatch)
+    calls = []
+    analyzer._segment_phrase_batch = _fake_segment_phrase_batch(calls)
+    names = ['score{0:d}'.format(ii) for ii in range(5)]
+
+    # WHEN
+    boundaries = analyzer.segment_phrases(
+        [name + '.txt' for name in names], names, num_shards=2)
+
+    # THEN
+    assert sorted(calls) == [names[:2], names[2:]]
+    assert [b['symbtr_name'] for b in boundaries] == names
+
+
+def test_segment_phrases_failed_shard(monkeypatch):
+    # GIVEN
+    analyzer = _get_analyzer(monkeypatch)
+    analyzer._segment_phrase_batch = _fake_segment_phrase_batch(
+        [], failing_names=['score3'])
+    names = ['score{0:d}'.format(ii) for ii in range(6)]
+
+    # WHEN
+    boundaries = analyzer.segment_phrases(
+        [name + '.txt' for name in names], names, num_shards=3)
+
+    # THEN
+    assert [b and b['symbtr_name'] for b in boundaries] == \
+        ['score0', 'score1', None, None, 'score4', 'score5']
+
+
+def test_segment_phrase_batch_outputs(monkeypatch):
+    # GIVEN
+    analyzer = _get_analyzer(monkeypatch)
+    single = {'boundary_beat': [4.0], 'boundary_note_idx': [10]}
+    scores = [('a.txt', 'a'), ('b.txt', 'b')]
+
+    # WHEN; THEN
+    monkeypatch.setattr(analyzer._mcr_caller, 'call_binary',
+                        _fake_call_binary(json.dumps(single)))
+    assert analyzer._segment_phrase_batch(scores[:1]) == [single]
+
+    monkeypatch.setattr(analyzer._mcr_caller, 'call_binary',
+                        _fake_call_binary(json.dumps([single, single])))
+    assert analyzer._segment_phrase_batch(scores) == [single, single]
+
+    with pytest.raises(RuntimeError):  # a result is missing
+        analyzer._segment_phrase_batch(scores[:1] * 3)
+
+    monkeypatch.setattr(analyzer._mcr_caller, 'call_binary',
+                        _fake_call_binary('{"boundary_beat": '))
+    with pytest.raises(RuntimeError):  # invalid json
+        analyzer._segment_phrase_batch(scores)
+
+
+def test_analyze_reuses_segmented_phrases(monkeypatch, tmpdir):
+    # GIVEN
+    crawl = MusicBrainz.crawl  # the metadata without an mbid, offline
+    monkeypatch.setattr(MusicBrainz, 'crawl',
+                        classmethod(lambda cls, mbid: crawl(None)))
+    analyzer = _get_analyzer(monkeypatch, cache=FeatureCache(str(tmpdir)))
+    calls = []
+    analyzer._segment_phrase_batch = _fake_segment_phrase_batch(calls)
+    boundaries = analyzer.segment_phrases([TXT_FILEPATH], [SYMBTR_NAME])
+
+    # WHEN
+    score_data = analyzer.analyze(TXT_FILEPATH, symbtr_name=SYMBTR_NAME)
+    analyzer.cache = None
+    given_score_data = analyzer.analyze(
+        TXT_FILEPATH, symbtr_name=SYMBTR_NAME,
+        segment_boundaries=boundaries[0])
+
+    # THEN
+    assert len(calls) == 1  # only the call of segment_phrases
+    assert score_data['segment_boundaries'] == boundaries[0]
+    assert given_score_data['segment_boundaries'] == boundaries[0]
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import timeit
+
+import pytest
+from tomato.bincaller import BinCaller
+
+
+@pytest.fixture
+def bin_caller(monkeypatch):
+    monkeypatch.setattr(BinCaller, 'set_environment',
+                        lambda self: (os.environ.copy(), 'linux'))
+    return BinCaller(max_concurrent_calls=2)
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_acall_captures_output(bin_caller):
+    # GIVEN
+    argv = [sys.executable, '-c',
+            'import sys; print(sys.argv[1:]); sys.stderr.write("err")',
+            'with space', '']
+
+    # WHEN
+    out, err = _run(bin_caller.acall(argv))
+
+    # THEN
+    assert out.decode('utf-8').strip() == "['with space', '']"
+    assert err == b'err'
+
+
+def test_acall_limits_concurrency(bin_caller):
+    # GIVEN
+    argv = [sys.executable, '-c', 'import time; time.sleep(0.5)']
+
+    async def call_many():
+        return await asyncio.gather(*[bin_caller.acall(argv)
+                                      for _ in range(4)])
+
+    # WHEN
+    tic = timeit.default_timer()
+    _run(call_many())
+    duration = timeit.default_timer() - tic
+
+    # THEN
+    assert duration >= 1.0  # two rounds of two calls
+
+
+def test_acall_timeout_kills_process_group(bin_caller, tmpdir):
+    # GIVEN
+    pid_file = str(tmpdir.join('child.pid'))
+    child = 'import time; time.sleep(30)'
+    argv = [sys.executable, '-c',
+            'import subprocess, sys, time\n'
+            'child = subprocess.Popen([sys.executable, "-c", {0!r}])\n'
+            'open({1!r}, "w").write(str(child.pid))\n'
+            'time.sleep(30)'.format(child, pid_file)]
+
+    # WHEN
+    tic = timeit.default_timer()
+    with pytest.raises(subprocess.TimeoutExpired):
+        _run(bin_caller.acall(argv, timeout=1))
+    duration = timeit.default_timer() - tic
+
+    # THEN
+    assert duration < 10
+    child_pid = int(open(pid_file).read())
+    assert _wait_for_exit(child_pid)
+
+
+def _wait_for_exit(pid, timeout=5.0):
+    # the killed process is either removed or a zombie, until it is reaped
+    tic = timeit.default_timer()
+    while timeit.default_timer() - tic < timeout:
+        try:
+            with open('/proc/{0:d}/stat'.format(pid)) as f:
+                if f.read().split()[2] == 'Z':
+                    return True
+        except FileNotFoundError:
+            return True
+        time.sleep(0.1)
+
+    return False
+
+
+def test_get_default_is_shared(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(BinCaller, 'set_environment',
+                        lambda self: (os.environ.copy(), 'linux'))
+    monkeypatch.setattr(BinCaller, '_default', None)
+
+    # WHEN
+    bin_callers = [BinCaller.get_default() for _ in range(2)]
+
+    # THEN
+    assert isinstance(bin_callers[0], BinCaller)
+    assert bin_callers[0] is bin_callers[1]
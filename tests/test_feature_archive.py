@@ -0,0 +1,61 @@
+import numpy as np
+
+import pytest
+from tomato.audio.pitchdistribution import PitchDistribution
+from tomato.audio.pitchtrack import PitchTrack
+from tomato.featurearchive import FeatureArchive
+from tomato.io import IO
+
+
+def _synth_features(num_samples=1000, seed=0):
+    rand = np.random.RandomState(seed)
+    pitch = PitchTrack.from_arrays(
+        220.0 + rand.rand(num_samples), salience=rand.rand(num_samples),
+        hop_size=128, sample_rate=44100)
+    bins = np.arange(-1200.0, 1200.0, 7.5)
+    return {'pitch': {'pitch': pitch, 'source': 'a.mp3'},
+            'pitch_distribution': PitchDistribution(
+                bins, rand.rand(len(bins))),
+            'tonic': {'value': 220.0, 'unit': 'Hz'},
+            'tempo': None}
+
+
+@pytest.mark.parametrize('compress, mmap', [(True, False), (False, True)])
+def test_write_read(tmpdir, compress, mmap):
+    # GIVEN
+    features = _synth_features()
+    filepath = str(tmpdir.join('features.npz'))
+
+    # WHEN
+    IO.to_npz(features, filepath, compress=compress)
+    with IO.from_npz(filepath, mmap=mmap) as archive:
+        result = dict(archive)
+
+    # THEN
+    assert list(result) == list(features)
+    np.testing.assert_array_equal(np.asarray(result['pitch']['pitch']),
+                                  np.asarray(features['pitch']['pitch']))
+    assert result['pitch']['pitch'].has_implicit_time
+    assert result['pitch']['source'] == 'a.mp3'
+    np.testing.assert_array_equal(result['pitch_distribution'].vals,
+                                  features['pitch_distribution'].vals)
+    assert result['tonic'] == features['tonic']
+    assert result['tempo'] is None
+    assert isinstance(result['pitch_distribution'].vals, np.memmap) == mmap
+
+
+def test_read_nested_features_lazily(tmpdir):
+    # GIVEN
+    summary = {'audio': _synth_features(), 'joint': {}}
+    filepath = str(tmpdir.join('summary.npz'))
+    FeatureArchive.write(summary, filepath, depth=2)
+
+    # WHEN
+    archive = FeatureArchive(filepath)
+    tonic = archive['audio']['tonic']
+
+    # THEN
+    assert tonic == summary['audio']['tonic']
+    assert list(archive['audio']) == list(summary['audio'])
+    assert archive['joint'] == {}
+    assert 'audio/pitch' not in archive._features  # not decoded
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+import pytest
+from tomato.featurecache import FeatureCache
+
+
+def test_get_set(tmpdir):
+    # GIVEN
+    feature = {'pitch': np.arange(10.0), 'source': 'a.mp3'}
+    key = FeatureCache.make_key('pitch', params={'hopSize': 128},
+                                upstream_keys=['abc'])
+
+    # WHEN
+    cache = FeatureCache(str(tmpdir))
+    cache.set(key, feature)
+    result = cache.get(key)
+
+    # THEN
+    np.testing.assert_array_equal(result['pitch'], feature['pitch'])
+    assert result['source'] == feature['source']
+
+
+def test_get_missing(tmpdir):
+    # GIVEN
+    cache = FeatureCache(str(tmpdir))
+
+    # WHEN; THEN
+    with pytest.raises(KeyError):
+        cache.get(FeatureCache.make_key('pitch'))
+
+
+def test_make_key_depends_on_params_and_upstream():
+    # GIVEN
+    key = FeatureCache.make_key('tonic', params={'a': 1, 'b': 2},
+                                upstream_keys=['x'])
+
+    # WHEN
+    same_key = FeatureCache.make_key('tonic', params={'b': 2, 'a': 1},
+                                     upstream_keys=['x'])
+    other_params_key = FeatureCache.make_key('tonic', params={'a': 1, 'b': 3},
+                                             upstream_keys=['x'])
+    other_upstream_key = FeatureCache.make_key(
+        'tonic', params={'a': 1, 'b': 2}, upstream_keys=['y'])
+
+    # THEN
+    assert key == same_key
+    assert key != other_params_key
+    assert key != other_upstream_key
+
+
+def test_evict_least_recently_used(tmpdir):
+    # GIVEN
+    cache = FeatureCache(str(tmpdir))
+    keys = [FeatureCache.make_key(str(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set(key, np.zeros(1000))
+        os.utime(cache._get_path(key), (i, i))  # keys[0] is the oldest
+    entry_size = os.path.getsize(cache._get_path(keys[0]))
+
+    # WHEN
+    cache.get(keys[0])  # keys[1] becomes the least recently used
+    cache.max_size = 2 * entry_size
+    cache.evict()
+
+    # THEN
+    cache.get(keys[0])
+    cache.get(keys[2])
+    with pytest.raises(KeyError):
+        cache.get(keys[1])
+
+
+def test_hash_file(tmpdir):
+    # GIVEN
+    file_1 = tmpdir.join('a.mp3')
+    file_1.write('audio content')
+    file_2 = tmpdir.join('b.mp3')
+    file_2.write('audio content')
+    cache = FeatureCache(str(tmpdir.join('cache')))
+
+    # WHEN
+    hash_1 = cache.hash_file(str(file_1))
+    hash_2 = cache.hash_file(str(file_2))
+    file_2.write('modified audio content')
+    hash_2_modified = cache.hash_file(str(file_2))
+
+    # THEN
+    assert hash_1 == hash_2
+    assert hash_2 != hash_2_modified
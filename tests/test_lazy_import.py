@@ -0,0 +1,33 @@
+import sys
+
+from tomato.lazyimport import LazyModule, lazy_import
+
+
+def test_lazy_import_defers_import(monkeypatch):
+    # GIVEN
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    imported = []
+
+    # WHEN
+    colorsys = lazy_import('colorsys', on_import=imported.append)
+    is_imported_before_use = 'colorsys' in sys.modules
+    hls = colorsys.rgb_to_hls(1.0, 0.0, 0.0)
+    colorsys.hls_to_rgb(*hls)
+
+    # THEN
+    assert isinstance(colorsys, LazyModule)
+    assert not is_imported_before_use
+    assert hls == (0.0, 0.5, 1.0)
+    assert imported == [sys.modules['colorsys']]  # called once
+
+
+def test_lazy_import_returns_imported_module():
+    # GIVEN
+    imported = []
+
+    # WHEN
+    module = lazy_import('os', on_import=imported.append)
+
+    # THEN
+    assert module is sys.modules['os']
+    assert imported == [module]
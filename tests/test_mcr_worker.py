@@ -0,0 +1,98 @@
+import os
+import sys
+
+import pytest
+from tomato.bincaller import BinCaller
+from tomato.mcrworker import McrWorkerError, McrWorkerPool
+
+STAND_IN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin',
+                        'mcr_worker_stand_in.py')
+
+
+def _get_pids(outputs):
+    return set(out.decode('utf-8').split()[4] for out, _ in outputs)
+
+
+def test_pool_reuses_workers():
+    # GIVEN
+    pool = McrWorkerPool([sys.executable, STAND_IN, '--worker'],
+                         num_workers=2)
+
+    # WHEN
+    try:
+        outputs = [pool.run(['a', str(i)]) for i in range(5)]
+    finally:
+        pool.close()
+
+    # THEN
+    assert outputs[0][0].decode('utf-8').endswith('with a 0\n')
+    assert len(_get_pids(outputs)) == 2  # only two processes were started
+
+
+def test_pool_restarts_failed_worker():
+    # GIVEN
+    pool = McrWorkerPool([sys.executable, STAND_IN, '--worker'],
+                         num_workers=1, timeout=2, max_restarts=1)
+
+    # WHEN; THEN
+    try:
+        with pytest.raises(McrWorkerError):
+            pool.run(['crash'])
+        assert pool.run(['a'])[0].decode('utf-8').endswith('with a\n')
+        assert pool.health_check() == 1
+
+        with pytest.raises(McrWorkerError):
+            pool.run(['hang'])  # times out, no restarts left
+        assert pool.num_alive == 0
+    finally:
+        pool.close()
+
+
+def test_call_binary_falls_back_to_one_shot(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(BinCaller, 'set_environment',
+                        lambda self: (os.environ.copy(), 'linux'))
+    bin_caller = BinCaller()
+    assert bin_caller.start_workers(STAND_IN, num_workers=1, max_restarts=0)
+
+    # WHEN
+    with pytest.warns(RuntimeWarning):
+        bin_caller.call_binary(STAND_IN, ['crash'])
+    out, _ = bin_caller.call_binary(STAND_IN, ['a', ''])
+
+    # THEN
+    assert out.decode('utf-8').endswith('with a \n')
+    assert not bin_caller._worker_pools  # the dead pool is removed
+
+
+def test_call_binary_returns_job_error_as_stderr(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(BinCaller, 'set_environment',
+                        lambda self: (os.environ.copy(), 'linux'))
+    bin_caller = BinCaller()
+    assert bin_caller.start_workers(STAND_IN, num_workers=1)
+
+    # WHEN
+    try:
+        out, err = bin_caller.call_binary(STAND_IN, ['fail'])
+    finally:
+        bin_caller.stop_workers(STAND_IN)
+
+    # THEN
+    assert out == b'' and err == b'job failed'
+
+
+def test_start_workers_falls_back_if_silent(monkeypatch):
+    # GIVEN
+    monkeypatch.setattr(BinCaller, 'set_environment',
+                        lambda self: (os.environ.copy(), 'linux'))
+    bin_caller = BinCaller()
+
+    # WHEN
+    with pytest.warns(RuntimeWarning):
+        is_started = bin_caller.start_workers(
+            STAND_IN, worker_args=['--silent'], startup_timeout=1)
+
+    # THEN
+    assert not is_started
+    assert not bin_caller._worker_pools
@@ -0,0 +1,102 @@
+import pickle
+
+import pytest
+from tomato.io import IO
+from tomato.musicdata import FrozenDict, MusicData
+
+
+def test_get_loads_once():
+    # GIVEN
+    makam_dict = MusicData.get('makam')
+
+    # WHEN
+    result = MusicData.get('makam')
+
+    # THEN
+    assert result is makam_dict
+
+
+def test_get_read_only():
+    # GIVEN
+    makam_dict = MusicData.get('makam')
+
+    # WHEN; THEN
+    with pytest.raises(TypeError):
+        makam_dict['hicaz'] = {}
+    with pytest.raises(TypeError):
+        makam_dict['hicaz'].pop('key_signature')
+    assert isinstance(makam_dict['hicaz']['key_signature'], tuple)
+
+
+def test_frozen_dict_pickle():
+    # GIVEN
+    makam = MusicData.get('makam')['hicaz']
+
+    # WHEN
+    result = pickle.loads(pickle.dumps(makam))
+
+    # THEN
+    assert isinstance(result, FrozenDict)
+    assert result == makam
+
+
+def test_load_music_data_modifiable_copy():
+    # GIVEN
+    makam_dict = IO.load_music_data('makam')
+
+    # WHEN
+    makam_dict['hicaz']['key_signature'].append('C4#4')
+
+    # THEN
+    assert 'C4#4' not in MusicData.get('makam')['hicaz']['key_signature']
+
+
+def test_get_extended_key_signature():
+    # GIVEN
+    makam = 'hicaz'
+
+    # WHEN
+    result = MusicData.get_extended_key_signature(makam)
+
+    # THEN
+    expected = ('B3b4', 'B4b4', 'B5b4', 'C4#4', 'C5#4', 'C6#4',
+                'F4#4', 'F5#4', 'F6#4')
+    assert result == expected
+
+
+def test_get_note_cent():
+    # GIVEN
+    note_dict = IO.load_music_data('note')
+
+    # WHEN
+    result = {note: MusicData.get_note_cent(note) for note in note_dict}
+
+    # THEN
+    assert result == {note: val['Value'] for note, val in note_dict.items()}
+
+
+def test_get_mbids_from_symbtr_name():
+    # GIVEN
+    symbtr_mbids = IO.load_music_data('symbTr_mbid')
+    symbtr_name = symbtr_mbids[0]['name']
+
+    # WHEN
+    result = MusicData.get_mbids_from_symbtr_name(symbtr_name)
+
+    # THEN
+    assert result == tuple(e['uuid'] for e in symbtr_mbids
+                           if e['name'] == symbtr_name)
+    assert MusicData.get_mbids_from_symbtr_name('unknown--name') == ()
+
+
+def test_get_attribute_by_symbtr_slug():
+    # GIVEN
+    slug = 'aksaksemai'
+
+    # WHEN
+    key, attribute = MusicData.get_attribute_by_symbtr_slug('usul', slug)
+
+    # THEN
+    assert attribute['symbtr_slug'] == slug
+    assert MusicData.get('usul')[key] is attribute
+    assert MusicData.get_attribute_by_symbtr_slug('usul', 'x') == (None, None)
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+from tomato.scratcharea import ScratchArea
+
+
+def test_write_once_shares_artifact(tmpdir):
+    # GIVEN
+    produced = []
+
+    def producer():
+        produced.append(True)
+        return b'pitch'
+
+    # WHEN
+    with ScratchArea(root=str(tmpdir)) as scratch:
+        path = scratch.write_once('pitch.mat', producer)
+        same_path = scratch.write_once('pitch.mat', producer)
+        with open(path, 'rb') as f:
+            content = f.read()
+
+    # THEN
+    assert path == same_path
+    assert content == b'pitch'
+    assert produced == [True]
+
+
+def test_cleanup_on_error(tmpdir):
+    # GIVEN
+    scratch = ScratchArea(root=str(tmpdir))
+
+    # WHEN
+    with pytest.raises(RuntimeError):
+        with scratch:
+            with scratch:  # nested blocks share the folder
+                scratch.write('score_data.json', '{}')
+                out_folder = scratch.make_dir('out')
+            assert os.path.isdir(out_folder)
+            raise RuntimeError('binary failed')
+
+    # THEN
+    assert not os.listdir(str(tmpdir))
+    with pytest.raises(RuntimeError):
+        scratch.make_dir('out')
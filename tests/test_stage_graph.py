@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+from tomato.stagegraph import StageGraph
+
+
+def _example_graph():
+    return StageGraph([('pitch', ['audio']),
+                       ('pitch_filtered', ['pitch']),
+                       ('tonic', ['pitch_filtered']),
+                       ('melodic_progression', ['pitch_filtered']),
+                       ('note_models', ['pitch_filtered', 'tonic'])])
+
+
+def test_get_upstream_and_downstream():
+    # GIVEN
+    graph = _example_graph()
+
+    # WHEN
+    upstream = graph.get_upstream(['note_models'])
+    downstream = graph.get_downstream(['tonic'])
+
+    # THEN
+    assert upstream == ['pitch', 'pitch_filtered', 'tonic', 'note_models']
+    assert downstream == ['tonic', 'note_models']
+
+
+def test_stages_in_wrong_order_raise():
+    # GIVEN
+    stages = [('tonic', ['pitch']), ('pitch', ['audio'])]
+
+    # WHEN, THEN
+    with pytest.raises(ValueError):
+        StageGraph(stages)
+
+
+def test_run_computes_independent_stages_concurrently():
+    # GIVEN
+    graph = _example_graph()
+    barrier = threading.Barrier(2, timeout=5)
+    started = []
+
+    def compute(name):
+        started.append(name)
+        if name in ['tonic', 'melodic_progression']:
+            barrier.wait()  # raises if the stages do not run concurrently
+        return name.upper()
+
+    # WHEN
+    results = graph.run(compute, {'audio': 'audio.mp3'}, num_workers=4)
+
+    # THEN
+    assert results['note_models'] == 'NOTE_MODELS'
+    assert started[:2] == ['pitch', 'pitch_filtered']
+    assert started[-1] == 'note_models'
+
+
+def test_run_stops_at_failure():
+    # GIVEN
+    graph = _example_graph()
+    started = []
+
+    def compute(name):
+        started.append(name)
+        if name == 'tonic':
+            raise IOError('tonic failed')
+        time.sleep(0.1)
+        return name
+
+    # WHEN
+    with pytest.raises(IOError):
+        graph.run(compute, {}, num_workers=4)
+
+    # THEN
+    assert 'note_models' not in started